@@ -0,0 +1,42 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+# Read once: os.umask can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_mode(path: str) -> int:
+    """Permissions for a new version of `path`: those of the current file, else what open() would give"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_write(path: str, encoding: str = 'utf-8', fsync: bool = False) -> Iterator[IO[str]]:
+    """
+    Open a temp file next to `path` for writing text; it replaces `path` once the block completes
+
+    Readers see the old file or the new one, never a partial write, and a
+    failed block leaves no temp file behind. The new file keeps the mode of
+    the one it replaces (mkstemp alone would make it private). With `fsync`
+    the data is flushed to disk before the rename.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                    prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
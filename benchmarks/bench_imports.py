@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: cold start of the command line entry points
+
+Starts each command in a fresh interpreter --repeat times and reports the
+fastest and median wall-clock time, plus which heavy modules (anthropic,
+httpx, pydantic, numpy, requests) it imported, from -X importtime. The
+`eager_imports` baseline imports what workflow.py used to load before it
+even checked the environment. X credentials are blanked, so nothing talks to
+the network and workflow.py stops at its environment check. Prints a JSON result.
+
+    python benchmarks/bench_imports.py --repeat 20
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('anthropic', 'httpx', 'pydantic', 'numpy', 'requests')
+BLANKED_VARS = ('X_API_BEARER_TOKEN', 'X_API_KEY', 'X_API_SECRET', 'X_ACCESS_TOKEN', 'X_ACCESS_TOKEN_SECRET',
+                'X_USERNAME', 'X_USERNAMES', 'ANTHROPIC_API_KEY')
+
+
+def commands():
+    eager = 'import twitter_client_oauth, blog_topic_generator'
+    if importlib.util.find_spec('anthropic') is not None:
+        eager += ', anthropic'
+    return {
+        'python_baseline': ['-c', 'pass'],
+        'eager_imports': ['-c', eager],
+        'workflow_env_check': ['workflow.py'],
+        'cli_help': ['cli.py', '--help'],
+        'cli_check': ['cli.py', 'check'],
+        'cli_summarize': ['cli.py', 'summarize', '--file', 'liked_tweets.json'],
+    }
+
+
+def run(args, env) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def heavy_imports(args, env):
+    """Heavy top-level packages the command imported"""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imported = {line.rsplit('|', 1)[-1].strip() for line in result.stderr.splitlines() if '|' in line}
+    return [module for module in HEAVY_MODULES if module in imported]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=10, help="Interpreter starts per command")
+    args = parser.parse_args()
+
+    # Blank (rather than unset) so load_dotenv doesn't fill them in from .env
+    env = dict(os.environ, **{var: '' for var in BLANKED_VARS})
+    results = {'python': sys.version.split()[0], 'repeat': args.repeat, 'commands': {}}
+    for name, command in commands().items():
+        run(command, env)  # warm the bytecode and file caches
+        timings = [run(command, env) for _ in range(args.repeat)]
+        results['commands'][name] = {
+            'command': ' '.join(command),
+            'best_ms': round(min(timings) * 1000, 1),
+            'median_ms': round(statistics.median(timings) * 1000, 1),
+            'heavy_imports': heavy_imports(command, env)
+        }
+
+    base = results['commands']['eager_imports']['best_ms']
+    for stats in results['commands'].values():
+        stats['speedup_vs_eager'] = round(base / stats['best_ms'], 2) if stats['best_ms'] else None
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmark: fetch, preprocess, generate and save on recorded fixtures
+
+Runs fully offline. liked_tweets.json is scaled up to each --sizes tweet count
+(unique ids, authors, engagement and reshuffled text, so dedup and ranking
+have real work to do) and replayed as X API pages by fake_x_api.FakeXAPI in a child
+process; model calls are answered by fake_anthropic.FakeAnthropic replaying
+the recorded blog_topics.txt. For every stage and size it reports throughput,
+latency percentiles (per page for fetch, per run otherwise) and peak resident
+memory, as JSON for comparing commits. Each stage runs in a fresh process, so
+one stage's memory doesn't count against the next.
+
+    python benchmarks/bench_pipeline.py --sizes 100,10000 --output bench.json
+
+Stages:
+  fetch       TwitterClientOAuth.get_liked_tweets paging through every liked tweet
+  preprocess  BlogTopicGenerator.prepare_tweet_content over all tweets (clean, dedup, rank, pack)
+  generate    BlogTopicGenerator.generate_blog_topics reading the saved tweets file, keeping --max-tweets
+  save        TwitterClientOAuth.save_tweets_to_file writing every tweet
+
+Scaled tweets files are cached in benchmarks/fixtures/ (--rebuild-fixtures to redo).
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Sequence
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from blog_topic_generator import BlogTopicGenerator
+from fake_anthropic import FakeAnthropic
+from fake_x_api import FakeXAPI
+from run_metrics import RunMetrics
+from semantic_index import HAS_NUMPY
+from tweet_io import HAS_ORJSON, iter_tweets, write_tweets
+from tweet_record import as_tweets, slim_tweet
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+STAGES = ('fetch', 'preprocess', 'generate', 'save')
+DEFAULT_SIZES = '100,10000,1000000'
+
+# Scaled tweets: ids count up from FIXTURE_ID_BASE, liked every FIXTURE_SPACING
+# seconds going back from FIXTURE_NEWEST, spread over FIXTURE_AUTHORS variants
+# of each sample author
+FIXTURE_ID_BASE = 10 ** 18
+FIXTURE_NEWEST = datetime(2025, 6, 1)
+FIXTURE_SPACING = 30
+FIXTURE_AUTHORS = 200
+DUPLICATE_EVERY = 25
+
+
+def load_sample():
+    with open(os.path.join(ROOT, 'liked_tweets.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ScaledTweets(Sequence):
+    """
+    The sample tweets repeated `size` times, generated on access
+
+    Tweet `i` is a deterministic variation of sample tweet `i % len(sample)`,
+    so the fake API can serve a million tweets without holding them in memory.
+    """
+
+    def __init__(self, sample, size: int):
+        self.sample = sample
+        self.size = size
+        self.sample_index = {tweet['id']: j for j, tweet in enumerate(sample)}
+        self.vocabulary = sorted({word for tweet in sample for word in tweet.get('text', '').split()
+                                  if not word.startswith(('http', '@', '#'))})
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.size))]
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return self._tweet(index)
+
+    def _scaled_id(self, sample_id, copy: int):
+        """Id of the copy-th scaled version of a sample tweet (ids outside the sample are kept)"""
+        j = self.sample_index.get(sample_id)
+        return str(FIXTURE_ID_BASE + copy * len(self.sample) + j) if j is not None else sample_id
+
+    def _tweet(self, i: int):
+        copy, j = divmod(i, len(self.sample))
+        base = self.sample[j]
+        rng = random.Random(i)
+        tweet = dict(base, id=str(FIXTURE_ID_BASE + i))
+
+        created_at = FIXTURE_NEWEST - timedelta(seconds=i * FIXTURE_SPACING)
+        tweet['created_at'] = created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        # Copies get new text of the same length drawn from the sample's words (and
+        # lose the now meaningless entity offsets); every DUPLICATE_EVERY-th repeats it
+        if copy and i % DUPLICATE_EVERY:
+            tweet['text'] = ' '.join(rng.choices(self.vocabulary, k=len(base['text'].split())))
+            tweet.pop('entities', None)
+
+        if base.get('conversation_id'):
+            tweet['conversation_id'] = (self._scaled_id(base['conversation_id'], copy)
+                                        if base['conversation_id'] != base['id'] else tweet['id'])
+        if base.get('referenced_tweets'):
+            tweet['referenced_tweets'] = [dict(ref, id=self._scaled_id(ref.get('id'), copy))
+                                          for ref in base['referenced_tweets']]
+        if base.get('public_metrics'):
+            tweet['public_metrics'] = {key: int(value * rng.uniform(0, 2))
+                                       for key, value in base['public_metrics'].items()}
+
+        variant = copy % FIXTURE_AUTHORS
+        if variant and base.get('author_id'):
+            author = base.get('author') or {}
+            tweet['author_id'] = f"{base['author_id']}{variant:03d}"
+            tweet['author'] = dict(author, id=tweet['author_id'],
+                                   username=f"{author.get('username', 'user')}_{variant}")
+        return tweet
+
+
+def build_fixture(sample, size: int, rebuild: bool = False):
+    """Write (or reuse) the scaled tweets file, as save_tweets_to_file would after a fetch"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, f"liked_tweets_{size}.json")
+    if os.path.exists(path) and not rebuild:
+        return path, None
+    started = time.perf_counter()
+    write_tweets((slim_tweet(tweet) for tweet in ScaledTweets(sample, size)), path)
+    return path, round(time.perf_counter() - started, 3)
+
+
+def serve_fixture(size: int, connection):
+    """Child process: serve the scaled tweets as X API pages until terminated"""
+    api = FakeXAPI(ScaledTweets(load_sample(), size), rate_limit=10 ** 9)
+    connection.send(api.base_url)
+    api._server.serve_forever()
+
+
+def percentiles(samples):
+    """Nearest-rank p50/p90/p99 and max of latency samples, in seconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    rank = lambda p: ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+    return {'p50': round(rank(50), 5), 'p90': round(rank(90), 5), 'p99': round(rank(99), 5),
+            'max': round(ordered[-1], 5)}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / 1e6 if sys.platform == 'darwin' else peak * 1024 / 1e6, 2)
+
+
+def measure(run, size: int, repeat: int, latency_unit: str = 'run'):
+    """
+    Time `repeat` runs of a stage
+
+    `run` returns the per-unit latency samples of a run (e.g. per page), or
+    None to use the run's own duration.
+    """
+    timings, samples = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        unit_samples = run()
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        samples.extend(unit_samples if unit_samples is not None else [elapsed])
+
+    best = min(timings)
+    stats = {
+        'runs': repeat,
+        'seconds': round(best, 4),
+        'mean_seconds': round(sum(timings) / len(timings), 4),
+        'tweets_per_second': round(size / best) if best else None,
+        'latency_unit': latency_unit,
+        'latency_seconds': percentiles(samples),
+    }
+    return stats
+
+
+def bench_fetch(size: int, fixture: str, args):
+    """Page through the fake API with the OAuth client (page size 100, checkpoints off)"""
+    from twitter_client_oauth import TwitterClientOAuth
+
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.get_context('spawn').Process(target=serve_fixture, args=(size, child), daemon=True)
+    server.start()
+    try:
+        client = TwitterClientOAuth()
+        client.base_url = parent.recv()
+        client.checkpoint = None
+        user_id = client.get_user_id('bench')
+        oldest = FIXTURE_NEWEST - timedelta(seconds=size * FIXTURE_SPACING)
+        days_back = (datetime.now() - oldest).days + 1
+
+        def run():
+            client.metrics = RunMetrics(max_spans=size // 100 + 100)
+            tweets = client.get_liked_tweets(user_id, max_results=size, days_back=days_back)
+            if len(tweets) != size or not client.last_fetch_stats['complete']:
+                raise RuntimeError(f"Fetched {len(tweets)} of {size} tweets")
+            return [span['duration'] for span in client.metrics.spans if span['name'] == 'x_api.request']
+
+        stats = measure(run, size, args.repeat, latency_unit='page')
+        stats['pages'] = client.last_fetch_stats['pages_fetched']
+        return stats
+    finally:
+        server.terminate()
+        server.join()
+
+
+def bench_preprocess(size: int, fixture: str, args):
+    generator = BlogTopicGenerator(output_dir=args.output_dir, client=FakeAnthropic(''), use_cache=False)
+    tweets = list(as_tweets(iter_tweets(fixture)))
+
+    def run():
+        generator.prepare_tweet_content(tweets)
+
+    stats = measure(run, size, args.repeat)
+    stats['tweets_packed'] = generator.last_packing_stats['tweets_packed']
+    stats['duplicates_collapsed'] = generator.last_packing_stats['duplicates_collapsed']
+    return stats
+
+
+def bench_generate(size: int, fixture: str, args):
+    client = FakeAnthropic.replaying(os.path.join(ROOT, 'blog_topics.txt'), latency=args.model_latency)
+    generator = BlogTopicGenerator(output_dir=args.output_dir, client=client, use_cache=False)
+
+    def run():
+        results = generator.generate_blog_topics(fixture, max_tweets=args.max_tweets)
+        if not results.get('blog_topics'):
+            raise RuntimeError("No topics generated")
+
+    stats = measure(run, size, args.repeat)
+    stats['model_calls'] = client.call_count
+    return stats
+
+
+def bench_save(size: int, fixture: str, args):
+    from twitter_client_oauth import TwitterClientOAuth
+
+    client = TwitterClientOAuth()
+    tweets = list(iter_tweets(fixture))
+    filename = os.path.join(args.output_dir, 'liked_tweets.json')
+
+    def run():
+        client.save_tweets_to_file(tweets, filename)
+
+    stats = measure(run, size, args.repeat)
+    stats['file_mb'] = round(os.path.getsize(filename) / 1e6, 2)
+    return stats
+
+
+BENCHES = {'fetch': bench_fetch, 'preprocess': bench_preprocess, 'generate': bench_generate, 'save': bench_save}
+
+
+def run_stage(stage: str, size: int, fixture: str, args, connection):
+    """Child process: benchmark one stage and send back its stats (or the error)"""
+    try:
+        # The pipeline's progress output would drown the results
+        with tempfile.TemporaryDirectory() as output_dir, open(os.devnull, 'w') as devnull, \
+                redirect_stdout(devnull):
+            args.output_dir = output_dir
+            stats = BENCHES[stage](size, fixture, args)
+        stats['peak_rss_mb'] = peak_rss_mb()
+    except Exception as e:
+        stats = {'error': f"{e.__class__.__name__}: {e}"}
+    connection.send(stats)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__.split('\n\n', 2)[2])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated tweet counts")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage (best is reported)")
+    parser.add_argument('--max-tweets', type=int, default=50, help="Most recent tweets the generate stage keeps")
+    parser.add_argument('--model-latency', type=float, default=0.0, help="Seconds each fake model call takes")
+    parser.add_argument('--rebuild-fixtures', action='store_true', help="Regenerate cached scaled tweets files")
+    parser.add_argument('--output', help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = [stage for stage in args.stages.split(',') if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    # Offline: dummy credentials, and blog_prompt.txt is read from the working directory
+    for key in ('X_API_BEARER_TOKEN', 'X_API_KEY', 'X_API_SECRET', 'X_ACCESS_TOKEN', 'X_ACCESS_TOKEN_SECRET'):
+        os.environ[key] = 'bench'
+    os.chdir(ROOT)
+
+    results = {
+        'commit': git_commit(),
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'orjson': HAS_ORJSON,
+        'numpy': HAS_NUMPY,
+        'repeat': args.repeat,
+        'max_tweets': args.max_tweets,
+        'model_latency': args.model_latency,
+        'sizes': {}
+    }
+    sample = load_sample()
+    spawn = multiprocessing.get_context('spawn')
+    for size in sizes:
+        print(f"Benchmarking {size} tweets: {', '.join(stages)}", file=sys.stderr)
+        fixture, build_seconds = build_fixture(sample, size, args.rebuild_fixtures)
+        entry = results['sizes'][str(size)] = {
+            'fixture': {'file_mb': round(os.path.getsize(fixture) / 1e6, 2), 'build_seconds': build_seconds},
+            'stages': {}
+        }
+        for stage in stages:
+            parent, child = spawn.Pipe()
+            process = spawn.Process(target=run_stage, args=(stage, size, fixture, args, child))
+            process.start()
+            child.close()
+            try:
+                stats = parent.recv()
+            except EOFError:
+                stats = None
+            process.join()
+            if stats is None:
+                stats = {'error': f"Benchmark process died (exit code {process.exitcode})"}
+            entry['stages'][stage] = stats
+            if 'error' in stats:
+                print(f"  {stage}: {stats['error']}", file=sys.stderr)
+            else:
+                print(f"  {stage}: {stats['seconds']}s ({stats['tweets_per_second']} tweets/s, "
+                      f"{stats['peak_rss_mb']} MB peak)", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: batch tweet cleaning vs. the original per-tweet loop
+
+Scales liked_tweets.json up to --size tweets and times the cleaning loop that
+prepare_tweet_content used to run against tweet_preprocessing.clean_tweets,
+serially and on a process pool. Prints a JSON result.
+
+    python benchmarks/bench_preprocessing.py --size 50000 --processes 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tweet_preprocessing import clean_tweets
+from tweet_record import Tweet
+
+
+def legacy_clean(tweets):
+    """The cleaning loop from the original prepare_tweet_content"""
+    tweet_texts = []
+
+    for tweet in tweets:
+        text = tweet.get('text', '').strip()
+        if not text:
+            continue
+
+        import re
+        text = re.sub(r'https?://\S+', '', text)
+        text = re.sub(r'\s+', ' ', text)
+        text = text.strip()
+
+        if text:
+            tweet_texts.append(text)
+
+    return '\n\n'.join(tweet_texts)
+
+
+def load_scaled_tweets(size: int):
+    """Repeat the sample tweets until there are `size` of them"""
+    with open(os.path.join(ROOT, 'liked_tweets.json'), 'r', encoding='utf-8') as f:
+        sample = json.load(f)
+    return [sample[i % len(sample)] for i in range(size)]
+
+
+def best_of(func, repeat: int) -> float:
+    """Fastest wall-clock time of `repeat` runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=20000, help="Number of tweets to clean")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per variant (best is reported)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help="Workers for the process pool variant")
+    args = parser.parse_args()
+
+    tweets = load_scaled_tweets(args.size)
+    records = [Tweet.from_dict(tweet) for tweet in tweets]
+
+    variants = {
+        'legacy_loop': lambda: legacy_clean(tweets),
+        'clean_tweets': lambda: clean_tweets(records, strip_mentions=False, strip_hashtags=False, strip_emoji=False),
+        'clean_tweets_full': lambda: clean_tweets(records),
+    }
+    if args.processes > 1:
+        variants['clean_tweets_pool'] = lambda: clean_tweets(records, processes=args.processes)
+
+    results = {'size': args.size, 'processes': args.processes, 'variants': {}}
+    for name, func in variants.items():
+        seconds = best_of(func, args.repeat)
+        results['variants'][name] = {
+            'seconds': round(seconds, 4),
+            'tweets_per_second': round(args.size / seconds) if seconds else None
+        }
+
+    baseline = results['variants']['legacy_loop']['seconds']
+    for stats in results['variants'].values():
+        stats['speedup'] = round(baseline / stats['seconds'], 2) if stats['seconds'] else None
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: streaming tweet file I/O vs. json.load / json.dump(indent=2)
+
+Scales liked_tweets.json up to --size tweets and times loading and saving it
+the original way (whole-file json.load, pretty-printed json.dump) against
+tweet_io.iter_tweets and tweet_io.write_tweets, as a JSON array and as JSONL.
+Peak Python heap during each load is measured with tracemalloc while keeping
+the --keep most recent tweets, like generate_blog_topics does. Prints a JSON result.
+
+    python benchmarks/bench_tweet_io.py --size 100000
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tweet_io import HAS_ORJSON, iter_tweets, write_tweets
+
+
+def load_scaled_tweets(size: int):
+    """Repeat the sample tweets until there are `size` of them, with unique ids"""
+    with open(os.path.join(ROOT, 'liked_tweets.json'), 'r', encoding='utf-8') as f:
+        sample = json.load(f)
+    return [dict(sample[i % len(sample)], id=str(i)) for i in range(size)]
+
+
+def legacy_save(tweets, filename):
+    """save_tweets_to_file before streaming"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(tweets, f, indent=2, ensure_ascii=False, default=str)
+
+
+def legacy_load(filename, keep):
+    """generate_blog_topics before streaming: load everything, then slice"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        tweets = json.load(f)
+    return sorted(tweets, key=lambda tweet: tweet.get('created_at') or '', reverse=True)[:keep]
+
+
+def streaming_load(filename, keep):
+    return heapq.nlargest(keep, iter_tweets(filename), key=lambda tweet: tweet.get('created_at') or '')
+
+
+def best_of(func, repeat: int) -> float:
+    """Fastest wall-clock time of `repeat` runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def peak_memory(func) -> int:
+    """Peak traced heap bytes while running func"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=50000, help="Number of tweets in the file")
+    parser.add_argument('--keep', type=int, default=50, help="Most recent tweets kept when loading")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per variant (best is reported)")
+    args = parser.parse_args()
+
+    tweets = load_scaled_tweets(args.size)
+    results = {'size': args.size, 'keep': args.keep, 'orjson': HAS_ORJSON, 'save': {}, 'load': {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {
+            'legacy_pretty_json': os.path.join(tmp, 'legacy.json'),
+            'write_tweets_json': os.path.join(tmp, 'compact.json'),
+            'write_tweets_jsonl': os.path.join(tmp, 'compact.jsonl'),
+        }
+        savers = {
+            'legacy_pretty_json': lambda: legacy_save(tweets, files['legacy_pretty_json']),
+            'write_tweets_json': lambda: write_tweets(tweets, files['write_tweets_json']),
+            'write_tweets_jsonl': lambda: write_tweets(tweets, files['write_tweets_jsonl']),
+        }
+        for name, func in savers.items():
+            seconds = best_of(func, args.repeat)
+            results['save'][name] = {
+                'seconds': round(seconds, 4),
+                'file_mb': round(os.path.getsize(files[name]) / 1e6, 2)
+            }
+
+        loaders = {
+            'legacy_json_load': lambda: legacy_load(files['legacy_pretty_json'], args.keep),
+            'iter_tweets_json': lambda: streaming_load(files['write_tweets_json'], args.keep),
+            'iter_tweets_jsonl': lambda: streaming_load(files['write_tweets_jsonl'], args.keep),
+        }
+        for name, func in loaders.items():
+            results['load'][name] = {
+                'seconds': round(best_of(func, args.repeat), 4),
+                'peak_heap_mb': round(peak_memory(func) / 1e6, 2)
+            }
+
+    for section, baseline in (('save', 'legacy_pretty_json'), ('load', 'legacy_json_load')):
+        base = results[section][baseline]['seconds']
+        for stats in results[section].values():
+            stats['speedup'] = round(base / stats['seconds'], 2) if stats['seconds'] else None
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
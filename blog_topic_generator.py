@@ -1,87 +1,449 @@
+import contextvars
+import hashlib
+import heapq
+import importlib.util
 import json
 import os
-from typing import List, Dict
+import re
+import random
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from itertools import chain, islice
+from typing import Callable, List, Dict, Iterable, Optional, Tuple, Union
 from dotenv import load_dotenv
+from atomic_write import atomic_write
+from tweet_store import TweetStore
+from response_cache import ResponseCache
+from tweet_packing import rank_tweets, pack_tweets, chunk_texts, estimate_tokens, CHARS_PER_TOKEN
+from tweet_preprocessing import clean_tweets
+from tweet_dedup import collapse_duplicates
+from semantic_index import SemanticIndex, HAS_NUMPY
+from topic_clustering import cluster_tweets
+from tweet_analytics import compute_analytics, columns_from_tweets, analyze_store
+from tweet_io import iter_tweets
+from tweet_record import Tweet, as_tweet, as_tweets
+from run_metrics import RunMetrics, traced
 
-load_dotenv()
+# anthropic (with httpx and pydantic) is slow to import, so it's only loaded
+# once a generator actually creates a client
+HAS_ANTHROPIC = importlib.util.find_spec('anthropic') is not None
 
-try:
+
+# Map-reduce prompts: summarize batches of tweets, then merge the summaries
+MAP_PROMPT = """Below is a batch of tweets I liked. List the 3-7 distinct themes, ideas or debates they raise, \
+one per line, each followed by a one-sentence note on what makes it interesting. Be concise and do not suggest blog posts yet.
+
+Tweets:
+
+{tweet_content}"""
+
+MERGE_PROMPT = """Below are theme lists distilled from separate batches of tweets I liked. Merge them into one \
+deduplicated list of at most 15 themes, one per line, keeping the one-sentence notes and noting which themes recur across batches.
+
+{theme_lists}"""
+
+# With prompt caching the template is sent with this note in place of the tweets, so
+# it is the same on every call and can be cached, and the tweets follow it
+CACHED_PROMPT_TWEETS_NOTE = "(listed at the end of this message)"
+CACHED_PROMPT_TWEETS = "My recently liked tweets:\n\n{tweet_content}"
+# Shorter prefixes aren't cached by the API (1024 tokens for Sonnet and Opus, 2048 for Haiku)
+MIN_CACHEABLE_TOKENS = 1024
+
+
+# Tweets cleaned per step when preparing content from a lazy iterator
+PREPARE_CHUNK_SIZE = 5000
+
+TITLE_PATTERN = re.compile(r'\*\*Title\*\*:?\s*(.+)')
+DESCRIPTION_PATTERN = re.compile(r'\*\*Description\*\*:?\s*(.+)')
+
+
+def parse_topic_suggestions(response_text: str) -> List[Dict]:
+    """Pull the title and description of each suggestion out of the model's response"""
+    topics = []
+    for line in response_text.splitlines():
+        title = TITLE_PATTERN.search(line)
+        if title:
+            topics.append({'title': title.group(1).strip().strip('"*').strip(), 'description': ''})
+            continue
+        description = DESCRIPTION_PATTERN.search(line)
+        if description and topics and not topics[-1]['description']:
+            topics[-1]['description'] = description.group(1).strip()
+    return topics
+
+
+def create_anthropic_client(api_key: Optional[str] = None):
+    """An Anthropic client for `api_key` (default ANTHROPIC_API_KEY), or None without the package or a key"""
+    api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+    if not HAS_ANTHROPIC or not api_key:
+        return None
     import anthropic
-    HAS_ANTHROPIC = True
-except ImportError:
-    HAS_ANTHROPIC = False
+    return anthropic.Anthropic(api_key=api_key)
+
+
+def cacheable_prompt(prompt_template: str, tweet_content: str) -> List[Dict]:
+    """
+    Fill a prompt template as two content blocks: a cacheable static prefix, then the tweets
+    
+    The prefix is the template with a note pointing to the end of the message in
+    place of {tweet_content}, marked with cache_control, so every call sends the
+    same prefix and pays for it at the cache read price after the first.
+    """
+    return [
+        {'type': 'text', 'text': prompt_template.format(tweet_content=CACHED_PROMPT_TWEETS_NOTE),
+         'cache_control': {'type': 'ephemeral'}},
+        {'type': 'text', 'text': CACHED_PROMPT_TWEETS.format(tweet_content=tweet_content)}
+    ]
 
 
 class BlogTopicGenerator:
-    def __init__(self):
+    def __init__(self, output_dir: str = ".", client=None, use_cache: Optional[bool] = None,
+                 metrics: Optional[RunMetrics] = None):
         self.anthropic_api_key = os.getenv('ANTHROPIC_API_KEY')
-        if HAS_ANTHROPIC and self.anthropic_api_key:
-            self.client = anthropic.Anthropic(api_key=self.anthropic_api_key)
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Model settings (part of the response cache key)
+        self.model = os.getenv('ANTHROPIC_MODEL', "claude-3-7-sonnet-20250219")
+        self.max_tokens = 1500
+        self.temperature = 0.8
+        
+        # How much tweet content goes into each prompt, and which tweets win
+        self.token_budget = int(os.getenv('TWEET_TOKEN_BUDGET', '4000'))
+        self.rank_by = os.getenv('TWEET_RANK_BY', 'recency')
+        self.dedupe = os.getenv('DEDUPE_TWEETS', '1') != '0'
+        self.cluster_representatives = int(os.getenv('CLUSTER_REPRESENTATIVES', '3'))
+        self.last_cluster_stats = []
+        
+        # "single" sends one packed prompt; "map_reduce" summarizes every tweet in
+        # concurrent batches first and then generates topics from the summaries
+        self.topic_mode = os.getenv('TOPIC_MODE', 'single')
+        self.map_concurrency = int(os.getenv('MAP_CONCURRENCY', '4'))
+        self.max_retries = int(os.getenv('MODEL_MAX_RETRIES', '2'))
+        self.map_max_tokens = 600
+        self.last_map_reduce_stats = {}
+        
+        # Stream the final response to the console and output file as it's generated
+        self.stream = os.getenv('STREAM_OUTPUT', '0') == '1'
+        self.last_generation_stats = {}
+        self.last_response_text = None
+        
+        # Send the static part of blog_prompt.txt as a cached prefix, so repeated
+        # generations (batch runs, backfills) pay full price for it once per cache lifetime
+        self.prompt_caching = os.getenv('PROMPT_CACHING', '0') == '1'
+        self._warned_short_prefix = False
+        
+        # Vector index over analyzed tweets and past topics (needs numpy)
+        self.semantic_index = None
+        self.similar_topic_threshold = float(os.getenv('SIMILAR_TOPIC_THRESHOLD', '0.5'))
+        if HAS_NUMPY and os.getenv('SEMANTIC_INDEX', '1') != '0':
+            self.semantic_index = SemanticIndex(self._output_path('semantic_index'))
+        self.last_packing_stats = {}
+        self.last_prepared_items = None
+        
+        # Identical prompts and settings are answered from the on-disk cache
+        # unless bypassed with use_cache=False or BYPASS_CACHE=1
+        if use_cache is None:
+            use_cache = os.getenv('BYPASS_CACHE', '0') != '1'
+        self.cache = ResponseCache(os.getenv('RESPONSE_CACHE_DIR', '.cache/responses')) if use_cache else None
+        
+        # Spans, counters and token usage for the run report
+        self.metrics = metrics or RunMetrics()
+        
+        # An Anthropic client can be shared between generators (e.g. in batch runs)
+        self.client = client if client is not None else create_anthropic_client(self.anthropic_api_key)
     
-    def prepare_tweet_content(self, tweets: List[Dict], max_tweets: int = 20) -> str:
-        """Prepare simplified tweet content for analysis - text only"""
-        tweet_texts = []
+    def _output_path(self, filename: str) -> str:
+        """Resolve an output filename inside the output directory"""
+        if os.path.isabs(filename):
+            return filename
+        return os.path.join(self.output_dir, filename)
+    
+    @traced('preprocess')
+    def _prepare_items(self, tweets: Iterable[Tweet]) -> Tuple[List[Tuple[Tweet, str]], int]:
+        """
+        Clean tweet texts and collapse near-duplicates. Returns (tweet, text) pairs and the number collapsed.
         
-        for tweet in tweets[:max_tweets]:
-            text = tweet.get('text', '').strip()
-            if not text:
-                continue
-                
-            # Clean up text (remove URLs, excessive whitespace)
-            import re
-            text = re.sub(r'https?://\S+', '', text)  # Remove URLs entirely
-            text = re.sub(r'\s+', ' ', text)          # Normalize whitespace
-            text = text.strip()
-            
-            if text:  # Only add non-empty tweets
-                tweet_texts.append(text)
+        Tweet dicts are converted to `Tweet` records on the way in.
+        """
+        # Clean up text (remove URLs, mentions, hashtags, emoji, excessive whitespace) a chunk
+        # at a time, so a streamed input (e.g. iter_tweets) is consumed lazily
+        cleaned = []
+        tweets = as_tweets(tweets)
+        while True:
+            chunk = list(islice(tweets, PREPARE_CHUNK_SIZE))
+            if not chunk:
+                break
+            texts = clean_tweets(chunk)
+            cleaned.extend((tweet, text) for tweet, text in zip(chunk, texts) if text)  # Only keep non-empty tweets
+        # Kept for link_topics, so a streamed input doesn't have to be read (or held) twice
+        self.last_prepared_items = cleaned
+        
+        # Collapse near-duplicates and thread fragments into one representative each
+        duplicates_collapsed = 0
+        if self.dedupe:
+            collapsed = collapse_duplicates(cleaned)
+            duplicates_collapsed = len(cleaned) - len(collapsed)
+            cleaned = [
+                (tweet, text if count == 1 else f"{text} (+{count - 1} similar liked tweets)")
+                for tweet, text, count in collapsed
+            ]
+            if duplicates_collapsed:
+                print(f"Collapsed {duplicates_collapsed} near-duplicate tweets")
+        
+        self.metrics.annotate(tweets_kept=len(cleaned), duplicates_collapsed=duplicates_collapsed)
+        return cleaned, duplicates_collapsed
+    
+    @traced('rank')
+    def _rank_items(self, cleaned: List[Tuple[Tweet, str]], rank_by: str) -> List[Tuple[Tweet, str]]:
+        """
+        Order (tweet, text) pairs for packing
+        
+        `cluster` groups tweets by topic locally (TF-IDF + k-means) and interleaves
+        the clusters, so the prompt covers every theme instead of just the newest
+        or most popular tweets. Cluster stats are kept in `self.last_cluster_stats`.
+        """
+        self.last_cluster_stats = []
+        if rank_by == 'cluster':
+            if HAS_NUMPY:
+                ranked, self.last_cluster_stats = cluster_tweets(cleaned, per_cluster=self.cluster_representatives)
+                print(f"Grouped tweets into {len(self.last_cluster_stats)} topic clusters")
+                return ranked
+            print("Warning: clustering needs numpy, ranking by hybrid instead")
+            rank_by = 'hybrid'
+        return rank_tweets(cleaned, rank_by)
+    
+    @traced('pack')
+    def prepare_tweet_content(self, tweets: Iterable[Tweet], max_tweets: Optional[int] = None,
+                              token_budget: Optional[int] = None, rank_by: Optional[str] = None) -> str:
+        """
+        Prepare simplified tweet content for analysis - text only
+        
+        Tweets are ranked (by recency, engagement or both) and packed greedily
+        into the token budget. What made it in is recorded in `self.last_packing_stats`.
+        """
+        token_budget = token_budget or self.token_budget
+        rank_by = rank_by or self.rank_by
+        
+        cleaned, duplicates_collapsed = self._prepare_items(tweets)
         
-        return '\n\n'.join(tweet_texts)
+        ranked = self._rank_items(cleaned, rank_by)
+        if max_tweets is None and self.last_cluster_stats:
+            # Round-robin order: the first N * clusters entries are each cluster's N most central tweets
+            max_tweets = self.cluster_representatives * len(self.last_cluster_stats)
+        if max_tweets is not None:
+            ranked = ranked[:max_tweets]
+        packed, tokens_used = pack_tweets(ranked, token_budget)
+        
+        self.last_packing_stats = {
+            'rank_by': rank_by,
+            'token_budget': token_budget,
+            'tweets_available': len(cleaned),
+            'duplicates_collapsed': duplicates_collapsed,
+            'tweets_packed': len(packed),
+            'tokens_packed': tokens_used
+        }
+        print(f"Packed {len(packed)}/{len(cleaned)} tweets into ~{tokens_used}/{token_budget} tokens (ranked by {rank_by})")
+        self.metrics.annotate(tweets_packed=len(packed), estimated_tokens=tokens_used)
+        self.metrics.count('prompt.estimated_tweet_tokens', tokens_used)
+        
+        return '\n\n'.join(text for _, text in packed)
+    
+    @traced('map_reduce')
+    def map_tweet_batches(self, tweets: List[Tweet]) -> str:
+        """
+        Map stage of map-reduce generation: distill every tweet into theme lists
+        
+        All tweets (not just what fits one prompt) are split into token-bounded
+        batches and summarized by concurrent model calls. If the combined theme
+        lists still don't fit the budget they are merged in further rounds (in
+        pairs when each list is over the budget alone), and as a last resort cut
+        to an equal share of it, so the reduce prompt always fits.
+        Returns content for the final (reduce) prompt; stats are recorded in
+        `self.last_map_reduce_stats`.
+        """
+        started = time.perf_counter()
+        cleaned, duplicates_collapsed = self._prepare_items(tweets)
+        ranked = self._rank_items(cleaned, self.rank_by)
+        batches = chunk_texts([text for _, text in ranked], self.token_budget)
+        
+        print(f"🗺️  Map: summarizing {len(ranked)} tweets in {len(batches)} batches "
+              f"({self.map_concurrency} concurrent calls)")
+        prompts = [MAP_PROMPT.format(tweet_content='\n\n'.join(batch)) for batch in batches]
+        partials, failed = self._map_concurrently(prompts)
+        map_calls = len(prompts)
+        
+        # Merge partial theme lists until they fit in the final prompt
+        merge_rounds = 0
+        while len(partials) > 1 and estimate_tokens('\n\n'.join(partials)) > self.token_budget:
+            groups = chunk_texts(partials, self.token_budget)
+            if len(groups) == len(partials):
+                # Every list is over the budget on its own: merge them in pairs so each round still shrinks
+                groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+            merge_rounds += 1
+            print(f"🔁 Merge round {merge_rounds}: {len(partials)} theme lists into {len(groups)}")
+            prompts = [MERGE_PROMPT.format(theme_lists='\n\n'.join(group)) for group in groups]
+            partials, merge_failed = self._map_concurrently(prompts)
+            map_calls += len(prompts)
+            failed += merge_failed
+        
+        # Merged lists can still be over a small budget; cut each to an equal share so the reduce prompt fits
+        header = f"(Themes distilled from {len(ranked)} liked tweets)"
+        budget = self.token_budget - estimate_tokens(header) - 1
+        truncated = 0
+        if estimate_tokens('\n\n'.join(partials)) > budget:
+            share = max(budget // len(partials) - 1, 1) * CHARS_PER_TOKEN
+            truncated = sum(1 for partial in partials if len(partial) > share)
+            partials = [partial[:share] for partial in partials]
+        
+        self.last_map_reduce_stats = {
+            'tweets_available': len(ranked),
+            'duplicates_collapsed': duplicates_collapsed,
+            'batches': len(batches),
+            'map_calls': map_calls,
+            'merge_rounds': merge_rounds,
+            'truncated_lists': truncated,
+            'failed_calls': failed,
+            'map_seconds': round(time.perf_counter() - started, 3)
+        }
+        
+        return header + '\n\n' + '\n\n'.join(partials)
+    
+    def _map_concurrently(self, prompts: List[str]) -> Tuple[List[str], int]:
+        """Run map prompts on a bounded thread pool. Returns responses in order and the number that failed."""
+        results: List[Optional[str]] = [None] * len(prompts)
+        with ThreadPoolExecutor(max_workers=self.map_concurrency) as executor:
+            # Each call runs in a copy of this context, so its spans nest under the current one
+            futures = {
+                executor.submit(contextvars.copy_context().run, self._complete_with_retries, prompt,
+                                self.map_max_tokens): i
+                for i, prompt in enumerate(prompts)
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"❌ Map call {futures[future] + 1}/{len(prompts)} failed: {e}")
+        
+        responses = [result for result in results if result]
+        if not responses:
+            raise RuntimeError("All map calls failed")
+        return responses, len(prompts) - len(responses)
+    
+    def _complete_with_retries(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """`_complete` with jittered exponential backoff between failed attempts"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._complete(prompt, max_tokens=max_tokens)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = (2 ** attempt) + random.uniform(0, 1)
+                print(f"⚠️  Model call failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def _format_prompt(self, tweet_content: str) -> Union[str, List[Dict]]:
+        """
+        Fill the blog_prompt.txt template with the tweet content
+        
+        With prompt caching on, the prompt is a cacheable prefix and the tweets
+        as separate content blocks (see `cacheable_prompt`).
+        """
+        try:
+            with open('blog_prompt.txt', 'r', encoding='utf-8') as f:
+                prompt_template = f.read()
+            print("✅ Prompt template loaded and formatted successfully")
+        except FileNotFoundError:
+            print("Warning: blog_prompt.txt not found. Using default prompt.")
+            prompt_template = "Based on these tweets, suggest 3-5 blog post ideas:\n\n{tweet_content}"
+        
+        if not self.prompt_caching:
+            return prompt_template.format(tweet_content=tweet_content)
+        
+        prompt = cacheable_prompt(prompt_template, tweet_content)
+        prefix_tokens = estimate_tokens(prompt[0]['text'])
+        if prefix_tokens < MIN_CACHEABLE_TOKENS and not self._warned_short_prefix:
+            self._warned_short_prefix = True
+            print(f"Warning: the static prompt prefix is ~{prefix_tokens} tokens; the API only caches "
+                  f"prefixes of {MIN_CACHEABLE_TOKENS}+ tokens, so it will be billed as regular input")
+        return prompt
+    
+    def topic_prompt(self, tweets: List[Tweet]) -> Optional[Union[str, List[Dict]]]:
+        """
+        Build the blog topic prompt for tweets, or None if the template can't be formatted
+        
+        In map-reduce mode this runs the map calls first and the prompt is the reduce step.
+        """
+        if self.topic_mode == 'map_reduce':
+            # Map: distill every tweet into themes; the blog prompt is the reduce step
+            tweet_content = self.map_tweet_batches(tweets)
+        else:
+            tweet_content = self.prepare_tweet_content(tweets)
+        print(f"Prepared {len(tweet_content)} characters of tweet content")
+        
+        try:
+            return self._format_prompt(tweet_content)
+        except Exception as e:
+            print(f"Error formatting prompt: {e}")
+            return None
+    
+    def _request(self, prompt: Union[str, List[Dict]], max_tokens: Optional[int] = None) -> Dict:
+        """Messages API parameters for a prompt (text or content blocks)"""
+        return {
+            'model': self.model,
+            'max_tokens': max_tokens or self.max_tokens,
+            'temperature': self.temperature,
+            'messages': [{"role": "user", "content": prompt}]
+        }
+    
+    def _cached_response(self, prompt: Union[str, List[Dict]], max_tokens: int) -> Optional[str]:
+        """The cached response to a prompt with the current model settings, if any (None when bypassed)"""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self._cache_key(prompt, max_tokens))
+        if cached is not None:
+            print("⚡ Using cached response (prompt and model settings unchanged)")
+            self.metrics.count('anthropic.cache_hits')
+        return cached
+    
+    def _cache_response(self, prompt: Union[str, List[Dict]], max_tokens: int, response_text: str):
+        """Store a response in the response cache, unless it is bypassed"""
+        if self.cache is not None:
+            self.cache.put(self._cache_key(prompt, max_tokens), response_text, metadata={'model': self.model})
+    
+    def _cache_key(self, prompt: Union[str, List[Dict]], max_tokens: int) -> str:
+        """Response cache key of a prompt with the current model settings"""
+        return ResponseCache.make_key(
+            prompt=prompt, model=self.model, max_tokens=max_tokens, temperature=self.temperature
+        )
     
-    def generate_topics_with_ai(self, tweets: List[Dict]) -> List[str]:
+    @traced('generate_topics')
+    def generate_topics_with_ai(self, tweets: List[Tweet]) -> List[Dict]:
         """Generate blog topics using Anthropic Claude in an open-ended way"""
-        if not HAS_ANTHROPIC or not self.anthropic_api_key:
+        if self.client is None:
             print("Anthropic API not available. Please install anthropic and set ANTHROPIC_API_KEY.")
             return []
         
         try:
-            tweet_content = self.prepare_tweet_content(tweets)
-            print(f"Prepared {len(tweet_content)} characters of tweet content")
-            
-            # Load prompt template from file
-            try:
-                with open('blog_prompt.txt', 'r', encoding='utf-8') as f:
-                    prompt_template = f.read()
-                prompt = prompt_template.format(tweet_content=tweet_content)
-                print("✅ Prompt template loaded and formatted successfully")
-            except FileNotFoundError:
-                print("Warning: blog_prompt.txt not found. Using default prompt.")
-                prompt = f"Based on these tweets, suggest 3-5 blog post ideas:\n\n{tweet_content}"
-            except Exception as e:
-                print(f"Error formatting prompt: {e}")
+            prompt = self.topic_prompt(tweets)
+            if prompt is None:
                 return []
 
-            print("🤖 Calling Anthropic API...")
-            message = self.client.messages.create(
-                model="claude-3-7-sonnet-20250219",
-                max_tokens=1500,
-                temperature=0.8,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            print("✅ API call successful")
-            
-            response_text = message.content[0].text.strip()
-            
-            # Save response to text file
-            with open('blog_topics.txt', 'w', encoding='utf-8') as f:
-                f.write("BLOG TOPIC SUGGESTIONS\n")
-                f.write("=" * 50 + "\n\n")
-                f.write(response_text)
-            
-            print("✅ Blog topics saved to blog_topics.txt")
-            
-            # Return empty list since we're not parsing JSON anymore
-            return []
+            topics_file = self._output_path('blog_topics.txt')
+            started = time.perf_counter()
+            if self.stream:
+                # Print tokens as they arrive and write them straight to the output file
+                response_text = self._stream_to_file(prompt, topics_file)
+            else:
+                response_text = self._complete_with_retries(prompt)
+                self.last_generation_stats = {'streamed': False, 'time_to_first_token': None}
+                
+                # Save response to text file
+                with self._atomic_topics_writer(topics_file) as f:
+                    f.write(response_text)
+            self.last_generation_stats['total_latency'] = round(time.perf_counter() - started, 3)
+            return self._topics_saved(response_text, topics_file)
             
         except Exception as e:
             print(f"Error generating AI topics: {e}")
@@ -89,29 +451,171 @@ class BlogTopicGenerator:
             traceback.print_exc()
             return []
     
-    def generate_simple_summary(self, tweets: List[Dict]) -> Dict:
-        """Generate a simple summary without complex analysis"""
-        total_tweets = len(tweets)
-        authors = set()
+    def _topics_saved(self, response_text: str, topics_file: str) -> List[Dict]:
+        """Record a response written to `topics_file` and parse the topics out of it"""
+        self.last_response_text = response_text
+        self.metrics.count('write.bytes', os.path.getsize(topics_file))
+        
+        print(f"✅ Blog topics saved to {topics_file}")
+        
+        return parse_topic_suggestions(response_text)
+    
+    @contextmanager
+    def _atomic_topics_writer(self, topics_file: str):
+        """
+        Open a temp file next to `topics_file` with the topics header written
+        
+        The temp file replaces `topics_file` only once the block completes, so a
+        crash mid-generation leaves the previous file intact rather than a truncated one.
+        """
+        with atomic_write(topics_file, fsync=True) as f:
+            f.write("BLOG TOPIC SUGGESTIONS\n")
+            f.write("=" * 50 + "\n\n")
+            yield f
+    
+    @traced('anthropic.stream')
+    def _stream_to_file(self, prompt: Union[str, List[Dict]], topics_file: str) -> str:
+        """
+        Stream the model's response to stdout and, incrementally, to the topics file
+        
+        Time to first token is recorded in `self.last_generation_stats`. Cached
+        responses are written straight away without calling the API.
+        """
+        cached = self._cached_response(prompt, self.max_tokens)
+        if cached is not None:
+            self.last_generation_stats = {'streamed': False, 'time_to_first_token': 0.0}
+            with self._atomic_topics_writer(topics_file) as f:
+                f.write(cached)
+            return cached
         
-        for tweet in tweets:
-            author = tweet.get('author', {}).get('username')
-            if author:
-                authors.add(author)
+        print("🤖 Streaming from Anthropic API...\n")
+        started = time.perf_counter()
+        time_to_first_token = None
+        chunks = []
+        with self._atomic_topics_writer(topics_file) as f:
+            with self.client.messages.stream(**self._request(prompt)) as stream:
+                for text in stream.text_stream:
+                    if time_to_first_token is None:
+                        time_to_first_token = round(time.perf_counter() - started, 3)
+                        text = text.lstrip()
+                    print(text, end='', flush=True)
+                    f.write(text)
+                    f.flush()
+                    chunks.append(text)
+                self.metrics.record_usage(stream.get_final_message().usage)
+        print(f"\n\n✅ Stream complete (first token after {time_to_first_token}s)")
+        
+        self.last_generation_stats = {'streamed': True, 'time_to_first_token': time_to_first_token}
+        self.metrics.annotate(time_to_first_token=time_to_first_token)
+        response_text = ''.join(chunks).strip()
+        self._cache_response(prompt, self.max_tokens, response_text)
+        return response_text
+    
+    @traced('anthropic.call')
+    def _complete(self, prompt: Union[str, List[Dict]], max_tokens: Optional[int] = None) -> str:
+        """Get the model's response to a prompt, serving repeats from the response cache"""
+        max_tokens = max_tokens or self.max_tokens
+        cached = self._cached_response(prompt, max_tokens)
+        if cached is not None:
+            self.metrics.annotate(cached=True)
+            return cached
+        
+        print("🤖 Calling Anthropic API...")
+        message = self.client.messages.create(**self._request(prompt, max_tokens))
+        print("✅ API call successful")
+        self.metrics.record_usage(message.usage)
+        self.metrics.annotate(input_tokens=message.usage.input_tokens, output_tokens=message.usage.output_tokens,
+                              cache_read_tokens=getattr(message.usage, 'cache_read_input_tokens', 0) or 0)
+        
+        response_text = message.content[0].text.strip()
+        self._cache_response(prompt, max_tokens, response_text)
+        return response_text
+    
+    @traced('link_topics')
+    def link_topics(self, topics: List[Dict], tweets: List[Tweet], k: int = 5) -> List[Dict]:
+        """
+        Attach supporting tweets and similar past topics to each topic using the semantic index
+        
+        The analyzed tweets are indexed first; new topics are indexed after the
+        comparison so they don't match themselves.
+        """
+        tweets = [as_tweet(tweet) for tweet in tweets]
+        return self._link_items(topics, list(zip(tweets, clean_tweets(tweets))), k=k)
+    
+    def _link_items(self, topics: List[Dict], items: List[Tuple[Tweet, str]], k: int = 5) -> List[Dict]:
+        """`link_topics` for (tweet, cleaned text) pairs that were prepared already"""
+        self.semantic_index.add('tweet', [
+            {'id': tweet.id, 'text': text, 'author': tweet.author_username}
+            for tweet, text in items if tweet.id and text
+        ])
+        
+        suggested_at = datetime.utcnow().isoformat() + 'Z'
+        linked = []
+        new_topics = []
+        for topic in topics:
+            query = f"{topic['title']}. {topic.get('description', '')}"
+            supporting = self.semantic_index.search(query, k=k, kind='tweet')
+            similar = self.semantic_index.search(query, k=3, kind='topic', min_score=self.similar_topic_threshold)
+            
+            linked.append(dict(
+                topic,
+                supporting_tweets=[
+                    {'id': hit['id'], 'author': hit.get('author'), 'score': hit['score']} for hit in supporting
+                ],
+                similar_past_topics=[
+                    {'title': hit.get('title'), 'suggested_at': hit.get('suggested_at'), 'score': hit['score']}
+                    for hit in similar
+                ],
+                is_repeat=bool(similar)
+            ))
+            new_topics.append({
+                'id': hashlib.sha1(topic['title'].lower().encode()).hexdigest(),
+                'text': query,
+                'title': topic['title'],
+                'suggested_at': suggested_at
+            })
+        
+        self.semantic_index.add('topic', new_topics)
+        repeats = sum(1 for topic in linked if topic['is_repeat'])
+        if repeats:
+            print(f"⚠️  {repeats} of {len(linked)} topics are similar to ones suggested before")
+        return linked
+    
+    def generate_simple_summary(self, tweets: List[Tweet]) -> Dict:
+        """Summarize authors, engagement, timing and entities of the analyzed tweets"""
+        return self._summarize_columns(columns_from_tweets([as_tweet(tweet) for tweet in tweets]))
+    
+    @traced('analytics')
+    def _summarize_columns(self, columns: Dict[str, list]) -> Dict:
+        """`generate_simple_summary` for analytics columns collected already"""
+        analytics = compute_analytics(columns)
         
         return {
-            'total_tweets': total_tweets,
-            'unique_authors': len(authors),
-            'sample_authors': list(authors)[:10]
+            'total_tweets': analytics['total_tweets'],
+            'unique_authors': analytics['unique_authors'],
+            # Ranked by influence (engagement of their liked tweets), not set order
+            'sample_authors': [author['author'] for author in analytics['top_authors']],
+            'analytics': analytics
         }
     
-    def generate_blog_topics(self, tweets_file: str = "liked_tweets.json") -> Dict:
-        """Main function to generate blog topics from liked tweets"""
+    def generate_blog_topics(self, tweets_file: str = "liked_tweets.json", max_tweets: Optional[int] = None) -> Dict:
+        """
+        Main function to generate blog topics from liked tweets
+        
+        The file (JSON array or JSONL) is streamed; with `max_tweets` only the
+        most recent tweets are kept while reading, so memory is bounded by the
+        working set rather than the size of the archive.
+        """
         
         # Load tweets
         try:
-            with open(tweets_file, 'r', encoding='utf-8') as f:
-                tweets = json.load(f)
+            tweets = as_tweets(iter_tweets(tweets_file))
+            if max_tweets is None:
+                # Stays lazy: _analyze_tweets reads it once, as the tweets are prepared
+                first = next(tweets, None)
+                tweets = chain([first], tweets) if first is not None else []
+            else:
+                tweets = heapq.nlargest(max_tweets, tweets, key=lambda tweet: tweet.created_at or '')
         except FileNotFoundError:
             print(f"Tweets file {tweets_file} not found. Please run twitter_client_oauth.py first.")
             return {}
@@ -120,26 +624,129 @@ class BlogTopicGenerator:
             print("No tweets found in file.")
             return {}
         
-        print(f"Analyzing {len(tweets)} liked tweets for blog topic inspiration...")
+        return self._analyze_tweets(tweets)
+    
+    def generate_blog_topics_from_store(self, store: TweetStore, days_back: int = 7, max_tweets: int = 50) -> Dict:
+        """Generate blog topics from the most recent slice of the tweet store"""
+        with self.metrics.span('store.read'):
+            tweets = store.get_recent_tweets(days_back=days_back, limit=max_tweets)
+        if not tweets:
+            print(f"No tweets from the last {days_back} days found in {store.db_path}.")
+            return {}
+        
+        results = self._analyze_tweets(tweets)
+        
+        # Whole-archive analytics, cached per store snapshot
+        with self.metrics.span('archive_analytics'):
+            results['summary']['archive'] = analyze_store(store)
+        return results
+    
+    def queue_blog_topics_from_store(self, store: TweetStore, message_batch,
+                                     on_results: Callable[[Optional[Dict], Optional[str]], None],
+                                     name: str = "topics", days_back: int = 7, max_tweets: int = 50) -> bool:
+        """
+        Like `generate_blog_topics_from_store`, but the model call goes into a message batch
+        
+        The prompt is built now and queued in `message_batch` (a MessageBatch); once
+        the batch has run, `on_results` is called with the results, or None and the
+        reason the request failed. A response found in the response cache is handed
+        over straight away. Returns False if there are no recent tweets.
+        """
+        with self.metrics.span('store.read'):
+            tweets = list(as_tweets(store.get_recent_tweets(days_back=days_back, limit=max_tweets)))
+        if not tweets:
+            print(f"No tweets from the last {days_back} days found in {store.db_path}.")
+            return False
+        
+        # The store may be closed by the time the batch has run
+        with self.metrics.span('archive_analytics'):
+            archive = analyze_store(store)
+        
+        prompt = self.topic_prompt(tweets)
+        if prompt is None:
+            raise RuntimeError("Could not build the blog topic prompt")
+        
+        def finish(response_text: str):
+            topics_file = self._output_path('blog_topics.txt')
+            with self._atomic_topics_writer(topics_file) as f:
+                f.write(response_text)
+            self.last_generation_stats = {'streamed': False, 'time_to_first_token': None, 'batched': True}
+            results = self._analyze_tweets(tweets, ai_topics=self._topics_saved(response_text, topics_file))
+            results['summary']['archive'] = archive
+            on_results(results, None)
+        
+        cached = self._cached_response(prompt, self.max_tokens)
+        if cached is not None:
+            finish(cached)
+            return True
+        
+        def on_message(message, error: Optional[str]):
+            if message is None:
+                on_results(None, error)
+                return
+            self.metrics.record_usage(message.usage, batched=True)
+            response_text = message.content[0].text.strip()
+            self._cache_response(prompt, self.max_tokens, response_text)
+            finish(response_text)
+        
+        message_batch.add(name, self._request(prompt), on_message)
+        return True
+    
+    def _analyze_tweets(self, tweets: Iterable[Tweet], ai_topics: Optional[List[Dict]] = None) -> Dict:
+        """
+        Summarize tweets and generate topics from them (unless `ai_topics` were generated already)
+        
+        `tweets` may be a lazy iterator: it is read once, with the analytics
+        columns collected as topic generation prepares the tweets.
+        """
+        print("Analyzing liked tweets for blog topic inspiration...")
+        columns = {'author': [], 'created_at': [], 'engagement': [], 'entities': []}
+        
+        def collecting(records: Iterable[Tweet]) -> Iterable[Tweet]:
+            for tweet in records:
+                columns['author'].append(tweet.author_username or tweet.author_id)
+                columns['created_at'].append(tweet.created_at)
+                columns['engagement'].append(tweet.engagement)
+                columns['entities'].append(tweet.entity_names)
+                yield tweet
+        
+        tweets = collecting(as_tweets(tweets))
+        if ai_topics is None:
+            self.last_prepared_items = None
+            # Generate topics using AI
+            ai_topics = self.generate_topics_with_ai(tweets)
+        # Read whatever topic generation didn't (e.g. without an API client)
+        for _ in tweets:
+            pass
         
         # Generate simple summary
-        summary = self.generate_simple_summary(tweets)
+        summary = self._summarize_columns(columns)
+        print(f"Analyzed {summary['total_tweets']} liked tweets")
         
-        # Generate topics using AI
-        ai_topics = self.generate_topics_with_ai(tweets)
+        # Link topics to the likes that support them and flag repeats of past suggestions
+        if self.semantic_index is not None and ai_topics and self.last_prepared_items is not None:
+            ai_topics = self._link_items(ai_topics, self.last_prepared_items)
         
         results = {
             'summary': summary,
             'blog_topics': ai_topics,
-            'total_topics': len(ai_topics)
+            'total_topics': len(ai_topics),
+            'packing': self.last_packing_stats if self.topic_mode != 'map_reduce' else {},
+            'map_reduce': self.last_map_reduce_stats if self.topic_mode == 'map_reduce' else {},
+            'generation': self.last_generation_stats,
+            'clusters': self.last_cluster_stats,
+            'cache': self.cache.stats() if self.cache is not None else {'enabled': False}
         }
         
         return results
     
+    @traced('write.summary')
     def save_results(self, results: Dict, filename: str = "blog_topics_summary.json"):
         """Save summary to file (topics are now in txt file)"""
+        filename = self._output_path(filename)
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=2, ensure_ascii=False)
+        self.metrics.count('write.bytes', os.path.getsize(filename))
         print(f"Summary saved to {filename}")
     
     def print_summary(self, results: Dict):
@@ -162,31 +769,83 @@ class BlogTopicGenerator:
             print(f"- Including content from: {', '.join(sample_authors[:5])}" + 
                   (f" and {len(sample_authors)-5} others" if len(sample_authors) > 5 else ""))
         
-        print(f"\n💡 Blog topics saved to blog_topics.txt")
-        print("📁 Open blog_topics.txt to see the detailed suggestions with titles, descriptions, and outlines.")
+        packing = results.get('packing', {})
+        if packing:
+            print(f"- Sent {packing.get('tweets_packed', 0)} tweets (~{packing.get('tokens_packed', 0)} tokens) "
+                  f"to Claude, ranked by {packing.get('rank_by')}")
+        
+        map_reduce = results.get('map_reduce', {})
+        if map_reduce:
+            print(f"- Map-reduce: {map_reduce.get('tweets_available', 0)} tweets summarized in "
+                  f"{map_reduce.get('batches', 0)} batches ({map_reduce.get('map_calls', 0)} map calls)")
+        
+        cache = results.get('cache', {})
+        if cache.get('enabled'):
+            print(f"- Response cache: {cache.get('hits', 0)} hits, {cache.get('misses', 0)} misses")
+        
+        topics = results.get('blog_topics', [])
+        if topics and 'supporting_tweets' in topics[0]:
+            repeats = sum(1 for topic in topics if topic.get('is_repeat'))
+            print(f"- Linked {len(topics)} topics to their supporting tweets "
+                  f"({repeats} similar to past suggestions)")
+        
+        clusters = results.get('clusters', [])
+        if clusters:
+            print(f"- Covered {len(clusters)} topic clusters, largest about: "
+                  f"{', '.join(clusters[0]['top_terms'][:3])}")
+        
+        generation = results.get('generation', {})
+        if generation.get('total_latency') is not None:
+            first_token = generation.get('time_to_first_token')
+            print(f"- Generation took {generation['total_latency']:.2f}s" +
+                  (f" (first token after {first_token:.2f}s)" if generation.get('streamed') else ""))
+        if generation.get('batched'):
+            print("- Generated in a message batch")
+        
+        topics_file = self._output_path('blog_topics.txt')
+        print(f"\n💡 Blog topics saved to {topics_file}")
+        print(f"📁 Open {topics_file} to see the detailed suggestions with titles, descriptions, and outlines.")
+        
+        if generation.get('streamed'):
+            # Topics were already printed as they streamed in
+            return
         
         # Also display the topics content here
-        try:
-            with open('blog_topics.txt', 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Skip the header and show the actual topics
-                if "=" * 50 in content:
-                    topics_content = content.split("=" * 50 + "\n\n", 1)[1]
-                else:
-                    topics_content = content
-                
-                print("\n" + "="*60)
-                print("BLOG TOPIC SUGGESTIONS")
-                print("="*60)
-                print(topics_content)
-        except Exception as e:
-            print(f"Could not display topics: {e}")
+        if self.last_response_text is not None:
+            topics_content = self.last_response_text
+        else:
+            try:
+                with open(topics_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                    # Skip the header and show the actual topics
+                    if "=" * 50 in content:
+                        topics_content = content.split("=" * 50 + "\n\n", 1)[1]
+                    else:
+                        topics_content = content
+            except Exception as e:
+                print(f"Could not display topics: {e}")
+                return
+        
+        print("\n" + "="*60)
+        print("BLOG TOPIC SUGGESTIONS")
+        print("="*60)
+        print(topics_content)
 
 
 def main():
     """Generate blog topics from liked tweets"""
     generator = BlogTopicGenerator()
-    results = generator.generate_blog_topics()
+    store_path = os.getenv('TWEET_STORE', 'liked_tweets.db')
+    if os.path.exists(store_path):
+        store = TweetStore(store_path)
+        results = generator.generate_blog_topics_from_store(
+            store,
+            days_back=int(os.getenv('DAYS_BACK', '7')),
+            max_tweets=int(os.getenv('MAX_TWEETS', '50'))
+        )
+        store.close()
+    else:
+        results = generator.generate_blog_topics(max_tweets=int(os.getenv('MAX_TWEETS', '50')))
     
     if results:
         generator.print_summary(results)
@@ -196,4 +855,5 @@ def main():
 
 
 if __name__ == "__main__":
+    load_dotenv()
     main()
\ No newline at end of file
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Command line entry point for the blog topic tools
+
+    python cli.py check                 # environment and optional dependencies
+    python cli.py fetch                 # delta-sync liked tweets into the store
+    python cli.py generate              # generate blog topics from the store (or a tweets file)
+    python cli.py summarize             # archive analytics, no model call
+    python cli.py run                   # fetch + generate (workflow.py)
+    python cli.py serve                 # resident service mode (topic_service.py)
+    python cli.py bench pipeline --sizes 100,10000
+
+Only this module and argparse are loaded up front: each subcommand imports the
+modules it needs (requests for fetch, anthropic and numpy for generate) when it
+runs, so `check`, `summarize` and `--help` start without them.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import runpy
+import sys
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+X_CREDENTIALS = ('X_API_BEARER_TOKEN', 'X_API_KEY', 'X_API_SECRET', 'X_ACCESS_TOKEN', 'X_ACCESS_TOKEN_SECRET')
+OPTIONAL_PACKAGES = {
+    'anthropic': "topic generation",
+    'numpy': "semantic index, clustering and fast analytics",
+    'orjson': "fast tweet file I/O",
+    'httpx': "async client",
+}
+BENCHMARKS = ('pipeline', 'imports', 'tweet_io', 'preprocessing')
+
+
+def _store_path(args) -> str:
+    return args.store or os.getenv('TWEET_STORE', 'liked_tweets.db')
+
+
+def cmd_check(args) -> int:
+    """Report missing credentials and which optional packages are installed"""
+    missing = [var for var in X_CREDENTIALS + ('X_USERNAME', 'ANTHROPIC_API_KEY') if not os.getenv(var)]
+    for var in X_CREDENTIALS + ('X_USERNAME', 'ANTHROPIC_API_KEY'):
+        print(f"{'❌' if var in missing else '✅'} {var}")
+    for package, purpose in OPTIONAL_PACKAGES.items():
+        installed = importlib.util.find_spec(package) is not None
+        print(f"{'✅' if installed else '➖'} {package} ({purpose}{'' if installed else ', not installed'})")
+
+    store_path = _store_path(args)
+    if os.path.exists(store_path):
+        from tweet_store import TweetStore
+        store = TweetStore(store_path)
+        print(f"📦 {store_path}: {store.count()} tweets")
+        store.close()
+    else:
+        print(f"📦 {store_path}: not created yet")
+
+    if missing:
+        print(f"\n❌ Missing required environment variables: {', '.join(missing)}")
+        return 1
+    return 0
+
+
+def cmd_fetch(args) -> int:
+    """Fetch liked tweets into the store (and optionally a tweets file)"""
+    from twitter_client_oauth import TwitterClientOAuth
+    from tweet_store import TweetStore
+
+    username = args.username or os.getenv('X_USERNAME')
+    if not username:
+        print("❌ Pass --username or set X_USERNAME in your .env file")
+        return 1
+    try:
+        client = TwitterClientOAuth()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    user_id = client.get_user_id(username)
+    if not user_id:
+        print(f"❌ Could not get user ID for @{username}")
+        return 1
+
+    store = TweetStore(_store_path(args))
+    try:
+        if args.full:
+            tweets = client.get_liked_tweets(user_id, max_results=args.max_tweets, days_back=args.days_back)
+            client.save_tweets_to_store(tweets, store)
+        else:
+            tweets, _ = client.sync_liked_tweets(user_id, store, max_results=args.max_tweets, days_back=args.days_back)
+    finally:
+        store.close()
+
+    if args.output:
+        client.save_tweets_to_file(tweets, args.output)
+    print(f"✅ Fetched {len(tweets)} liked tweets for @{username}")
+    return 0 if client.last_fetch_stats.get('complete', True) else 1
+
+
+def cmd_generate(args) -> int:
+    """Generate blog topics from the store, or from a tweets file"""
+    from blog_topic_generator import BlogTopicGenerator
+    from tweet_store import TweetStore
+
+    generator = BlogTopicGenerator(output_dir=args.output_dir)
+    store_path = _store_path(args)
+    if args.file or not os.path.exists(store_path):
+        results = generator.generate_blog_topics(args.file or 'liked_tweets.json', max_tweets=args.max_tweets)
+    else:
+        store = TweetStore(store_path)
+        try:
+            results = generator.generate_blog_topics_from_store(store, days_back=args.days_back,
+                                                                max_tweets=args.max_tweets)
+        finally:
+            store.close()
+
+    if not results:
+        print("No results generated. Make sure you have liked tweets data.")
+        return 1
+    generator.print_summary(results)
+    generator.save_results(results)
+    return 0
+
+
+def print_analytics(analytics: Dict):
+    """Print the headline numbers of compute_analytics output"""
+    print(f"- {analytics['total_tweets']} liked tweets from {analytics['unique_authors']} authors")
+    if analytics['top_authors']:
+        print("- Top authors: " + ', '.join(
+            f"@{author['author']} ({author['tweets']})" for author in analytics['top_authors'][:5]))
+    percentiles = analytics['engagement_percentiles']
+    if percentiles:
+        print(f"- Engagement: median {percentiles.get('p50', 0):.0f}, p90 {percentiles.get('p90', 0):.0f}, "
+              f"max {percentiles.get('max', 0)}")
+    if analytics['top_entities']:
+        print("- Top entities: " + ', '.join(entity['entity'] for entity in analytics['top_entities'][:5]))
+    if analytics['total_tweets']:
+        busiest_hour = max(range(24), key=lambda hour: analytics['hour_histogram'][hour])
+        print(f"- Most likes around {busiest_hour:02d}:00 UTC")
+
+
+def cmd_summarize(args) -> int:
+    """Archive analytics from the store (cached per revision) or a tweets file, without the model"""
+    from tweet_analytics import analyze_store, columns_from_tweets, compute_analytics
+
+    store_path = _store_path(args)
+    if args.file or not os.path.exists(store_path):
+        from tweet_io import iter_tweets
+        from tweet_record import as_tweets
+        filename = args.file or 'liked_tweets.json'
+        try:
+            analytics = compute_analytics(columns_from_tweets(list(as_tweets(iter_tweets(filename)))))
+        except FileNotFoundError:
+            print(f"❌ Neither {store_path} nor {filename} exists; run `python cli.py fetch` first")
+            return 1
+        source = filename
+    else:
+        from tweet_store import TweetStore
+        store = TweetStore(store_path)
+        try:
+            analytics = analyze_store(store)
+        finally:
+            store.close()
+        source = store_path
+
+    if args.json:
+        print(json.dumps(analytics, indent=2, ensure_ascii=False))
+    else:
+        print(f"📊 Summary of {source}")
+        print_analytics(analytics)
+    return 0
+
+
+def cmd_run(args) -> int:
+    """The full fetch-and-generate workflow, in batch mode for a roster of accounts"""
+    import workflow
+    return workflow.run_workflow(args.accounts, args.accounts_file, args.workers, args.output_dir,
+                                 args.message_batches)
+
+
+def cmd_serve(args) -> int:
+    """Resident service mode"""
+    import topic_service
+    return topic_service.serve()
+
+
+def cmd_bench(args) -> int:
+    """Run a script from benchmarks/ with the remaining arguments"""
+    path = os.path.join(ROOT, 'benchmarks', f"bench_{args.name}.py")
+    sys.argv = [path] + args.args
+    runpy.run_path(path, run_name='__main__')
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fetch liked tweets and generate blog topic ideas")
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    max_tweets = int(os.getenv('MAX_TWEETS', '25'))
+    days_back = int(os.getenv('DAYS_BACK', '7'))
+
+    check = subparsers.add_parser('check', help="Check credentials, optional packages and the store")
+    check.add_argument('--store', help="Tweet store path (default: TWEET_STORE or liked_tweets.db)")
+    check.set_defaults(handler=cmd_check)
+
+    fetch = subparsers.add_parser('fetch', help="Fetch liked tweets into the store")
+    fetch.add_argument('--username', help="X username (default: X_USERNAME)")
+    fetch.add_argument('--max-tweets', type=int, default=max_tweets, help="Most liked tweets to fetch")
+    fetch.add_argument('--days-back', type=int, default=days_back, help="Only likes of tweets this recent")
+    fetch.add_argument('--full', action='store_true', help="Fetch the whole window instead of a delta sync")
+    fetch.add_argument('--output', help="Also save the fetched tweets to this file (.json or .jsonl)")
+    fetch.add_argument('--store', help="Tweet store path (default: TWEET_STORE or liked_tweets.db)")
+    fetch.set_defaults(handler=cmd_fetch)
+
+    generate = subparsers.add_parser('generate', help="Generate blog topics from stored tweets")
+    generate.add_argument('--file', help="Read tweets from this file instead of the store")
+    generate.add_argument('--max-tweets', type=int, default=max_tweets, help="Most recent tweets to analyze")
+    generate.add_argument('--days-back', type=int, default=days_back, help="Only stored tweets this recent")
+    generate.add_argument('--output-dir', default='.', help="Directory for the topics and summary files")
+    generate.add_argument('--store', help="Tweet store path (default: TWEET_STORE or liked_tweets.db)")
+    generate.set_defaults(handler=cmd_generate)
+
+    summarize = subparsers.add_parser('summarize', help="Summarize the archive without calling the model")
+    summarize.add_argument('--file', help="Summarize this tweets file instead of the store")
+    summarize.add_argument('--json', action='store_true', help="Print the full analytics as JSON")
+    summarize.add_argument('--store', help="Tweet store path (default: TWEET_STORE or liked_tweets.db)")
+    summarize.set_defaults(handler=cmd_summarize)
+
+    run = subparsers.add_parser('run', help="Fetch and generate in one go (as workflow.py)")
+    run.add_argument('--accounts', default=os.getenv('X_USERNAMES'),
+                     help="Comma-separated usernames to run in batch mode")
+    run.add_argument('--accounts-file', help="File with one username per line to run in batch mode")
+    run.add_argument('--workers', type=int, default=int(os.getenv('BATCH_WORKERS', '8')),
+                     help="Number of accounts processed concurrently in batch mode")
+    run.add_argument('--output-dir', default=os.getenv('BATCH_OUTPUT_DIR', 'runs'),
+                     help="Root directory for per-account batch output")
+    run.add_argument('--message-batches', action='store_true', default=os.getenv('MESSAGE_BATCHES', '0') == '1',
+                     help="In batch mode, generate all accounts' topics in one Message Batches job")
+    run.set_defaults(handler=cmd_run)
+
+    serve = subparsers.add_parser('serve', help="Keep running, polling for likes (as workflow.py --serve)")
+    serve.set_defaults(handler=cmd_serve)
+
+    bench = subparsers.add_parser('bench', help="Run an offline benchmark from benchmarks/")
+    bench.add_argument('name', choices=BENCHMARKS, help="Benchmark to run")
+    bench.add_argument('args', nargs=argparse.REMAINDER, help="Arguments for the benchmark (see its --help)")
+    bench.set_defaults(handler=cmd_bench)
+    return parser
+
+
+def main(argv=None) -> int:
+    # Before parsing, so .env settings such as MAX_TWEETS become the defaults
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
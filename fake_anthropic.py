@@ -0,0 +1,195 @@
+"""
+In-process stand-in for the Anthropic client, replaying a recorded response.
+
+Implements the parts of `anthropic.Anthropic` this project uses -
+`messages.create`, `messages.stream` and `messages.batches` - returning the same
+recorded text for every prompt, with token usage estimated the way tweet_packing
+does, so the generator can be run and benchmarked offline. Prompt caching is
+simulated too: a content block marked with cache_control is billed as a cache
+write the first time its prefix is seen and as a cache read after that. Pass it
+as `client=` to BlogTopicGenerator.
+"""
+
+import hashlib
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from tweet_packing import CHARS_PER_TOKEN, estimate_tokens
+
+
+TOPICS_HEADER = "BLOG TOPIC SUGGESTIONS\n" + "=" * 50 + "\n\n"
+# Prefixes shorter than this aren't cached (the API minimum for Sonnet and Opus)
+MIN_CACHEABLE_TOKENS = 1024
+
+
+def _block_texts(content) -> List[str]:
+    """Texts of a message's content, a string or a list of content blocks"""
+    if isinstance(content, str):
+        return [content]
+    return [block.get('text', '') for block in content]
+
+
+class _Stream:
+    """What `messages.stream(...)` yields: the text in chunks, then the final message"""
+
+    def __init__(self, message, chunk_chars: int):
+        self._message = message
+        self._chunk_chars = chunk_chars
+
+    @property
+    def text_stream(self):
+        text = self._message.content[0].text
+        for start in range(0, len(text), self._chunk_chars):
+            yield text[start:start + self._chunk_chars]
+
+    def get_final_message(self):
+        return self._message
+
+
+class _Batches:
+    """`messages.batches`: jobs are answered in full once `batch_latency` seconds have passed"""
+
+    def __init__(self, client: "FakeAnthropic"):
+        self._client = client
+        self._jobs: Dict[str, Dict] = {}
+        self._ids = itertools.count(1)
+
+    def create(self, requests: List[Dict], **kwargs):
+        batch_id = f"msgbatch_fake{next(self._ids):06d}"
+        self._jobs[batch_id] = {'requests': list(requests), 'created': time.monotonic(), 'canceled': False}
+        return self.retrieve(batch_id)
+
+    def _ended(self, job: Dict) -> bool:
+        return job['canceled'] or time.monotonic() - job['created'] >= self._client.batch_latency
+
+    def retrieve(self, batch_id: str):
+        job = self._jobs[batch_id]
+        ended = self._ended(job)
+        total = len(job['requests'])
+        return SimpleNamespace(
+            id=batch_id,
+            type='message_batch',
+            processing_status='ended' if ended else 'in_progress',
+            request_counts=SimpleNamespace(
+                processing=0 if ended else total,
+                succeeded=0 if job['canceled'] or not ended else total,
+                errored=0,
+                canceled=total if job['canceled'] else 0,
+                expired=0
+            )
+        )
+
+    def cancel(self, batch_id: str):
+        self._jobs[batch_id]['canceled'] = True
+        return self.retrieve(batch_id)
+
+    def results(self, batch_id: str):
+        job = self._jobs[batch_id]
+        if not self._ended(job):
+            raise RuntimeError(f"Batch {batch_id} is still processing")
+        for request in job['requests']:
+            if job['canceled']:
+                result = SimpleNamespace(type='canceled')
+            else:
+                params = request['params']
+                message = self._client._respond(params['model'], params['max_tokens'], params['messages'],
+                                                latency=0.0)
+                result = SimpleNamespace(type='succeeded', message=message)
+            yield SimpleNamespace(custom_id=request['custom_id'], result=result)
+
+
+class _Messages:
+    def __init__(self, client: "FakeAnthropic"):
+        self._client = client
+        self.batches = _Batches(client)
+
+    def create(self, model: str, max_tokens: int, messages: List[Dict], **kwargs):
+        """Return the recorded response as a Message-like object"""
+        return self._client._respond(model, max_tokens, messages)
+
+    @contextmanager
+    def stream(self, model: str, max_tokens: int, messages: List[Dict], **kwargs):
+        """Stream the recorded response in small chunks"""
+        yield _Stream(self._client._respond(model, max_tokens, messages), self._client.stream_chunk_chars)
+
+
+class FakeAnthropic:
+    """Fake Anthropic client answering every prompt with `response_text`"""
+
+    def __init__(self, response_text: str, latency: float = 0.0, stream_chunk_chars: int = 16,
+                 batch_latency: float = 0.0):
+        self.response_text = response_text
+        self.latency = latency
+        self.stream_chunk_chars = stream_chunk_chars
+        self.batch_latency = batch_latency
+        self.messages = _Messages(self)
+        # (model, max_tokens, input_tokens) of every call
+        self.calls: List[tuple] = []
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def replaying(cls, filename: str = "blog_topics.txt", **kwargs) -> "FakeAnthropic":
+        """Replay a saved response, e.g. a blog_topics.txt written by a real run (the header is dropped)"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if text.startswith(TOPICS_HEADER):
+            text = text[len(TOPICS_HEADER):]
+        return cls(text, **kwargs)
+
+    def _cacheable_prefix(self, model: str, messages: List[Dict]) -> Optional[tuple]:
+        """(hash, tokens) of the prompt up to its last cache_control block, if there is one"""
+        prefix = []
+        cached = None
+        for message in messages:
+            content = message.get('content')
+            blocks = [{'text': content}] if isinstance(content, str) else content
+            for block in blocks:
+                prefix.append(block.get('text', ''))
+                if block.get('cache_control'):
+                    cached = list(prefix)
+        if cached is None:
+            return None
+        digest = hashlib.sha256(json.dumps([model] + cached).encode('utf-8')).hexdigest()
+        return digest, sum(estimate_tokens(text) for text in cached)
+
+    def _respond(self, model: str, max_tokens: int, messages: List[Dict], latency: Optional[float] = None):
+        latency = self.latency if latency is None else latency
+        if latency:
+            time.sleep(latency)
+        input_tokens = sum(estimate_tokens(text) for message in messages for text in _block_texts(message['content']))
+        cache_creation_tokens = cache_read_tokens = 0
+        prefix = self._cacheable_prefix(model, messages)
+        if prefix is not None and prefix[1] >= MIN_CACHEABLE_TOKENS:
+            digest, prefix_tokens = prefix
+            with self._lock:
+                hit = digest in self._cached_prefixes
+                self._cached_prefixes.add(digest)
+            if hit:
+                cache_read_tokens = prefix_tokens
+            else:
+                cache_creation_tokens = prefix_tokens
+            # Like the API, input_tokens only counts what came after the cached prefix
+            input_tokens -= prefix_tokens
+        # Like a real response, output stops at max_tokens
+        text = self.response_text[:max_tokens * CHARS_PER_TOKEN]
+        with self._lock:
+            self.calls.append((model, max_tokens, input_tokens))
+        return SimpleNamespace(
+            model=model,
+            role='assistant',
+            stop_reason='end_turn' if len(text) == len(self.response_text) else 'max_tokens',
+            content=[SimpleNamespace(type='text', text=text)],
+            usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=estimate_tokens(text),
+                                  cache_creation_input_tokens=cache_creation_tokens,
+                                  cache_read_input_tokens=cache_read_tokens)
+        )
+
+    @property
+    def call_count(self) -> int:
+        return len(self.calls)
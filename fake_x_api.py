@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Local stub of the X API v2 endpoints used by this project.
+
+Serves user lookup and paginated liked tweets from a fixture list (by default
+liked_tweets.json) and emits x-rate-limit-* headers, so the clients can be
+exercised offline. Point a client at it with X_API_BASE_URL=http://127.0.0.1:<port>/2
+"""
+
+import json
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional
+
+
+class FakeXAPI:
+    """In-process fake X API server backed by a list of tweet dicts"""
+
+    def __init__(self, tweets: List[Dict], host: str = "127.0.0.1", port: int = 0,
+                 rate_limit: int = 75, window_seconds: int = 900, latency: float = 0.0):
+        self.tweets = tweets
+        self.rate_limit = rate_limit
+        self.window_seconds = window_seconds
+        self.latency = latency
+        self.request_count = 0
+        self.status_overrides: List[int] = []
+        self.stalls: List[float] = []
+        # pagination_token of every liked tweets page served (None for the first page)
+        self.page_tokens: List[Optional[str]] = []
+        self._window_start = time.time()
+        self._window_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/2"
+
+    def start(self) -> "FakeXAPI":
+        """Start serving in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, *status_codes: int):
+        """Make the next requests return these status codes, in order"""
+        with self._lock:
+            self.status_overrides.extend(status_codes)
+
+    def stall_next(self, count: int, seconds: float):
+        """Make the next `count` requests hang for `seconds` before responding"""
+        with self._lock:
+            self.stalls.extend([seconds] * count)
+
+    def _rate_limit_headers(self) -> Dict[str, str]:
+        """Count a request against the window and build the rate-limit headers"""
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= self.window_seconds:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            self.request_count += 1
+            remaining = self.rate_limit - self._window_count
+            return {
+                'x-rate-limit-limit': str(self.rate_limit),
+                'x-rate-limit-remaining': str(max(remaining, 0)),
+                'x-rate-limit-reset': str(int(self._window_start + self.window_seconds)),
+                '_exceeded': '1' if remaining < 0 else ''
+            }
+
+    def _liked_page(self, query: Dict[str, List[str]]) -> Dict:
+        """Build one page of liked tweets in the X API v2 response shape"""
+        page_size = int(query.get('max_results', ['25'])[0])
+        start = int(query.get('pagination_token', ['0'])[0])
+        with self._lock:
+            self.page_tokens.append(query.get('pagination_token', [None])[0])
+        page = self.tweets[start:start + page_size]
+        # Like the real API, only id/text plus the requested tweet.fields are returned
+        fields = None
+        if 'tweet.fields' in query:
+            fields = {'id', 'text', 'author_id'} | set(query['tweet.fields'][0].split(','))
+
+        users = {}
+        data = []
+        for tweet in page:
+            tweet = dict(tweet)
+            author = tweet.pop('author', None)
+            if author:
+                users[author['id']] = author
+            if fields is not None:
+                tweet = {key: value for key, value in tweet.items() if key in fields}
+            data.append(tweet)
+
+        body = {'data': data, 'includes': {'users': list(users.values())},
+                'meta': {'result_count': len(data)}}
+        if start + page_size < len(self.tweets):
+            body['meta']['next_token'] = str(start + page_size)
+        return body
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict, headers: Dict[str, str]):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (e.g. timed out) before the response
+
+            def do_GET(self):
+                with api._lock:
+                    stall = api.stalls.pop(0) if api.stalls else 0.0
+                if api.latency or stall:
+                    time.sleep(api.latency + stall)
+
+                headers = api._rate_limit_headers()
+                exceeded = headers.pop('_exceeded')
+                with api._lock:
+                    override = api.status_overrides.pop(0) if api.status_overrides else None
+
+                if override:
+                    return self._send(override, {'title': 'Injected failure', 'status': override}, headers)
+                if exceeded:
+                    return self._send(429, {'title': 'Too Many Requests', 'status': 429}, headers)
+
+                parsed = urllib.parse.urlparse(self.path)
+                parts = parsed.path.strip('/').split('/')
+                query = urllib.parse.parse_qs(parsed.query)
+
+                # /2/users/by/username/<username>
+                if parts[:4] == ['2', 'users', 'by', 'username'] and len(parts) == 5:
+                    username = parts[4]
+                    user_id = str(zlib.crc32(username.encode()))
+                    return self._send(200, {'data': {'id': user_id, 'username': username}}, headers)
+
+                # /2/users/<id>/liked_tweets
+                if len(parts) == 4 and parts[:2] == ['2', 'users'] and parts[3] == 'liked_tweets':
+                    return self._send(200, api._liked_page(query), headers)
+
+                self._send(404, {'title': 'Not Found', 'status': 404}, headers)
+
+        return Handler
+
+
+def main():
+    """Serve liked_tweets.json on a local port until interrupted"""
+    with open('liked_tweets.json', 'r', encoding='utf-8') as f:
+        tweets = json.load(f)
+
+    api = FakeXAPI(tweets, port=8765)
+    print(f"Fake X API serving {len(tweets)} tweets at {api.base_url}")
+    try:
+        api._server.serve_forever()
+    except KeyboardInterrupt:
+        api._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from atomic_write import atomic_write
+
+
+class FetchCheckpoint:
+    """
+    On-disk checkpoint of an in-progress liked tweets fetch
+
+    After every page the pagination token and the tweets collected so far are
+    written (atomically) to one file per user, so a run that is killed or gives
+    up after repeated throttling resumes from the next page instead of the
+    first. A checkpoint is only reused by a fetch with the same parameters and
+    is dropped after `max_age_seconds`, since pagination tokens don't live forever.
+    """
+
+    def __init__(self, checkpoint_dir: str = ".cache/checkpoints", max_age_seconds: int = 24 * 3600):
+        self.checkpoint_dir = checkpoint_dir
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def _path(self, user_id: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"liked_tweets_{user_id}.json")
+
+    def load(self, user_id: str, params: Dict) -> Optional[Dict]:
+        """Return the checkpoint ({'next_token', 'tweets', 'pages_fetched'}) for a matching fetch, if any"""
+        path = self._path(user_id)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if checkpoint.get('params') != params or time.time() - checkpoint.get('updated_at', 0) > self.max_age_seconds:
+            self.clear(user_id)
+            return None
+        return checkpoint
+
+    def save(self, user_id: str, params: Dict, next_token: str, tweets: List[Dict], pages_fetched: int):
+        """Record the progress of a fetch after a page"""
+        checkpoint = {
+            'params': params,
+            'next_token': next_token,
+            'tweets': tweets,
+            'pages_fetched': pages_fetched,
+            'updated_at': time.time()
+        }
+        with atomic_write(self._path(user_id)) as f:
+            json.dump(checkpoint, f, ensure_ascii=False, default=str)
+
+    def clear(self, user_id: str):
+        """Forget the checkpoint once a fetch has completed"""
+        try:
+            os.remove(self._path(user_id))
+        except FileNotFoundError:
+            pass
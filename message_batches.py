@@ -0,0 +1,164 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from run_metrics import RunMetrics
+
+
+# Limits of a single Message Batches job; larger batches are split into several jobs
+MAX_BATCH_REQUESTS = 100000
+CUSTOM_ID_PATTERN = re.compile(r'[^a-zA-Z0-9_-]')
+
+
+def make_custom_id(name: str, taken: Dict) -> str:
+    """A valid, unique batch custom_id (1-64 of [a-zA-Z0-9_-]) derived from `name`"""
+    base = CUSTOM_ID_PATTERN.sub('_', name)[:56] or 'request'
+    custom_id = base
+    suffix = 1
+    while custom_id in taken:
+        suffix += 1
+        custom_id = f"{base}-{suffix}"
+    return custom_id
+
+
+class MessageBatch:
+    """
+    Messages API requests run together as an asynchronous Message Batches job
+
+    Batched requests cost half as much as synchronous calls and don't count
+    against the Messages API rate limits; in exchange they finish within 24 hours
+    rather than seconds. `add` queues a request's params with a callback, `run`
+    submits everything, polls until the job has ended and calls each callback
+    with the response message, or None and the reason the request failed.
+    Callbacks record the messages' token usage themselves (as `batched`), so it
+    lands in the metrics of the run that asked for it.
+    """
+
+    def __init__(self, client, poll_interval: float = 60.0, timeout: float = 24 * 3600,
+                 metrics: Optional[RunMetrics] = None):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.metrics = metrics or RunMetrics()
+        self.requests: Dict[str, Dict] = {}
+        self.callbacks: Dict[str, Callable] = {}
+        self.last_stats = {}
+        self._answered = set()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, params: Dict, callback: Callable) -> str:
+        """Queue a request (`messages.create` keyword arguments); returns the custom_id it was given"""
+        with self._lock:
+            custom_id = make_custom_id(name, self.requests)
+            self.requests[custom_id] = params
+            self.callbacks[custom_id] = callback
+        return custom_id
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+    def run(self) -> Dict:
+        """
+        Submit the queued requests, wait for the results and dispatch them to the callbacks
+
+        Requests still unanswered at the timeout are canceled and reported as
+        failed. Returns (and keeps in `self.last_stats`) the job ids and result counts.
+        """
+        started = time.perf_counter()
+        custom_ids = list(self.requests)
+        batch_ids = []
+        with self.metrics.span('anthropic.batch', requests=len(custom_ids)) as attributes:
+            for start in range(0, len(custom_ids), MAX_BATCH_REQUESTS):
+                batch = self.client.messages.batches.create(requests=[
+                    {'custom_id': custom_id, 'params': self.requests[custom_id]}
+                    for custom_id in custom_ids[start:start + MAX_BATCH_REQUESTS]
+                ])
+                batch_ids.append(batch.id)
+                print(f"📨 Submitted message batch {batch.id} with "
+                      f"{min(len(custom_ids) - start, MAX_BATCH_REQUESTS)} requests")
+            self.metrics.count('anthropic.batch_requests', len(custom_ids))
+
+            self._wait(batch_ids)
+            counts = self._dispatch(batch_ids)
+            attributes.update(counts)
+
+        self.last_stats = dict(
+            batch_ids=batch_ids,
+            requests=len(custom_ids),
+            seconds=round(time.perf_counter() - started, 3),
+            **counts
+        )
+        return self.last_stats
+
+    def _wait(self, batch_ids: List[str]):
+        """Poll until every job has ended, canceling the ones still running at the timeout"""
+        deadline = time.monotonic() + self.timeout
+        pending = list(batch_ids)
+        canceled = False
+        while True:
+            for batch_id in list(pending):
+                batch = self.client.messages.batches.retrieve(batch_id)
+                if batch.processing_status == 'ended':
+                    pending.remove(batch_id)
+                elif not canceled:
+                    counts = batch.request_counts
+                    print(f"⏳ Batch {batch_id}: {counts.processing} processing, {counts.succeeded} succeeded, "
+                          f"{counts.errored} errored")
+            if not pending:
+                return
+            if not canceled and time.monotonic() >= deadline:
+                # Canceled jobs end once in-flight requests finish, and their results are still returned
+                for batch_id in pending:
+                    print(f"⚠️  Batch {batch_id} still running after {self.timeout:.0f}s, canceling")
+                    self.client.messages.batches.cancel(batch_id)
+                canceled = True
+            time.sleep(self.poll_interval)
+
+    def _dispatch(self, batch_ids: List[str]) -> Dict[str, int]:
+        """Hand every result to its callback; returns the number of results of each type"""
+        counts = {'succeeded': 0, 'errored': 0, 'canceled': 0, 'expired': 0}
+        answered = set()
+        for batch_id in batch_ids:
+            for entry in self.client.messages.batches.results(batch_id):
+                result = entry.result
+                counts[result.type] = counts.get(result.type, 0) + 1
+                answered.add(entry.custom_id)
+                if result.type == 'succeeded':
+                    self._callback(entry.custom_id, result.message, None)
+                else:
+                    self._callback(entry.custom_id, None, _describe_failure(result))
+
+        for custom_id in self.requests.keys() - answered:
+            counts['errored'] += 1
+            self._callback(custom_id, None, "no result returned")
+        return counts
+
+    def fail_pending(self, error: str) -> int:
+        """
+        Fail every request that hasn't had its result yet, e.g. after `run` raised
+
+        Their callbacks get None and `error`. Returns the number of requests failed.
+        """
+        pending = [custom_id for custom_id in self.requests if custom_id not in self._answered]
+        for custom_id in pending:
+            self._callback(custom_id, None, error)
+        self.last_stats = dict(self.last_stats, requests=len(self.requests), error=error, failed=len(pending))
+        return len(pending)
+
+    def _callback(self, custom_id: str, message, error: Optional[str]):
+        """Call a request's callback; one failing callback doesn't stop the others"""
+        self._answered.add(custom_id)
+        try:
+            self.callbacks[custom_id](message, error)
+        except Exception as e:
+            print(f"❌ Handling batch result {custom_id} failed: {e}")
+
+
+def _describe_failure(result) -> str:
+    """Readable reason for an errored, canceled or expired batch result"""
+    error = getattr(result, 'error', None)
+    detail = getattr(error, 'error', error)
+    message = getattr(detail, 'message', None)
+    return f"{result.type}: {message}" if message else result.type
+
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from atomic_write import atomic_write
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of model responses
+
+    Entries are keyed by a hash of everything that determines the answer (the
+    formatted prompt and the model settings) and stored one file per key.
+    Entries created more than `max_age_seconds` ago are ignored however often
+    they are read, and the least recently used entries are evicted once the
+    cache exceeds `max_entries` or `max_bytes`.
+
+    An entry file's mtime is its creation time and its atime the last time it
+    was read (both set explicitly), so eviction only needs to stat the files.
+    It runs on the first `put` and then every `EVICT_EVERY` puts, so the cache
+    can briefly run over its limits by that many entries.
+    """
+
+    EVICT_EVERY = 16
+
+    def __init__(self, cache_dir: str = ".cache/responses", max_entries: int = 500,
+                 max_bytes: int = 50 * 1024 * 1024, max_age_seconds: int = 30 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(**request) -> str:
+        """Hash the request parameters into a cache key"""
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text for `key`, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if self._expired(entry, time.time()):
+                self._remove(path)
+                raise FileNotFoundError(path)
+            # Record the access for LRU eviction, keeping the mtime at created_at
+            os.utime(path, (time.time(), entry['created_at']))
+        except (FileNotFoundError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry['response']
+
+    def put(self, key: str, response: str, metadata: Optional[Dict] = None):
+        """Store a response, evicting old entries every `EVICT_EVERY` puts"""
+        created_at = time.time()
+        entry = {'response': response, 'created_at': created_at, 'metadata': metadata or {}}
+
+        # Write to a temp file and rename, so a crash never leaves a partial entry
+        path = self._path(key)
+        with atomic_write(path) as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.utime(path, (created_at, created_at))
+
+        with self._lock:
+            sweep = self._puts % self.EVICT_EVERY == 0
+            self._puts += 1
+        if sweep:
+            self.evict()
+
+    def _expired(self, entry: Dict, now: float) -> bool:
+        return now - entry['created_at'] > self.max_age_seconds
+
+    def evict(self) -> int:
+        """Remove expired entries and the least recently used ones over the size limits"""
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # mtime is created_at and atime the last read (see `put` and `get`)
+            if now - stat.st_mtime > self.max_age_seconds:
+                removed += self._remove(path)
+            else:
+                entries.append((stat.st_atime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            total_bytes -= size
+            removed += self._remove(path)
+
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counts for this cache instance"""
+        return {'enabled': True, 'hits': self.hits, 'misses': self.misses}
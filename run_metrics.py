@@ -0,0 +1,215 @@
+import contextvars
+import functools
+import inspect
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+from atomic_write import atomic_write
+
+
+# Fields of Anthropic's `message.usage` that are accumulated per run
+USAGE_FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+# USD per million tokens, used for the run's estimated cost (Claude Sonnet list prices)
+PRICE_PER_MTOK = {
+    'input_tokens': 3.00,
+    'output_tokens': 15.00,
+    'cache_creation_input_tokens': 3.75,
+    'cache_read_input_tokens': 0.30,
+}
+# Message Batches requests are billed at half the synchronous price
+BATCH_PRICE_FACTOR = 0.5
+METRIC_PREFIX = 'blog_pipeline'
+
+# (metrics, span) of the innermost open span; a context variable, so nesting
+# follows each thread's and each asyncio task's own call stack
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+class RunMetrics:
+    """
+    Spans, counters and model token usage for one pipeline run
+
+    `span` times a block and records it with its parent span, so a run report
+    shows how long user lookup, each page fetch, preprocessing, model calls and
+    file writes took. `count` accumulates counters (requests, bytes, tweets) and
+    `record_usage` adds up `message.usage` from Anthropic responses. Recording is
+    thread-safe; at most `max_spans` spans are kept, later ones only feed the
+    per-stage totals.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, max_spans: int = 5000):
+        self.run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S')
+        self.started_at = datetime.utcnow().isoformat() + 'Z'
+        self.max_spans = max_spans
+        self.spans = []
+        self.stages: Dict[str, Dict] = {}
+        self.counters: Dict[str, float] = {}
+        self.usage = dict.fromkeys(USAGE_FIELDS, 0)
+        self.model_calls = 0
+        self.batched_calls = 0
+        self._cost = 0.0
+        self._started = time.perf_counter()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block as a span; yields its attributes dict so the block can add to it"""
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        parent = _current_span.get()
+        record = {
+            'id': span_id,
+            'parent': parent[1]['id'] if parent and parent[0] is self else None,
+            'name': name,
+            'start': round(time.perf_counter() - self._started, 4),
+            'duration': None,
+            'status': 'ok',
+            'attributes': attributes
+        }
+        token = _current_span.set((self, record))
+        started = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            record['status'] = 'error'
+            attributes['error'] = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            record['duration'] = round(time.perf_counter() - started, 4)
+            self._finish(record)
+
+    def _finish(self, record: Dict):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(record)
+            stage = self.stages.setdefault(record['name'], {'calls': 0, 'errors': 0, 'total_seconds': 0.0,
+                                                            'max_seconds': 0.0})
+            stage['calls'] += 1
+            stage['errors'] += record['status'] != 'ok'
+            stage['total_seconds'] += record['duration']
+            stage['max_seconds'] = max(stage['max_seconds'], record['duration'])
+
+    def annotate(self, **attributes):
+        """Add attributes to the innermost open span of this run, if any"""
+        current = _current_span.get()
+        if current and current[0] is self:
+            current[1]['attributes'].update(attributes)
+
+    def count(self, name: str, value: float = 1):
+        """Add to a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_usage(self, usage, batched: bool = False):
+        """
+        Accumulate an Anthropic `message.usage` (missing or None fields count as 0)
+
+        `batched` marks usage of a Message Batches request, which is priced at a discount.
+        """
+        price_factor = BATCH_PRICE_FACTOR if batched else 1.0
+        with self._lock:
+            self.model_calls += 1
+            self.batched_calls += batched
+            for field in USAGE_FIELDS:
+                tokens = getattr(usage, field, 0) or 0
+                self.usage[field] += tokens
+                self._cost += tokens * PRICE_PER_MTOK[field] * price_factor
+
+    def estimated_cost(self) -> float:
+        """Estimated model cost of the run in USD"""
+        return round(self._cost / 1e6, 6)
+
+    def report(self) -> Dict:
+        """Machine-readable run report"""
+        with self._lock:
+            return {
+                'run_id': self.run_id,
+                'started_at': self.started_at,
+                'duration_seconds': round(time.perf_counter() - self._started, 3),
+                'stages': {
+                    name: dict(stage, total_seconds=round(stage['total_seconds'], 4))
+                    for name, stage in sorted(self.stages.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+                'token_usage': dict(self.usage, model_calls=self.model_calls, batched_calls=self.batched_calls),
+                'estimated_cost_usd': self.estimated_cost(),
+                'spans': sorted(self.spans, key=lambda span: (span['start'], span['id']))
+            }
+
+    def to_openmetrics(self) -> str:
+        """The report's stages, counters and token usage in OpenMetrics text format"""
+        report = self.report()
+        lines = [
+            f"# TYPE {METRIC_PREFIX}_run_duration_seconds gauge",
+            f"{METRIC_PREFIX}_run_duration_seconds {report['duration_seconds']}",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_stage_seconds_total{{stage="{name}"}} {stage["total_seconds"]}'
+                  for name, stage in report['stages'].items()]
+        lines.append(f"# TYPE {METRIC_PREFIX}_stage_calls counter")
+        lines += [f'{METRIC_PREFIX}_stage_calls_total{{stage="{name}"}} {stage["calls"]}'
+                  for name, stage in report['stages'].items()]
+        lines.append(f"# TYPE {METRIC_PREFIX}_stage_errors counter")
+        lines += [f'{METRIC_PREFIX}_stage_errors_total{{stage="{name}"}} {stage["errors"]}'
+                  for name, stage in report['stages'].items()]
+        for name, value in report['counters'].items():
+            metric = f"{METRIC_PREFIX}_{_metric_name(name)}"
+            lines += [f"# TYPE {metric} counter", f"{metric}_total {value}"]
+        lines.append(f"# TYPE {METRIC_PREFIX}_tokens counter")
+        lines += [f'{METRIC_PREFIX}_tokens_total{{type="{field}"}} {report["token_usage"][field]}'
+                  for field in USAGE_FIELDS]
+        lines += [f"# TYPE {METRIC_PREFIX}_estimated_cost_usd gauge",
+                  f"{METRIC_PREFIX}_estimated_cost_usd {report['estimated_cost_usd']}",
+                  "# EOF"]
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path: str, openmetrics_path: Optional[str] = None) -> Dict:
+        """Write the JSON report (and optionally the OpenMetrics text) atomically; returns the report"""
+        report = self.report()
+        outputs = [(path, json.dumps(report, indent=2, ensure_ascii=False))]
+        if openmetrics_path:
+            outputs.append((openmetrics_path, self.to_openmetrics()))
+        for target, content in outputs:
+            with atomic_write(target) as f:
+                f.write(content)
+        return report
+
+
+def traced(name: str):
+    """
+    Record calls to a method as `name` spans on the instance's `metrics`
+
+    Works for plain and async methods; instances without metrics are left alone.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                metrics = getattr(self, 'metrics', None)
+                if metrics is None:
+                    return await func(self, *args, **kwargs)
+                with metrics.span(name):
+                    return await func(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, 'metrics', None)
+            if metrics is None:
+                return func(self, *args, **kwargs)
+            with metrics.span(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
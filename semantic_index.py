@@ -0,0 +1,204 @@
+import importlib.util
+import json
+import math
+import os
+import re
+import zlib
+from typing import List, Dict, Optional, Tuple
+
+from atomic_write import atomic_write
+
+# numpy is imported where it is used, so importing this module doesn't load it
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'_-]*")
+DEFAULT_DIM = 512
+KINDS = ('tweet', 'topic')
+
+
+def hashed_term_matrix(texts: List[str], dim: int = DEFAULT_DIM) -> "np.ndarray":
+    """
+    Hash texts into a (len(texts), dim) matrix of sublinear term frequencies
+
+    Words and word bigrams are hashed into `dim` buckets with a hash-derived
+    sign, so no vocabulary has to be built or stored.
+    """
+    import numpy as np
+
+    rows, cols, values = [], [], []
+    for row, text in enumerate(texts):
+        words = TOKEN_PATTERN.findall(text.lower())
+        counts: Dict[str, int] = {}
+        for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            h = zlib.crc32(token.encode())
+            rows.append(row)
+            cols.append(h % dim)
+            values.append((1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0))
+
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    if rows:
+        np.add.at(matrix, (np.array(rows), np.array(cols)), np.array(values, dtype=np.float32))
+    return matrix
+
+
+def normalize_rows(matrix: "np.ndarray") -> "np.ndarray":
+    """L2-normalize each row, leaving all-zero rows as they are"""
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def embed_texts(texts: List[str], dim: int = DEFAULT_DIM) -> "np.ndarray":
+    """Embed texts as L2-normalized hashing vectors (CPU-only, no model download)"""
+    return normalize_rows(hashed_term_matrix(texts, dim))
+
+
+class SemanticIndex:
+    """
+    Local vector index over liked tweets and generated topics
+
+    Vectors live in a memory-mapped .npy matrix that grows by doubling, with one
+    metadata line per row in meta.jsonl. Rows are tagged with a `kind`
+    (one of KINDS) so searches can be restricted to tweets or topics.
+    index.json holds the row count and is written last, so after a crash
+    mid-`add` the index reopens as it was before that call.
+    """
+
+    def __init__(self, index_dir: str = "semantic_index", dim: int = DEFAULT_DIM):
+        if not HAS_NUMPY:
+            raise ImportError("numpy is required for the semantic index. Install it with: pip install numpy")
+        import numpy as np
+
+        self.index_dir = index_dir
+        self.vectors_path = os.path.join(index_dir, 'vectors.npy')
+        self.meta_path = os.path.join(index_dir, 'meta.jsonl')
+        self.info_path = os.path.join(index_dir, 'index.json')
+        os.makedirs(index_dir, exist_ok=True)
+
+        self.meta: List[Dict] = []
+        self.count = 0
+        self.dim = dim
+        if os.path.exists(self.info_path):
+            with open(self.info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            self.count, self.dim = info['count'], info['dim']
+            self.meta = self._load_meta()
+            self.vectors = np.load(self.vectors_path, mmap_mode='r+')
+        else:
+            self.vectors = np.lib.format.open_memmap(self.vectors_path, mode='w+', dtype=np.float32,
+                                                     shape=(1024, self.dim))
+            open(self.meta_path, 'w').close()
+
+        self._keys = {(m['kind'], m['id']) for m in self.meta}
+        self._kinds = np.array([KINDS.index(m['kind']) for m in self.meta], dtype=np.int8)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._keys
+
+    def _load_meta(self) -> List[Dict]:
+        """
+        The metadata of the `count` indexed rows, truncating meta.jsonl to them
+
+        Lines past `count`, or a partial last line, are left by a crash during
+        `add` before index.json was updated; they are cut off so later appends
+        stay in line with the vector rows. The count drops to the number of
+        readable lines if there are fewer.
+        """
+        meta = []
+        end = 0
+        try:
+            with open(self.meta_path, 'rb+') as f:
+                for line in f:
+                    if len(meta) == self.count or not line.endswith(b'\n'):
+                        break
+                    try:
+                        meta.append(json.loads(line))
+                    except ValueError:
+                        break
+                    end += len(line)
+                f.truncate(end)
+        except FileNotFoundError:
+            open(self.meta_path, 'w').close()
+        self.count = len(meta)
+        return meta
+
+    def _grow(self, needed: int):
+        """Double the memory-mapped matrix until `needed` rows fit"""
+        import numpy as np
+
+        capacity = self.vectors.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        tmp_path = self.vectors_path + '.tmp'
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, self.dim))
+        grown[:self.count] = self.vectors[:self.count]
+        grown.flush()
+        del grown
+        self.vectors.flush()
+        del self.vectors
+        os.replace(tmp_path, self.vectors_path)
+        self.vectors = np.load(self.vectors_path, mmap_mode='r+')
+
+    def add(self, kind: str, items: List[Dict]) -> int:
+        """
+        Add items ({'id', 'text', ...}) of one kind, skipping ids already indexed
+
+        Any extra keys are kept as metadata and returned with search results.
+        Returns the number of items added.
+        """
+        import numpy as np
+
+        new_items = []
+        for item in items:
+            key = (kind, str(item['id']))
+            if key not in self._keys and item.get('text'):
+                self._keys.add(key)
+                new_items.append(dict(item, id=str(item['id']), kind=kind))
+        if not new_items:
+            return 0
+
+        self._grow(self.count + len(new_items))
+        self.vectors[self.count:self.count + len(new_items)] = embed_texts(
+            [item['text'] for item in new_items], self.dim
+        )
+        self.vectors.flush()
+
+        with open(self.meta_path, 'a', encoding='utf-8') as f:
+            for item in new_items:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        self.meta.extend(new_items)
+        self._kinds = np.concatenate([self._kinds, np.full(len(new_items), KINDS.index(kind), dtype=np.int8)])
+        self.count += len(new_items)
+
+        with atomic_write(self.info_path) as f:
+            json.dump({'count': self.count, 'dim': self.dim}, f)
+        return len(new_items)
+
+    def search(self, query: str, k: int = 5, kind: Optional[str] = None,
+               min_score: float = 0.0) -> List[Dict]:
+        """Top-k items most similar to the query text (cosine similarity), best first"""
+        import numpy as np
+
+        if self.count == 0:
+            return []
+
+        query_vector = embed_texts([query], self.dim)[0]
+        scores = self.vectors[:self.count] @ query_vector
+        if kind is not None:
+            scores = np.where(self._kinds == KINDS.index(kind), scores, -np.inf)
+
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            dict(self.meta[i], score=round(float(scores[i]), 4))
+            for i in top if scores[i] > min_score
+        ]
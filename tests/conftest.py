@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_x_api import FakeXAPI  # noqa: E402
+
+
+def make_tweets(count: int, start: int = 0):
+    """`count` distinct recent tweets cycled from the liked_tweets.json sample, newest liked first"""
+    with open(os.path.join(ROOT, 'liked_tweets.json'), 'r', encoding='utf-8') as f:
+        sample = json.load(f)
+    now = datetime.utcnow()
+    tweets = []
+    for i in range(start, start + count):
+        tweet = dict(sample[i % len(sample)])
+        tweet['id'] = str(10 ** 18 + i)
+        tweet['text'] = f"{tweet.get('text', '')} #{i}"
+        tweet['created_at'] = (now - timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        tweets.append(tweet)
+    return tweets
+
+
+@pytest.fixture
+def fake_api():
+    """
+    A FakeXAPI serving 250 liked tweets (3 pages of 100)
+
+    Its one-second rate-limit window keeps the wait after a 429 short.
+    """
+    with FakeXAPI(make_tweets(250), rate_limit=1000, window_seconds=1) as api:
+        yield api
+
+
+@pytest.fixture
+def x_env(fake_api, tmp_path, monkeypatch):
+    """Credentials and settings pointing TwitterClientOAuth at the fake API, with no real waiting"""
+    monkeypatch.setenv('X_API_BASE_URL', fake_api.base_url)
+    for var in ('X_API_BEARER_TOKEN', 'X_API_KEY', 'X_API_SECRET', 'X_ACCESS_TOKEN', 'X_ACCESS_TOKEN_SECRET'):
+        monkeypatch.setenv(var, 'test')
+    monkeypatch.setenv('FETCH_CHECKPOINT_DIR', str(tmp_path / 'checkpoints'))
+    monkeypatch.setenv('X_API_TIMEOUT', '5')
+    return fake_api
+
+
+@pytest.fixture
+def x_client(x_env):
+    """A TwitterClientOAuth for the fake API that retries without backoff delays"""
+    from twitter_client_oauth import TwitterClientOAuth
+    client = TwitterClientOAuth()
+    client.retry_base_delay = 0.0
+    return client
@@ -0,0 +1,24 @@
+import asyncio
+import os
+
+import pytest
+
+from twitter_client_async import HAS_HTTPX, AsyncTwitterClientOAuth
+
+pytestmark = pytest.mark.skipif(not HAS_HTTPX, reason="httpx is not installed")
+
+
+def test_fetches_many_accounts_without_sync_state(x_env, tmp_path):
+    async def fetch():
+        async with AsyncTwitterClientOAuth() as client:
+            client.retry_base_delay = 0.0
+            assert not hasattr(client, 'session')
+            assert not hasattr(client, 'checkpoint')
+            return await client.fetch_many(['alice', 'bob'], max_results=150, days_back=7)
+
+    results = asyncio.run(fetch())
+
+    assert [len(tweets) for tweets in results.values()] == [150, 150]
+    assert results['alice'][0]['id'] == x_env.tweets[0]['id']
+    # No checkpoint directory is created for the async client
+    assert not os.path.exists(tmp_path / 'checkpoints')
@@ -0,0 +1,60 @@
+import os
+import stat
+
+import pytest
+
+import atomic_write as atomic_write_module
+from atomic_write import atomic_write
+from fetch_checkpoint import FetchCheckpoint
+from response_cache import ResponseCache
+from run_metrics import RunMetrics
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.fixture
+def umask(monkeypatch):
+    monkeypatch.setattr(atomic_write_module, '_UMASK', 0o022)
+
+
+def test_new_file_gets_the_default_mode(tmp_path, umask):
+    path = tmp_path / 'out.txt'
+    with atomic_write(str(path)) as f:
+        f.write("hello")
+    assert path.read_text() == "hello"
+    assert mode(path) == 0o644
+    assert os.listdir(tmp_path) == ['out.txt']
+
+
+def test_replacement_keeps_the_mode_of_the_old_file(tmp_path):
+    path = tmp_path / 'out.txt'
+    path.write_text("old")
+    os.chmod(path, 0o640)
+    with atomic_write(str(path), fsync=True) as f:
+        f.write("new")
+    assert path.read_text() == "new"
+    assert mode(path) == 0o640
+
+
+def test_failed_write_leaves_the_old_file(tmp_path):
+    path = tmp_path / 'out.txt'
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as f:
+            f.write("partial")
+            raise RuntimeError("crashed")
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ['out.txt']
+
+
+def test_written_files_are_not_private(tmp_path, umask):
+    cache = ResponseCache(str(tmp_path / 'responses'))
+    cache.put('key', 'text')
+    FetchCheckpoint(str(tmp_path / 'checkpoints')).save('42', {}, 'token', [], 1)
+    RunMetrics().write_report(str(tmp_path / 'run_report.json'))
+
+    for path in (cache._path('key'), tmp_path / 'checkpoints' / os.listdir(tmp_path / 'checkpoints')[0],
+                 tmp_path / 'run_report.json'):
+        assert mode(path) == 0o644
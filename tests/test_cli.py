@@ -0,0 +1,38 @@
+import pytest
+
+import cli
+import workflow
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Record which workflow `cli.py run` starts instead of running it"""
+    calls = []
+    monkeypatch.setattr('dotenv.load_dotenv', lambda *args, **kwargs: None)
+    monkeypatch.setattr(workflow, 'batch_main', lambda *args: calls.append(('batch',) + args) or 0)
+    monkeypatch.setattr(workflow, 'main', lambda: calls.append(('single',)) or 0)
+    for var in ('X_USERNAMES', 'BATCH_WORKERS', 'BATCH_OUTPUT_DIR', 'MESSAGE_BATCHES'):
+        monkeypatch.delenv(var, raising=False)
+    return calls
+
+
+def test_run_without_accounts_is_the_single_account_workflow(runs):
+    assert cli.main(['run']) == 0
+    assert runs == [('single',)]
+
+
+def test_run_with_accounts_is_batch_mode(runs, tmp_path):
+    roster = tmp_path / 'roster.txt'
+    roster.write_text("# team\n@carol\nalice\n")
+
+    cli.main(['run', '--accounts', 'alice,bob', '--accounts-file', str(roster), '--workers', '2',
+              '--output-dir', 'out', '--message-batches'])
+    assert runs == [('batch', ['alice', 'bob', 'carol'], 'out', 2, True)]
+
+
+def test_run_reads_the_roster_from_the_environment(runs, monkeypatch):
+    monkeypatch.setenv('X_USERNAMES', 'alice,bob')
+    monkeypatch.setenv('MESSAGE_BATCHES', '1')
+
+    cli.main(['run'])
+    assert runs == [('batch', ['alice', 'bob'], 'runs', 8, True)]
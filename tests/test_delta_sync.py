@@ -0,0 +1,76 @@
+import pytest
+
+from conftest import make_tweets
+from tweet_store import TweetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TweetStore(str(tmp_path / 'liked_tweets.db'))
+    yield store
+    store.close()
+
+
+def test_second_sync_stops_at_known_likes(x_client, fake_api, store):
+    tweets, stats = x_client.sync_liked_tweets('42', store, max_results=250)
+    assert stats['complete']
+    assert stats['new_tweets'] == 250
+    assert stats['pages_fetched'] == 3
+    assert store.count() == 250
+    first_state = store.get_sync_state('42')
+    assert first_state['newest_id'] == fake_api.tweets[0]['id']
+    seq = store.last_seq()
+
+    # Like 30 more tweets; the API lists the newest likes first
+    new_likes = make_tweets(30, start=1000)
+    fake_api.tweets[:0] = new_likes
+    fake_api.page_tokens.clear()
+
+    tweets, stats = x_client.sync_liked_tweets('42', store, max_results=250)
+    assert [tweet['id'] for tweet in tweets] == [tweet['id'] for tweet in new_likes]
+    assert stats == {'new_tweets': 30, 'pages_fetched': 1, 'pages_skipped': 2,
+                     'quota_saved': 200, 'complete': True}
+    # Only the first page was requested
+    assert fake_api.page_tokens == [None]
+    assert x_client.last_fetch_stats['reached_known']
+
+    assert store.count_since(seq) == 30
+    assert store.count() == 280
+    state = store.get_sync_state('42')
+    assert state['newest_id'] == new_likes[0]['id']
+    assert state['reached_known']
+    # Incomplete syncs resume from the fetch checkpoint, so no page token is kept
+    assert 'next_token' not in state
+    assert state['last_synced_at'] >= first_state['last_synced_at']
+
+
+def test_sync_without_new_likes_stores_nothing(x_client, fake_api, store):
+    x_client.sync_liked_tweets('42', store, max_results=250)
+    seq = store.last_seq()
+    newest_id = store.get_sync_state('42')['newest_id']
+
+    tweets, stats = x_client.sync_liked_tweets('42', store, max_results=250)
+    assert tweets == []
+    assert stats['new_tweets'] == 0
+    assert stats['pages_skipped'] == 2
+    assert store.count_since(seq) == 0
+    assert store.get_sync_state('42')['newest_id'] == newest_id
+
+
+def test_incomplete_sync_leaves_state_alone(x_client, fake_api, store):
+    x_client.sync_liked_tweets('42', store, max_results=250)
+    state = store.get_sync_state('42')
+
+    fake_api.tweets[:0] = make_tweets(30, start=1000)
+    x_client.max_retries = 0
+    fake_api.fail_next(503)
+
+    tweets, stats = x_client.sync_liked_tweets('42', store, max_results=250)
+    assert not stats['complete']
+    assert stats['pages_skipped'] == 0
+    assert store.get_sync_state('42') == state
+
+    # The next run still picks up the likes the failed one missed
+    tweets, stats = x_client.sync_liked_tweets('42', store, max_results=250)
+    assert stats['complete']
+    assert stats['new_tweets'] == 30
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+
+def test_retries_server_errors_and_throttling(x_client, fake_api):
+    fake_api.fail_next(503, 429)
+
+    tweets = x_client.get_liked_tweets('42', max_results=100)
+
+    assert len(tweets) == 100
+    assert x_client.last_fetch_stats['complete']
+    assert x_client.metrics.counters['x_api.retries'] == 2
+    # The failed attempts were retried for the same (first) page
+    assert fake_api.page_tokens == [None]
+
+
+def test_gives_up_after_max_retries(x_client, fake_api):
+    x_client.max_retries = 2
+    fake_api.fail_next(503, 503, 503)
+
+    tweets = x_client.get_liked_tweets('42', max_results=100)
+
+    assert tweets == []
+    assert not x_client.last_fetch_stats['complete']
+    assert fake_api.request_count == 3
+
+
+def test_retries_read_timeout(x_client, fake_api):
+    x_client.timeout = 0.3
+    fake_api.stall_next(1, 1.0)
+
+    tweets = x_client.get_liked_tweets('42', max_results=100)
+
+    assert len(tweets) == 100
+    assert x_client.metrics.counters['x_api.retries'] == 1
+
+
+def test_user_lookup_is_retried(x_client, fake_api):
+    fake_api.fail_next(502)
+
+    assert x_client.get_user_id('alice')
+
+
+def test_resumes_from_checkpoint_after_mid_pagination_failure(x_client, fake_api, monkeypatch):
+    x_client.max_retries = 1
+    serve_page = fake_api._liked_page
+
+    def first_page_then_fail(query):
+        # The second page and its retry fail
+        fake_api.fail_next(503, 503)
+        monkeypatch.setattr(fake_api, '_liked_page', serve_page)
+        return serve_page(query)
+
+    monkeypatch.setattr(fake_api, '_liked_page', first_page_then_fail)
+
+    partial = x_client.get_liked_tweets('42', max_results=250)
+    assert len(partial) == 100
+    assert not x_client.last_fetch_stats['complete']
+
+    tweets = x_client.get_liked_tweets('42', max_results=250)
+    stats = x_client.last_fetch_stats
+    assert stats['complete']
+    assert stats['resumed_pages'] == 1
+    assert stats['pages_fetched'] == 3
+    # The second run started at the checkpointed page, not the first one
+    assert fake_api.page_tokens == [None, '100', '200']
+    assert [tweet['id'] for tweet in tweets] == [tweet['id'] for tweet in fake_api.tweets]
+
+    # A completed fetch clears its checkpoint
+    assert x_client.checkpoint.load('42', {}) is None
+
+
+def test_retry_after_is_clamped():
+    from x_transport import retry_delay
+
+    assert retry_delay(0, 503, {'retry-after': '2.5'}) == 2.5
+    assert retry_delay(0, 503, {'retry-after': '-10'}) == 0.0
+    assert retry_delay(0, 503, {'retry-after': '86400'}, max_delay=60.0) == 60.0
+    assert 0.0 <= retry_delay(0, 503, {'retry-after': 'nan'}, base_delay=1.0) <= 1.0
+    assert 0.0 <= retry_delay(0, 503, {'retry-after': 'Wed, 21 Oct 2026 07:28:00 GMT'}, base_delay=1.0) <= 1.0
+
+
+@pytest.mark.parametrize('status', [401, 403])
+def test_auth_error_clears_the_checkpoint(x_client, fake_api, monkeypatch, status):
+    serve_page = fake_api._liked_page
+    saved = []
+
+    def first_page_then_fail(query):
+        fake_api.fail_next(status)
+        monkeypatch.setattr(fake_api, '_liked_page', serve_page)
+        return serve_page(query)
+
+    def save(*args, **kwargs):
+        saved.append(args[0])
+        return checkpoint_save(*args, **kwargs)
+
+    checkpoint_save = x_client.checkpoint.save
+    monkeypatch.setattr(x_client.checkpoint, 'save', save)
+    monkeypatch.setattr(fake_api, '_liked_page', first_page_then_fail)
+
+    tweets = x_client.get_liked_tweets('42', max_results=250)
+    assert len(tweets) == 100
+    assert not x_client.last_fetch_stats['complete']
+    # The first page was checkpointed, then dropped when the fetch hit the auth error
+    assert saved == ['42']
+    assert os.listdir(x_client.checkpoint.checkpoint_dir) == []
@@ -0,0 +1,182 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from blog_topic_generator import MIN_CACHEABLE_TOKENS, BlogTopicGenerator
+from conftest import ROOT, make_tweets
+from fake_anthropic import FakeAnthropic
+from message_batches import MessageBatch
+from tweet_record import as_tweets
+
+TOPICS = "## 1. Caching model calls\nWhy the cheapest call is the one you don't make.\n"
+
+
+def errored(message: str):
+    return SimpleNamespace(type='errored', error=SimpleNamespace(
+        type='error', error=SimpleNamespace(type='invalid_request_error', message=message)))
+
+
+def answer(fake: FakeAnthropic, overrides):
+    """Make the fake's batch results use `overrides[custom_id]` (a result, or None to leave it out)"""
+    results = fake.messages.batches.results
+
+    def patched(batch_id):
+        for entry in results(batch_id):
+            if entry.custom_id not in overrides:
+                yield entry
+            elif overrides[entry.custom_id] is not None:
+                yield SimpleNamespace(custom_id=entry.custom_id, result=overrides[entry.custom_id])
+
+    fake.messages.batches.results = patched
+
+
+def request(content: str):
+    return {'model': 'claude-test', 'max_tokens': 100, 'messages': [{'role': 'user', 'content': content}]}
+
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('SEMANTIC_INDEX', '0')
+    monkeypatch.setenv('RESPONSE_CACHE_DIR', str(tmp_path / 'responses'))
+    monkeypatch.setenv('BATCH_POLL_INTERVAL', '0')
+    return tmp_path
+
+
+def test_dispatch_maps_results_to_their_requests():
+    fake = FakeAnthropic(TOPICS)
+    batch = MessageBatch(fake, poll_interval=0)
+    answers = {}
+    for name in ('alice', 'bob', 'carol.x', 'dave'):
+        batch.add(name, request(f"topics for {name}"),
+                  lambda message, error, name=name: answers.setdefault(name, (message, error)))
+    answer(fake, {'bob': errored('prompt is too long'), 'dave': None})
+
+    stats = batch.run()
+
+    assert answers['alice'][0].content[0].text == TOPICS
+    assert answers['carol.x'][1] is None
+    assert answers['bob'] == (None, 'errored: prompt is too long')
+    assert answers['dave'] == (None, 'no result returned')
+    assert stats['requests'] == 4
+    assert (stats['succeeded'], stats['errored']) == (2, 2)
+    assert batch.fail_pending("too late") == 0
+
+
+def test_custom_ids_are_valid_and_unique():
+    batch = MessageBatch(FakeAnthropic(TOPICS))
+    ids = [batch.add(name, request(name), lambda message, error: None) for name in ('carol.x', 'carol_x', 'a' * 80)]
+    assert ids == ['carol_x', 'carol_x-2', 'a' * 56]
+
+
+def test_requests_still_running_at_the_timeout_are_canceled():
+    fake = FakeAnthropic(TOPICS, batch_latency=60)
+    batch = MessageBatch(fake, poll_interval=0, timeout=0)
+    answers = {}
+    batch.add('alice', request("topics"), lambda message, error: answers.setdefault('alice', error))
+
+    stats = batch.run()
+
+    assert answers == {'alice': 'canceled'}
+    assert stats['canceled'] == 1
+
+
+def test_fail_pending_answers_the_rest_once():
+    fake = FakeAnthropic(TOPICS)
+    batch = MessageBatch(fake, poll_interval=0)
+    answers = []
+    for name in ('alice', 'bob'):
+        batch.add(name, request(name), lambda message, error, name=name: answers.append((name, error)))
+
+    assert batch.fail_pending("batch endpoint down") == 2
+    assert answers == [('alice', 'batch endpoint down'), ('bob', 'batch endpoint down')]
+    assert batch.fail_pending("again") == 0
+    assert batch.last_stats['failed'] == 0
+
+
+def test_run_batch_maps_results_to_accounts(x_env, in_tmp):
+    import workflow
+    fake = FakeAnthropic(TOPICS)
+    answer(fake, {'bob': errored('overloaded')})
+
+    report = workflow.run_batch(['alice', 'bob', 'carol.x'], output_root='runs', max_workers=2,
+                                message_batches=True, topic_client=fake)
+
+    accounts = {r['username']: r for r in report['accounts_report']}
+    assert [r['username'] for r in report['accounts_report']] == ['alice', 'bob', 'carol.x']
+    assert accounts['alice']['status'] == accounts['carol.x']['status'] == 'ok'
+    assert accounts['bob']['status'] == 'failed'
+    assert 'errored: overloaded' in accounts['bob']['error']
+    assert (report['succeeded'], report['failed']) == (2, 1)
+    assert report['message_batch']['requests'] == 3
+
+    # One batch request per account, no synchronous calls
+    assert len(fake.calls) == 3
+    assert accounts['alice']['token_usage']['batched_calls'] == 1
+    with open('runs/carol.x/blog_topics.txt', encoding='utf-8') as f:
+        assert TOPICS.strip() in f.read()
+    assert not os.path.exists('runs/bob/blog_topics.txt')
+
+    with open('runs/run_report.json', encoding='utf-8') as f:
+        spans = [span['name'] for span in json.load(f)['spans']]
+    assert spans == ['batch.accounts', 'anthropic.batch']
+
+
+def test_run_batch_fails_queued_accounts_when_the_batch_errors(x_env, in_tmp):
+    import workflow
+    fake = FakeAnthropic(TOPICS)
+
+    def unavailable(batch_id):
+        raise ConnectionError("batch endpoint down")
+
+    fake.messages.batches.retrieve = unavailable
+
+    report = workflow.run_batch(['alice', 'bob'], output_root='runs', max_workers=2,
+                                message_batches=True, topic_client=fake)
+
+    assert [r['status'] for r in report['accounts_report']] == ['failed', 'failed']
+    assert all('batch endpoint down' in r['error'] for r in report['accounts_report'])
+    assert report['message_batch']['failed'] == 2
+    assert os.path.exists('runs/alice/run_report.json')
+
+
+@pytest.fixture
+def long_prompt(in_tmp, monkeypatch):
+    """A blog_prompt.txt whose static part is long enough to be cached"""
+    with open(os.path.join(ROOT, 'blog_prompt.txt'), 'r', encoding='utf-8') as f:
+        template = f.read()
+    guidance = "\n".join(f"- Guideline {i}: prefer concrete, specific topics grounded in the tweets."
+                         for i in range(80))
+    with open('blog_prompt.txt', 'w', encoding='utf-8') as f:
+        f.write(guidance + "\n\n" + template)
+    monkeypatch.setenv('PROMPT_CACHING', '1')
+    monkeypatch.setenv('BYPASS_CACHE', '1')
+
+
+def test_prompt_cache_hit_on_the_second_call(long_prompt):
+    fake = FakeAnthropic(TOPICS)
+    usages = []
+    for start in (0, 20):
+        generator = BlogTopicGenerator(output_dir='out', client=fake)
+        generator.generate_topics_with_ai(list(as_tweets(make_tweets(20, start=start))))
+        usages.append(generator.metrics.usage)
+
+    first, second = usages
+    assert first['cache_creation_input_tokens'] >= MIN_CACHEABLE_TOKENS
+    assert first['cache_read_input_tokens'] == 0
+    assert second['cache_read_input_tokens'] == first['cache_creation_input_tokens']
+    assert second['cache_creation_input_tokens'] == 0
+    # The tweets come after the cached prefix and are billed as regular input
+    assert second['input_tokens'] > 0
+
+
+def test_prompt_caching_off_sends_a_plain_prompt(long_prompt, monkeypatch):
+    monkeypatch.setenv('PROMPT_CACHING', '0')
+    fake = FakeAnthropic(TOPICS)
+    for _ in range(2):
+        generator = BlogTopicGenerator(output_dir='out', client=fake)
+        generator.generate_topics_with_ai(list(as_tweets(make_tweets(20))))
+        assert generator.metrics.usage['cache_read_input_tokens'] == 0
+        assert generator.metrics.usage['cache_creation_input_tokens'] == 0
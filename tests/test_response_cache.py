@@ -0,0 +1,77 @@
+import json
+import os
+import time
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path), max_entries=3, max_age_seconds=3600)
+
+
+def age(cache, key, seconds):
+    """Pretend the entry for `key` was created and last read `seconds` ago"""
+    path = cache._path(key)
+    with open(path, 'r', encoding='utf-8') as f:
+        entry = json.load(f)
+    entry['created_at'] -= seconds
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.utime(path, (entry['created_at'], entry['created_at']))
+
+
+def test_hit_and_miss(cache):
+    cache.put('a', 'text')
+    assert cache.get('a') == 'text'
+    assert cache.get('b') is None
+    assert cache.stats() == {'enabled': True, 'hits': 1, 'misses': 1}
+
+
+def test_expiry_goes_by_creation_not_last_read(cache):
+    cache.put('a', 'text')
+    age(cache, 'a', 3000)
+    # Reading doesn't extend an entry's life
+    assert cache.get('a') == 'text'
+    assert abs(os.stat(cache._path('a')).st_mtime - (time.time() - 3000)) < 5
+
+    age(cache, 'a', 1000)
+    assert cache.get('a') is None
+    assert not os.path.exists(cache._path('a'))
+
+
+def test_evicts_expired_and_least_recently_read(cache):
+    for key in 'abc':
+        cache.put(key, key)
+    age(cache, 'a', 100)
+    age(cache, 'b', 200)
+    age(cache, 'c', 4000)
+    cache.get('b')
+
+    cache.put('d', 'd')
+    cache.put('e', 'e')
+    assert cache.evict() == 2
+    # c expired, then a was the least recently read of four
+    assert sorted(name[0] for name in os.listdir(cache.cache_dir)) == ['b', 'd', 'e']
+
+
+def test_eviction_reads_no_entries(cache, monkeypatch):
+    for key in 'abcd':
+        cache.put(key, key)
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("evict read an entry")
+
+    monkeypatch.setattr(response_cache.json, 'load', no_reads)
+    assert cache.evict() == 1
+
+
+def test_evicts_every_few_puts(cache, monkeypatch):
+    sweeps = []
+    monkeypatch.setattr(cache, 'evict', lambda: sweeps.append(cache._puts))
+    for i in range(ResponseCache.EVICT_EVERY * 2 + 1):
+        cache.put(str(i), 'text')
+    assert sweeps == [1, ResponseCache.EVICT_EVERY + 1, ResponseCache.EVICT_EVERY * 2 + 1]
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+from semantic_index import HAS_NUMPY, SemanticIndex
+
+pytestmark = pytest.mark.skipif(not HAS_NUMPY, reason="numpy is not installed")
+
+TWEETS = [
+    {'id': '1', 'text': "Prompt caching makes repeated model calls cheaper"},
+    {'id': '2', 'text': "SQLite WAL mode lets readers and writers run concurrently"},
+    {'id': '3', 'text': "Spherical k-means groups tweets by topic"},
+]
+
+
+def test_search_finds_the_closest_items(tmp_path):
+    index = SemanticIndex(str(tmp_path))
+    assert index.add('tweet', TWEETS) == 3
+    assert index.add('tweet', TWEETS[:1]) == 0
+    index.add('topic', [{'id': 't1', 'text': "Cheaper model calls with prompt caching"}])
+
+    assert index.search("prompt caching", k=1, kind='tweet')[0]['id'] == '1'
+    assert [hit['kind'] for hit in index.search("prompt caching", kind='topic')] == ['topic']
+
+    reopened = SemanticIndex(str(tmp_path))
+    assert reopened.count == 4
+    assert ('tweet', '2') in reopened
+    assert reopened.search("sqlite writers", k=1)[0]['id'] == '2'
+
+
+def test_reopens_after_a_crash_mid_add(tmp_path):
+    index = SemanticIndex(str(tmp_path))
+    index.add('tweet', TWEETS[:2])
+    del index
+
+    # A crash after appending metadata but before index.json was updated,
+    # the last line cut short
+    with open(tmp_path / 'meta.jsonl', 'a', encoding='utf-8') as f:
+        f.write('{"id": "orphan", "text": "never indexed", "kind": "tweet"}\n{"id": "par')
+
+    index = SemanticIndex(str(tmp_path))
+    assert index.count == 2
+    assert ('tweet', 'orphan') not in index
+    with open(tmp_path / 'meta.jsonl', encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+
+    # New rows line up with their metadata, now and after reopening
+    index.add('tweet', TWEETS[2:])
+    for reopened in (index, SemanticIndex(str(tmp_path))):
+        assert reopened.count == 3
+        assert reopened.search("k-means clustering topics", k=1)[0]['id'] == '3'
+
+
+def test_importing_the_generator_does_not_load_numpy():
+    code = "import sys, blog_topic_generator, cli; print('numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, SEMANTIC_INDEX='0'))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'False'
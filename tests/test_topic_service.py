@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+import pytest
+
+from blog_topic_generator import BlogTopicGenerator
+from conftest import ROOT, make_tweets
+from fake_anthropic import FakeAnthropic
+from topic_service import FAILING_AFTER, GENERATED_AT_KEY, TopicService
+from tweet_store import TweetStore
+
+
+@pytest.fixture
+def service(x_client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for var, value in {'SEMANTIC_INDEX': '0', 'BYPASS_CACHE': '1', 'SERVICE_PORT': '0', 'MIN_NEW_TWEETS': '10',
+                       'MAX_GENERATION_DELAY': '3600', 'MAX_TWEETS': '25', 'POLL_INTERVAL': '3600'}.items():
+        monkeypatch.setenv(var, value)
+    generator = BlogTopicGenerator(output_dir=str(tmp_path),
+                                   client=FakeAnthropic.replaying(os.path.join(ROOT, 'blog_topics.txt')))
+    service = TopicService('alice', output_dir=str(tmp_path), twitter_client=x_client, topic_generator=generator,
+                           store=TweetStore(str(tmp_path / 'liked_tweets.db')))
+    yield service
+    service.stop()
+    try:
+        service.store.close()
+    except Exception:
+        pass
+
+
+def get_health(server):
+    host, port = server.server_address[:2]
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/health", timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_first_run_generates_from_any_pending_likes(service):
+    assert service.store.get_meta(GENERATED_AT_KEY) is None
+    assert not service.should_generate(0)
+    assert service.should_generate(1)
+
+
+def test_generates_at_the_threshold_or_on_demand(service):
+    service.store.set_meta(GENERATED_AT_KEY, time.time())
+    assert not service.should_generate(9)
+    assert service.should_generate(10)
+    assert service.should_generate(0, force=True)
+
+
+def test_generates_below_the_threshold_after_the_max_delay(service):
+    service.store.set_meta(GENERATED_AT_KEY, time.time() - 3601)
+    assert service.should_generate(1)
+    assert not service.should_generate(0)
+
+
+def test_cycle_generates_then_waits_for_new_likes(service, fake_api):
+    cycle = service.run_cycle()
+    assert cycle['error'] is None
+    assert cycle['new_tweets'] == 25
+    assert cycle['generated'] and cycle['topics'] > 0
+    assert service.pending_new_tweets() == 0
+
+    fake_api.tweets[:0] = make_tweets(3, start=1000)
+    cycle = service.run_cycle()
+    assert cycle['new_tweets'] == 3
+    assert not cycle['generated']
+    assert cycle['pending_new_tweets'] == 3
+
+
+def test_old_pending_likes_are_not_retried(service, fake_api, monkeypatch):
+    fake_api.tweets = []
+    old = make_tweets(5)
+    for tweet in old:
+        tweet['created_at'] = (datetime.utcnow() - timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    service.store.upsert_tweets(old)
+    service.store.set_meta(GENERATED_AT_KEY, time.time() - 7200)
+
+    attempts = []
+    generate = service.topic_generator.generate_blog_topics_from_store
+    monkeypatch.setattr(service.topic_generator, 'generate_blog_topics_from_store',
+                        lambda *args, **kwargs: attempts.append(1) or generate(*args, **kwargs))
+
+    cycle = service.run_cycle()
+    assert not cycle['generated']
+    assert cycle['pending_new_tweets'] == 0
+    assert service.pending_new_tweets() == 0
+    # The last generation time is left as it was
+    assert float(service.store.get_meta(GENERATED_AT_KEY)) < time.time() - 7000
+
+    service.run_cycle()
+    assert len(attempts) == 1
+
+
+def test_health_fails_after_repeated_failed_cycles(service, fake_api):
+    server = service.start_http()
+    try:
+        service.twitter_client.max_retries = 0
+        for failures in range(1, FAILING_AFTER + 1):
+            fake_api.fail_next(401)
+            assert service.run_cycle()['error']
+            status, health = get_health(server)
+            assert health['consecutive_failures'] == failures
+            assert status == (503 if failures >= FAILING_AFTER else 200)
+        assert health['status'] == 'failing'
+
+        assert service.run_cycle()['error'] is None
+        status, health = get_health(server)
+        assert status == 200 and health['status'] == 'ok'
+        assert health['last_generated_at'] is not None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_triggers_during_a_cycle_coalesce_into_one(service, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+    cycles = []
+
+    def run_cycle(force_generate=False):
+        cycles.append(force_generate)
+        if len(cycles) == 1:
+            started.set()
+            release.wait(5)
+        return {'cycle': len(cycles), 'new_tweets': 0, 'generated': False, 'topics': 0, 'error': None,
+                'duration_seconds': 0.0}
+
+    monkeypatch.setattr(service, 'run_cycle', run_cycle)
+    monkeypatch.setattr(service.store, 'close', lambda: None)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    assert started.wait(5)
+
+    service.trigger()
+    service.trigger(generate=True)
+    service.trigger()
+    release.set()
+
+    deadline = time.time() + 5
+    while len(cycles) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+    service.stop()
+    thread.join(5)
+
+    # The first cycle, then a single follow-up that generates; the stop only ends the wait
+    assert cycles == [False, True]
@@ -0,0 +1,40 @@
+import pytest
+
+from blog_topic_generator import BlogTopicGenerator
+from conftest import make_tweets
+from fake_anthropic import FakeAnthropic
+from tweet_record import as_tweets
+
+TOPICS = "## 1. Caching model calls\nWhy the cheapest call is the one you don't make.\n"
+
+
+def ancestors(span, spans_by_id):
+    names = []
+    while span['parent'] is not None:
+        span = spans_by_id[span['parent']]
+        names.append(span['name'])
+    return names
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for var, value in {'SEMANTIC_INDEX': '0', 'BYPASS_CACHE': '1', 'TOPIC_MODE': 'map_reduce',
+                       'TWEET_TOKEN_BUDGET': '600', 'MAP_CONCURRENCY': '4'}.items():
+        monkeypatch.setenv(var, value)
+    return BlogTopicGenerator(output_dir='out', client=FakeAnthropic(TOPICS, latency=0.01))
+
+
+def test_map_calls_nest_under_the_generation_span(generator):
+    generator.generate_topics_with_ai(list(as_tweets(make_tweets(60))))
+
+    spans = generator.metrics.spans
+    spans_by_id = {span['id']: span for span in spans}
+    calls = [span for span in spans if span['name'] == 'anthropic.call']
+    assert generator.last_map_reduce_stats['map_calls'] > 1
+    assert len(calls) >= generator.last_map_reduce_stats['map_calls']
+    for call in calls:
+        assert call['parent'] is not None
+        assert 'generate_topics' in ancestors(call, spans_by_id)
+    map_calls = [call for call in calls if 'map_reduce' in ancestors(call, spans_by_id)]
+    assert len(map_calls) == generator.last_map_reduce_stats['map_calls']
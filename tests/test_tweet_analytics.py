@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+import tweet_analytics
+from conftest import make_tweets
+from tweet_analytics import analyze_store, compute_analytics, columns_from_tweets
+from tweet_record import as_tweets
+from tweet_store import TweetStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 's.db')
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """Count the times analytics are computed rather than read from the cache"""
+    calls = []
+
+    def counting(columns, top_n=10):
+        calls.append(top_n)
+        return compute_analytics(columns, top_n=top_n)
+
+    monkeypatch.setattr(tweet_analytics, 'compute_analytics', counting)
+    return calls
+
+
+def test_store_analytics_match_the_tweets(db_path):
+    tweets = make_tweets(30)
+    store = TweetStore(db_path)
+    store.upsert_tweets(tweets)
+
+    analytics = analyze_store(store)
+    store.close()
+
+    # The store holds them oldest liked first, which decides the order of ties
+    expected = compute_analytics(columns_from_tweets(list(as_tweets(reversed(tweets)))))
+    assert analytics['total_tweets'] == 30
+    assert analytics['unique_authors'] == expected['unique_authors']
+    assert analytics['top_authors'] == expected['top_authors']
+    assert analytics['top_entities'] == expected['top_entities']
+
+
+def test_cached_until_the_store_changes(db_path, computed):
+    store = TweetStore(db_path)
+    store.upsert_tweets(make_tweets(10))
+
+    first = analyze_store(store)
+    assert analyze_store(store) == first
+    assert len(computed) == 1
+    assert os.path.exists(db_path + '.analytics.json')
+
+    store.upsert_tweets(make_tweets(5, start=10))
+    assert analyze_store(store)['total_tweets'] == 15
+    assert len(computed) == 2
+    analyze_store(store, top_n=3)
+    assert len(computed) == 3
+    store.close()
+
+
+def test_cache_is_not_reused_for_a_recreated_database(db_path):
+    store = TweetStore(db_path)
+    store.upsert_tweets(make_tweets(10))
+    assert analyze_store(store)['total_tweets'] == 10
+    store.close()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    # Same path and the same revision (1), but a different database
+    store = TweetStore(db_path)
+    store.upsert_tweets(make_tweets(3))
+    assert store.revision() == 1
+    assert analyze_store(store)['total_tweets'] == 3
+    store.close()
@@ -0,0 +1,162 @@
+import math
+import re
+import zlib
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+
+from semantic_index import hashed_term_matrix, normalize_rows
+from tweet_record import Tweet
+
+
+FEATURE_DIM = 512
+# Weight of a context_annotations entity/domain id relative to a text term
+ANNOTATION_WEIGHT = 2.0
+
+WORD_PATTERN = re.compile(r"[a-z][a-z'-]{2,}")
+STOPWORDS = frozenset("""
+    the and for are but not you your with this that have has had was were will would could should
+    they them their there then than what when where which who why how all any can our out just
+    about into from like more most some such only also very its it's i'm don't can't been being
+    because over after before does doing did get got one two make made really thing things much
+""".split())
+
+
+def annotation_ids(tweet: Tweet) -> List[str]:
+    """The context_annotations domain and entity ids of a tweet, as feature tokens"""
+    ids = []
+    for domain, entity, _ in tweet.annotations:
+        if domain:
+            ids.append(f"domain:{domain}")
+        if entity:
+            ids.append(f"entity:{entity}")
+    return ids
+
+
+def build_features(tweets: List[Tweet], texts: List[str], dim: int = FEATURE_DIM) -> "np.ndarray":
+    """
+    TF-IDF over hashed text terms plus context_annotations ids, L2-normalized
+
+    Annotation ids are hashed into the same space as terms and share the
+    IDF weighting, so a rare entity pulls tweets together more than a common domain.
+    """
+    import numpy as np
+
+    matrix = hashed_term_matrix(texts, dim)
+
+    rows, cols = [], []
+    for row, tweet in enumerate(tweets):
+        for token in annotation_ids(tweet):
+            rows.append(row)
+            cols.append(zlib.crc32(token.encode()) % dim)
+    if rows:
+        np.add.at(matrix, (np.array(rows), np.array(cols)), ANNOTATION_WEIGHT)
+
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    return normalize_rows(matrix * idf.astype(np.float32))
+
+
+def kmeans(features: "np.ndarray", k: int, iterations: int = 20, seed: int = 0) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Spherical k-means (cosine similarity) with k-means++ seeding
+
+    Returns (labels, centroids). Centroids are unit-length.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n = features.shape[0]
+
+    # k-means++: pick each new centroid proportional to its distance from the nearest one
+    centroids = [features[rng.integers(n)]]
+    closest = 1 - features @ centroids[0]
+    for _ in range(1, k):
+        weights = np.clip(closest, 0, None)
+        total = weights.sum()
+        index = rng.choice(n, p=weights / total) if total > 0 else rng.integers(n)
+        centroids.append(features[index])
+        closest = np.minimum(closest, 1 - features @ features[index])
+    centroids = np.array(centroids)
+
+    labels = np.zeros(n, dtype=np.int64)
+    for iteration in range(iterations):
+        new_labels = np.argmax(features @ centroids.T, axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(k):
+            members = features[labels == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+        centroids = normalize_rows(centroids)
+
+    return labels, centroids
+
+
+def default_cluster_count(n: int) -> int:
+    """Rule-of-thumb k = sqrt(n / 2), kept between 2 and 12"""
+    return max(2, min(12, int(math.sqrt(n / 2))))
+
+
+def cluster_tweets(items: List[Tuple[Tweet, str]], k: Optional[int] = None,
+                   per_cluster: int = 3) -> Tuple[List[Tuple[Tweet, str]], List[Dict]]:
+    """
+    Cluster (tweet, cleaned_text) pairs and order them for the prompt
+
+    Returns the pairs reordered round-robin across clusters (largest cluster
+    first, members closest to their centroid first), so packing the front of
+    the list covers every cluster before going deeper into any one, and a list
+    of per-cluster stats. Only the `per_cluster` most central tweets of each
+    cluster are marked as representatives in the stats.
+    """
+    if len(items) < 4:
+        return items, []
+    import numpy as np
+
+    tweets = [tweet for tweet, _ in items]
+    texts = [text for _, text in items]
+    k = min(k or default_cluster_count(len(items)), len(items))
+
+    features = build_features(tweets, texts)
+    labels, centroids = kmeans(features, k)
+    centrality = np.einsum('ij,ij->i', features, centroids[labels])
+
+    clusters = []
+    for cluster in range(k):
+        members = np.flatnonzero(labels == cluster)
+        if not len(members):
+            continue
+        members = members[np.argsort(-centrality[members])]
+        clusters.append([int(i) for i in members])
+    clusters.sort(key=len, reverse=True)
+
+    stats = [_cluster_stats(rank, members, tweets, texts, centrality, per_cluster)
+             for rank, members in enumerate(clusters)]
+
+    ordered = []
+    for depth in range(max(len(members) for members in clusters)):
+        for members in clusters:
+            if depth < len(members):
+                ordered.append(items[members[depth]])
+
+    return ordered, stats
+
+
+def _cluster_stats(rank: int, members: List[int], tweets: List[Tweet], texts: List[str],
+                   centrality: "np.ndarray", per_cluster: int) -> Dict:
+    """Size, top terms, top entities and representatives of one cluster"""
+    terms = Counter()
+    entities = Counter()
+    for i in members:
+        terms.update(set(word for word in WORD_PATTERN.findall(texts[i].lower()) if word not in STOPWORDS))
+        entities.update(tweets[i].entity_names)
+
+    return {
+        'cluster': rank,
+        'size': len(members),
+        'top_terms': [term for term, _ in terms.most_common(5)],
+        'top_entities': [entity for entity, _ in entities.most_common(5)],
+        'mean_engagement': round(sum(tweets[i].engagement for i in members) / len(members), 1),
+        'cohesion': round(float(centrality[members].mean()), 3),
+        'representative_ids': [tweets[i].id for i in members[:per_cluster]]
+    }
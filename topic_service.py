@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Resident service mode: poll for new likes and generate topics when enough built up
+
+Instead of cron starting workflow.py from scratch every time, the service keeps
+the X client's connection pool and rate-limit scheduler, the Anthropic client
+and the tweet store open between cycles. Every POLL_INTERVAL seconds it
+delta-syncs new likes into the store; topics are only generated once
+MIN_NEW_TWEETS new likes have accumulated since the last generation (or any
+have, after MAX_GENERATION_DELAY seconds). Cycles never overlap: triggers that
+arrive while one runs are folded into a single follow-up cycle.
+
+A small HTTP server on SERVICE_HOST:SERVICE_PORT (127.0.0.1:8780) exposes
+    GET  /health                 service state, last cycle and pending likes (503 when cycles keep failing)
+    POST /trigger[?generate=1]   poll now (and generate even below the threshold)
+
+    python topic_service.py                      # run the service
+    python topic_service.py trigger --generate   # ask the running service for a cycle
+    python topic_service.py health
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from twitter_client_oauth import TwitterClientOAuth
+from blog_topic_generator import BlogTopicGenerator
+from tweet_store import TweetStore
+from run_metrics import RunMetrics
+from workflow import write_run_report
+
+# store_meta keys recording the last generation
+GENERATED_SEQ_KEY = 'service.generated_seq'
+GENERATED_AT_KEY = 'service.generated_at'
+# Consecutive failed cycles before /health reports the service as failing
+FAILING_AFTER = 3
+
+
+class TopicService:
+    """Long-running fetch-and-generate loop with warm clients and a local HTTP trigger"""
+
+    def __init__(self, username: str, output_dir: str = ".", twitter_client: Optional[TwitterClientOAuth] = None,
+                 topic_generator: Optional[BlogTopicGenerator] = None, store: Optional[TweetStore] = None):
+        self.username = username
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.poll_interval = float(os.getenv('POLL_INTERVAL', '900'))
+        self.min_new_tweets = int(os.getenv('MIN_NEW_TWEETS', '10'))
+        self.max_generation_delay = float(os.getenv('MAX_GENERATION_DELAY', str(24 * 3600)))
+        self.max_tweets = int(os.getenv('MAX_TWEETS', '25'))
+        self.days_back = int(os.getenv('DAYS_BACK', '7'))
+        self.host = os.getenv('SERVICE_HOST', '127.0.0.1')
+        self.port = int(os.getenv('SERVICE_PORT', '8780'))
+
+        # Created once and reused by every cycle
+        self.twitter_client = twitter_client or TwitterClientOAuth()
+        self.topic_generator = topic_generator or BlogTopicGenerator(output_dir=output_dir)
+        self.store = store or TweetStore(os.getenv('TWEET_STORE', os.path.join(output_dir, 'liked_tweets.db')))
+        self.user_id = None
+
+        self.started_at = time.time()
+        self.cycles = 0
+        self.consecutive_failures = 0
+        self.last_cycle: Dict = {}
+        self.next_poll_at: Optional[float] = None
+        self._cycle_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._force_generate = False
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def pending_new_tweets(self) -> int:
+        """Likes stored since topics were last generated"""
+        return self.store.count_since(int(self.store.get_meta(GENERATED_SEQ_KEY) or 0))
+
+    def should_generate(self, pending: int, force: bool = False) -> bool:
+        """Generate on demand, once enough new likes built up, or when some have waited too long"""
+        if force:
+            return True
+        if pending >= self.min_new_tweets:
+            return True
+        generated_at = float(self.store.get_meta(GENERATED_AT_KEY) or 0)
+        return pending > 0 and time.time() - generated_at >= self.max_generation_delay
+
+    def run_cycle(self, force_generate: bool = False) -> Dict:
+        """
+        Sync new likes and, if warranted, generate topics from the store
+
+        Only one cycle runs at a time. Each cycle writes its run report to the
+        output directory and returns a summary (also kept in `self.last_cycle`).
+        """
+        with self._cycle_lock:
+            self.cycles += 1
+            metrics = RunMetrics(run_id=f"cycle-{self.cycles}")
+            self.twitter_client.metrics = metrics
+            self.topic_generator.metrics = metrics
+            cycle = {'cycle': self.cycles, 'started_at': datetime.utcnow().isoformat() + 'Z', 'new_tweets': 0,
+                     'pending_new_tweets': 0, 'generated': False, 'topics': 0, 'error': None}
+            started = time.perf_counter()
+            try:
+                with metrics.span('service.cycle'):
+                    if self.user_id is None:
+                        self.user_id = self.twitter_client.get_user_id(self.username)
+                        if not self.user_id:
+                            raise RuntimeError(f"Could not get user ID for @{self.username}")
+
+                    tweets, sync_stats = self.twitter_client.sync_liked_tweets(
+                        self.user_id, self.store, max_results=self.max_tweets, days_back=self.days_back)
+                    cycle['new_tweets'] = len(tweets)
+                    cycle['fetch_complete'] = sync_stats['complete']
+
+                    pending = cycle['pending_new_tweets'] = self.pending_new_tweets()
+                    if self.should_generate(pending, force_generate):
+                        generated_seq = self.store.last_seq()
+                        results = self.topic_generator.generate_blog_topics_from_store(
+                            self.store, days_back=self.days_back, max_tweets=self.max_tweets)
+                        if results:
+                            self.topic_generator.save_results(results)
+                            self.store.set_meta(GENERATED_SEQ_KEY, generated_seq)
+                            self.store.set_meta(GENERATED_AT_KEY, time.time())
+                            cycle.update(generated=True, topics=results['total_topics'], pending_new_tweets=0)
+                        else:
+                            # The pending likes are of tweets older than days_back and will never be
+                            # generated from; count them as handled so later cycles don't retry
+                            self.store.set_meta(GENERATED_SEQ_KEY, generated_seq)
+                            cycle['pending_new_tweets'] = 0
+                    else:
+                        print(f"⏳ {pending}/{self.min_new_tweets} new likes since the last generation, waiting for more")
+                self.consecutive_failures = 0
+            except Exception as e:
+                cycle['error'] = f"{type(e).__name__}: {e}"
+                self.consecutive_failures += 1
+                traceback.print_exc()
+            finally:
+                cycle['duration_seconds'] = round(time.perf_counter() - started, 3)
+                report = write_run_report(metrics, self.output_dir)
+                cycle['estimated_cost_usd'] = report['estimated_cost_usd']
+                with self._state_lock:
+                    self.last_cycle = cycle
+            return cycle
+
+    def trigger(self, generate: bool = False):
+        """Ask for a cycle as soon as the current one (if any) is done; repeated triggers coalesce"""
+        with self._state_lock:
+            self._force_generate = self._force_generate or generate
+        self._wake.set()
+
+    def health(self) -> Dict:
+        """Service state for the health endpoint"""
+        with self._state_lock:
+            last_cycle = dict(self.last_cycle)
+        generated_at = self.store.get_meta(GENERATED_AT_KEY)
+        return {
+            'status': 'failing' if self.consecutive_failures >= FAILING_AFTER else 'ok',
+            'username': self.username,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'cycles': self.cycles,
+            'cycle_running': self._cycle_lock.locked(),
+            'consecutive_failures': self.consecutive_failures,
+            'pending_new_tweets': self.pending_new_tweets(),
+            'min_new_tweets': self.min_new_tweets,
+            'last_generated_at': (datetime.utcfromtimestamp(float(generated_at)).isoformat() + 'Z'
+                                  if generated_at else None),
+            'next_poll_in_seconds': (round(max(self.next_poll_at - time.time(), 0), 1)
+                                     if self.next_poll_at else None),
+            'last_cycle': last_cycle
+        }
+
+    def start_http(self) -> ThreadingHTTPServer:
+        """Serve /health and /trigger in a background thread"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def serve_forever(self):
+        """Run cycles every `poll_interval` seconds (or when triggered) until `stop` is called"""
+        server = self.start_http()
+        host, port = server.server_address[:2]
+        print(f"🛰️  Topic service for @{self.username} on http://{host}:{port} "
+              f"(poll every {self.poll_interval:.0f}s, generate at {self.min_new_tweets} new likes)")
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                with self._state_lock:
+                    force, self._force_generate = self._force_generate, False
+                cycle = self.run_cycle(force_generate=force)
+                status = f"failed: {cycle['error']}" if cycle['error'] else (
+                    f"generated {cycle['topics']} topics" if cycle['generated'] else "no generation")
+                print(f"🔁 Cycle {cycle['cycle']}: {cycle['new_tweets']} new likes, {status} "
+                      f"({cycle['duration_seconds']:.2f}s)")
+
+                self.next_poll_at = time.time() + self.poll_interval
+                self._wake.wait(self.poll_interval)
+        finally:
+            server.shutdown()
+            server.server_close()
+            self.store.close()
+            print("👋 Topic service stopped")
+
+    def stop(self):
+        """Stop after the current cycle"""
+        self._stop.set()
+        self._wake.set()
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if urllib.parse.urlparse(self.path).path == '/health':
+                    health = service.health()
+                    return self._send(200 if health['status'] == 'ok' else 503, health)
+                self._send(404, {'error': 'not found'})
+
+            def do_POST(self):
+                parsed = urllib.parse.urlparse(self.path)
+                if parsed.path == '/trigger':
+                    generate = urllib.parse.parse_qs(parsed.query).get('generate', ['0'])[0] == '1'
+                    service.trigger(generate=generate)
+                    return self._send(202, {'queued': True, 'generate': generate,
+                                            'cycle_running': service._cycle_lock.locked()})
+                self._send(404, {'error': 'not found'})
+
+        return Handler
+
+
+def call_service(path: str, method: str = 'GET') -> int:
+    """Send a request to the running service and print its JSON answer; returns an exit code"""
+    url = f"http://{os.getenv('SERVICE_HOST', '127.0.0.1')}:{os.getenv('SERVICE_PORT', '8780')}{path}"
+    request = urllib.request.Request(url, method=method, data=b'' if method == 'POST' else None)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            body, status = response.read(), response.status
+    except urllib.error.HTTPError as e:
+        body, status = e.read(), e.code
+    except urllib.error.URLError as e:
+        print(f"❌ Topic service not reachable at {url}: {e.reason}")
+        return 1
+    print(json.dumps(json.loads(body), indent=2))
+    return 0 if status < 400 else 1
+
+
+def serve() -> int:
+    """Service entry point: build warm clients and run until SIGINT/SIGTERM"""
+    username = os.getenv('X_USERNAME')
+    if not username:
+        print("❌ Please set X_USERNAME in your .env file")
+        return 1
+    try:
+        service = TopicService(username)
+    except Exception as e:
+        print(f"❌ Error initializing clients: {e}")
+        return 1
+
+    if service.store.count() == 0:
+        imported = service.store.import_json_file("liked_tweets.json")
+        if imported:
+            print(f"📦 Imported {imported} tweets from legacy liked_tweets.json")
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: service.stop())
+    service.serve_forever()
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Resident blog topic service with a local HTTP trigger")
+    parser.add_argument('command', nargs='?', default='serve', choices=('serve', 'trigger', 'health'),
+                        help="Run the service (default), trigger a cycle, or show its health")
+    parser.add_argument('--generate', action='store_true', help="With trigger: generate even below MIN_NEW_TWEETS")
+    args = parser.parse_args(argv)
+
+    if args.command == 'trigger':
+        return call_service('/trigger?generate=1' if args.generate else '/trigger', method='POST')
+    if args.command == 'health':
+        return call_service('/health')
+    return serve()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import importlib.util
+import json
+import os
+from collections import Counter
+from datetime import date
+from typing import List, Dict, Optional
+
+from tweet_record import Tweet
+from tweet_store import TweetStore, ENTITY_SEPARATOR
+
+# numpy is imported where it is used, so importing this module doesn't load it
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+PERCENTILES = (50, 90, 99)
+
+
+def columns_from_tweets(tweets: List[Tweet]) -> Dict[str, list]:
+    """Pull the columns analytics needs out of a list of tweet records"""
+    return {
+        'author': [tweet.author_username or tweet.author_id for tweet in tweets],
+        'created_at': [tweet.created_at for tweet in tweets],
+        'engagement': [tweet.engagement for tweet in tweets],
+        'entities': [tweet.entity_names for tweet in tweets]
+    }
+
+
+def columns_from_store(store: TweetStore) -> Dict[str, list]:
+    """
+    Load analytics columns straight from the store
+
+    Only the denormalized columns are read, so the tweet JSON payloads are
+    never decoded.
+    """
+    rows = store.get_analytics_rows()
+
+    authors, created_at, engagement, entities = zip(*rows) if rows else ([], [], [], [])
+    return {
+        'author': list(authors),
+        'created_at': list(created_at),
+        'engagement': list(engagement),
+        'entities': [names.split(ENTITY_SEPARATOR) if names else [] for names in entities]
+    }
+
+
+def _time_histograms(created_at: List[Optional[str]]):
+    """Hour-of-day and weekday counts from ISO timestamps"""
+    hours = [0] * 24
+    weekdays = [0] * 7
+    weekday_of: Dict[str, int] = {}
+    for timestamp in created_at:
+        if not timestamp or len(timestamp) < 13:
+            continue
+        hours[int(timestamp[11:13])] += 1
+        day = timestamp[:10]
+        if day not in weekday_of:
+            weekday_of[day] = date(int(day[:4]), int(day[5:7]), int(day[8:10])).weekday()
+        weekdays[weekday_of[day]] += 1
+    return hours, weekdays
+
+
+def compute_analytics(columns: Dict[str, list], top_n: int = 10) -> Dict:
+    """
+    Per-author counts, engagement percentiles, time histograms and top entities
+
+    Authors are ranked by influence: the total engagement of their liked tweets,
+    then by how often they were liked. Uses NumPy when available.
+    """
+    authors = columns['author']
+    engagement = columns['engagement']
+    total = len(authors)
+
+    if HAS_NUMPY and total:
+        import numpy as np
+
+        values = np.asarray(engagement, dtype=np.int64)
+        names, inverse = np.unique(np.array([a or '' for a in authors], dtype=object), return_inverse=True)
+        counts = np.bincount(inverse)
+        influence = np.bincount(inverse, weights=values)
+        order = np.lexsort((-counts, -influence))
+        author_stats = [
+            {'author': names[i], 'tweets': int(counts[i]), 'engagement': int(influence[i])}
+            for i in order if names[i]
+        ]
+        percentiles = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+        percentiles['max'] = int(values.max())
+    else:
+        per_author: Dict[str, List[int]] = {}
+        for author, value in zip(authors, engagement):
+            if author:
+                stats = per_author.setdefault(author, [0, 0])
+                stats[0] += 1
+                stats[1] += value
+        author_stats = sorted(
+            ({'author': a, 'tweets': c, 'engagement': e} for a, (c, e) in per_author.items()),
+            key=lambda s: (-s['engagement'], -s['tweets'])
+        )
+        ordered = sorted(engagement)
+        percentiles = {
+            f"p{p}": float(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]) if ordered else 0.0
+            for p in PERCENTILES
+        }
+        percentiles['max'] = ordered[-1] if ordered else 0
+
+    hours, weekdays = _time_histograms(columns['created_at'])
+    entity_counts = Counter(name for names in columns['entities'] for name in set(names))
+
+    return {
+        'total_tweets': total,
+        'unique_authors': len(author_stats),
+        'top_authors': author_stats[:top_n],
+        'engagement_percentiles': percentiles,
+        'hour_histogram': hours,
+        'weekday_histogram': dict(zip(WEEKDAYS, weekdays)),
+        'top_entities': [{'entity': name, 'tweets': count} for name, count in entity_counts.most_common(top_n)]
+    }
+
+
+def analyze_store(store: TweetStore, top_n: int = 10) -> Dict:
+    """
+    Analytics over the whole store, cached per store snapshot
+
+    Results are kept next to the database and reused until the store's
+    snapshot key changes, so repeated summaries over a large archive are instant.
+    """
+    snapshot = store.snapshot_key()
+    cache_path = None
+    if store.db_path != ':memory:':
+        cache_path = f"{store.db_path}.analytics.json"
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('snapshot') == snapshot and cached.get('top_n') == top_n:
+                return cached['analytics']
+        except (FileNotFoundError, ValueError):
+            pass
+
+    analytics = compute_analytics(columns_from_store(store), top_n=top_n)
+
+    if cache_path:
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'snapshot': snapshot, 'top_n': top_n, 'analytics': analytics}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    return analytics
@@ -0,0 +1,123 @@
+import zlib
+from typing import List, Dict, Tuple
+
+from tweet_record import Tweet
+
+
+NUM_PERM = 32
+BANDS = 8
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.6
+
+_EMPTY = 2 ** 32
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> List[int]:
+    """Hash the word n-grams of a text to 32-bit ints"""
+    words = text.lower().split()
+    if len(words) <= size:
+        return [zlib.crc32(' '.join(words).encode())]
+    return list({zlib.crc32(' '.join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)})
+
+
+def minhash_signature(hashes: List[int]) -> Tuple[int, ...]:
+    """
+    One-permutation MinHash signature of a shingle set
+
+    Each shingle hash is routed to one of NUM_PERM bins and every bin keeps its
+    minimum, so a signature costs one pass over the shingles instead of one
+    pass per hash function. Empty bins borrow from the next filled bin
+    (rotation densification) so short texts still get comparable signatures.
+    """
+    mins = [_EMPTY] * NUM_PERM
+    for h in hashes:
+        slot, value = h % NUM_PERM, h // NUM_PERM
+        if value < mins[slot]:
+            mins[slot] = value
+
+    if _EMPTY in mins:
+        for slot in range(NUM_PERM):
+            if mins[slot] != _EMPTY:
+                continue
+            for distance in range(1, NUM_PERM):
+                donor = mins[(slot + distance) % NUM_PERM]
+                if donor < _EMPTY:
+                    mins[slot] = donor + distance * _EMPTY
+                    break
+    return tuple(mins)
+
+
+def estimated_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class _DisjointSet:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def collapse_duplicates(items: List[Tuple[Tweet, str]],
+                        threshold: float = SIMILARITY_THRESHOLD) -> List[Tuple[Tweet, str, int]]:
+    """
+    Collapse near-duplicate tweets and thread fragments into one representative each
+
+    Tweets are grouped when they share a `conversation_id`, when one references
+    another (quote, reply or retweet) by id, or when their cleaned texts are
+    near-duplicates by MinHash/LSH. Each LSH bucket is compared against its first
+    member only, so the work stays linear in the number of tweets.
+
+    Takes (tweet, cleaned_text) pairs and returns (tweet, text, group_size)
+    triples, one per group, with the most engaged-with tweet as representative,
+    in the order the groups first appear.
+    """
+    groups = _DisjointSet(len(items))
+
+    # Threads and quote/reply chains
+    by_conversation: Dict[str, int] = {}
+    by_id: Dict[str, int] = {}
+    for i, (tweet, _) in enumerate(items):
+        if tweet.id:
+            by_id[tweet.id] = i
+        if tweet.conversation_id:
+            groups.union(by_conversation.setdefault(tweet.conversation_id, i), i)
+    for i, (tweet, _) in enumerate(items):
+        for _, reference_id in tweet.references:
+            j = by_id.get(reference_id)
+            if j is not None:
+                groups.union(i, j)
+
+    # Near-duplicate text via locality-sensitive hashing on signature bands
+    rows = NUM_PERM // BANDS
+    signatures = [minhash_signature(shingle_hashes(text)) for _, text in items]
+    for band in range(BANDS):
+        buckets: Dict[Tuple[int, ...], int] = {}
+        for i, signature in enumerate(signatures):
+            key = signature[band * rows:(band + 1) * rows]
+            anchor = buckets.setdefault(key, i)
+            if anchor != i and estimated_similarity(signatures[anchor], signature) >= threshold:
+                groups.union(anchor, i)
+
+    members: Dict[int, List[int]] = {}
+    for i in range(len(items)):
+        members.setdefault(groups.find(i), []).append(i)
+
+    collapsed = []
+    for indexes in members.values():
+        best = max(indexes, key=lambda i: (items[i][0].engagement, -i))
+        tweet, text = items[best]
+        collapsed.append((min(indexes), tweet, text, len(indexes)))
+
+    collapsed.sort(key=lambda entry: entry[0])
+    return [(tweet, text, count) for _, tweet, text, count in collapsed]
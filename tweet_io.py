@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+READ_CHUNK_CHARS = 1 << 20
+
+
+def is_jsonl(filename: str) -> bool:
+    """Whether a tweets file is written one JSON object per line"""
+    return filename.lower().endswith(JSONL_EXTENSIONS)
+
+
+def _loads(text):
+    return orjson.loads(text) if HAS_ORJSON else json.loads(text)
+
+
+def _iter_json_array(f, chunk_chars: int) -> Iterator[Dict]:
+    """
+    Decode the objects of a top-level JSON array one at a time
+
+    The file is read in chunks and each element is decoded as soon as it is
+    complete, so only the current chunk and element are ever held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_chars).lstrip()
+    if not buffer:
+        return
+    if buffer[0] != '[':
+        raise ValueError("Expected a JSON array of tweets")
+    pos = 1
+    eof = False
+
+    while True:
+        # Skip whitespace and separators up to the next element
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        if pos < len(buffer):
+            try:
+                tweet, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield tweet
+                pos = end
+                continue
+        elif eof:
+            raise ValueError("Unterminated JSON array of tweets")
+
+        # Element incomplete (or buffer exhausted): read more
+        chunk = f.read(chunk_chars)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def iter_tweets(filename: str, chunk_chars: int = READ_CHUNK_CHARS) -> Iterator[Dict]:
+    """
+    Stream tweets from a JSON array file or a JSONL file without loading it whole
+
+    JSONL is detected by extension or by the file starting with an object
+    rather than an array. Missing files raise FileNotFoundError as `open` does.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        head = f.read(1)
+        while head.isspace():
+            head = f.read(1)
+        f.seek(0)
+
+        if is_jsonl(filename) or head == '{':
+            for line in f:
+                if line.strip():
+                    yield _loads(line)
+        else:
+            yield from _iter_json_array(f, chunk_chars)
+
+
+def write_tweets(tweets: Iterable[Dict], filename: str, pretty: bool = False) -> int:
+    """
+    Write tweets to a JSON array (or JSONL, by extension) file, one tweet at a time
+
+    Output is compact unless `pretty` is set (JSON arrays only, JSONL stays one
+    line per tweet), encoded with orjson when it is installed, and written to
+    a temporary file that replaces `filename` only once complete. Returns the
+    number of tweets written.
+    """
+    jsonl = is_jsonl(filename)
+    if pretty and not jsonl:
+        encode = lambda tweet: json.dumps(tweet, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+    elif HAS_ORJSON:
+        encode = lambda tweet: orjson.dumps(tweet, default=str)
+    else:
+        encode = lambda tweet: json.dumps(tweet, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+    count = 0
+    tmp_path = filename + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        if not jsonl:
+            f.write(b'[')
+        for tweet in tweets:
+            if jsonl:
+                f.write(encode(tweet) + b'\n')
+            else:
+                f.write((b',\n' if count else b'\n') + encode(tweet))
+            count += 1
+        if not jsonl:
+            f.write(b'\n]\n' if count else b']\n')
+    os.replace(tmp_path, filename)
+    return count
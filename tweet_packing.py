@@ -0,0 +1,89 @@
+import math
+from typing import List, Tuple
+
+from tweet_record import Tweet
+
+
+# Rough average for English text with Claude's tokenizer
+CHARS_PER_TOKEN = 4
+# Tokens spent on the blank line separating tweets in the prompt
+SEPARATOR_TOKENS = 1
+
+RANKINGS = ('recency', 'engagement', 'hybrid')
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens a piece of text uses in the prompt"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def rank_tweets(items: List[Tuple[Tweet, str]], rank_by: str = 'recency') -> List[Tuple[Tweet, str]]:
+    """
+    Order (tweet, text) pairs by recency, engagement or both
+
+    `hybrid` averages each tweet's recency rank and engagement rank, so a
+    recent tweet with little engagement and an older viral one score alike.
+    Ties keep the input order.
+    """
+    if rank_by not in RANKINGS:
+        raise ValueError(f"rank_by must be one of {', '.join(RANKINGS)}, got {rank_by!r}")
+
+    order = range(len(items))
+    by_recency = sorted(order, key=lambda i: items[i][0].created_at or '', reverse=True)
+    if rank_by == 'recency':
+        return [items[i] for i in by_recency]
+
+    by_engagement = sorted(order, key=lambda i: items[i][0].engagement, reverse=True)
+    if rank_by == 'engagement':
+        return [items[i] for i in by_engagement]
+
+    rank_sum = [0] * len(items)
+    for rank, i in enumerate(by_recency):
+        rank_sum[i] += rank
+    for rank, i in enumerate(by_engagement):
+        rank_sum[i] += rank
+    return [items[i] for i in sorted(order, key=lambda i: rank_sum[i])]
+
+
+def pack_tweets(items: List[Tuple[Tweet, str]], token_budget: int) -> Tuple[List[Tuple[Tweet, str]], int]:
+    """
+    Greedily fill the token budget with (tweet, text) pairs in ranked order
+
+    A tweet that doesn't fit is skipped rather than ending the packing, so
+    shorter tweets further down can still use the remaining budget.
+    Returns the packed pairs and the estimated tokens they use.
+    """
+    packed = []
+    tokens_used = 0
+    for tweet, text in items:
+        cost = estimate_tokens(text) + (SEPARATOR_TOKENS if packed else 0)
+        if tokens_used + cost > token_budget:
+            continue
+        packed.append((tweet, text))
+        tokens_used += cost
+        if token_budget - tokens_used <= SEPARATOR_TOKENS:
+            break
+    return packed, tokens_used
+
+
+def chunk_texts(texts: List[str], token_budget: int) -> List[List[str]]:
+    """
+    Split texts, in order, into consecutive batches that each fit the token budget
+
+    Unlike `pack_tweets` nothing is dropped: a text larger than the whole
+    budget gets a batch of its own.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        cost = estimate_tokens(text) + (SEPARATOR_TOKENS if current else 0)
+        if current and current_tokens + cost > token_budget:
+            batches.append(current)
+            current, current_tokens = [], 0
+            cost = estimate_tokens(text)
+        current.append(text)
+        current_tokens += cost
+    if current:
+        batches.append(current)
+    return batches
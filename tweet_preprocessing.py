@@ -0,0 +1,112 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from tweet_record import Tweet
+
+
+URL_PATTERN = re.compile(r'https?://\S+')
+# The lookbehinds sit after the literal so the regex engine can scan for '@'/'#'
+# directly; they keep email addresses and double markers from matching
+MENTION_PATTERN = re.compile(r'@(?<![\w@]@)\w{1,15}')
+HASHTAG_PATTERN = re.compile(r'#(?<![\w#]#)\w+')
+EMOJI_PATTERN = re.compile(
+    '['
+    '\U0001F000-\U0001FAFF'  # pictographs, emoticons, transport, symbols & flags
+    '\u2600-\u27BF'          # misc symbols and dingbats
+    '\u2B00-\u2BFF'          # arrows and stars
+    '\uFE0F\u200D'           # variation selector and zero-width joiner
+    ']+'
+)
+
+# Entity span kinds of a Tweet record, and which strip option covers them
+_ENTITY_KINDS = {'urls': 'urls', 'mentions': 'mentions', 'hashtags': 'hashtags', 'cashtags': 'hashtags'}
+
+# Below this many tweets a process pool costs more than it saves
+MIN_PARALLEL_BATCH = 20000
+
+
+def strip_entity_spans(tweet: Tweet, strip_mentions: bool = True, strip_hashtags: bool = True) -> str:
+    """
+    Cut URLs, mentions and hashtags out of a tweet's text using its entity offsets
+
+    X API v2 offsets count Unicode code points, which is what Python indexes
+    strings by. Tweets without entity offsets are returned unchanged and left
+    to the regex fallbacks in `clean_texts`.
+    """
+    text = tweet.text
+
+    spans = []
+    for key, start, end in tweet.spans:
+        kind = _ENTITY_KINDS[key]
+        if kind == 'mentions' and not strip_mentions:
+            continue
+        if kind == 'hashtags' and not strip_hashtags:
+            continue
+        if 0 <= start < end <= len(text):
+            spans.append((start, end))
+
+    if not spans:
+        return text
+
+    # Remove from the end so earlier offsets stay valid
+    for start, end in sorted(spans, reverse=True):
+        text = text[:start] + ' ' + text[end:]
+    return text
+
+
+def clean_text(text: str, strip_mentions: bool = True, strip_hashtags: bool = True,
+               strip_emoji: bool = True) -> str:
+    """
+    Remove URLs, optionally mentions, hashtags and emoji, then normalize whitespace
+
+    Each pattern only runs when a cheap substring check says it can match,
+    so most tweets skip most of the regex work.
+    """
+    if 'http' in text:
+        text = URL_PATTERN.sub('', text)
+    if strip_mentions and '@' in text:
+        text = MENTION_PATTERN.sub('', text)
+    if strip_hashtags and '#' in text:
+        text = HASHTAG_PATTERN.sub('', text)
+    if strip_emoji and not text.isascii():
+        text = EMOJI_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+
+def clean_texts(texts: List[str], strip_mentions: bool = True, strip_hashtags: bool = True,
+                strip_emoji: bool = True) -> List[str]:
+    """Clean a batch of raw tweet texts. Returns one cleaned string per input (possibly empty)."""
+    return [clean_text(text, strip_mentions, strip_hashtags, strip_emoji) for text in texts]
+
+
+def _clean_texts_chunk(args) -> List[str]:
+    """Process pool entry point for `clean_texts`"""
+    texts, strip_mentions, strip_hashtags, strip_emoji = args
+    return clean_texts(texts, strip_mentions, strip_hashtags, strip_emoji)
+
+
+def clean_tweets(tweets: List[Tweet], strip_mentions: bool = True, strip_hashtags: bool = True,
+                 strip_emoji: bool = True, processes: Optional[int] = None,
+                 chunk_size: int = 10000) -> List[str]:
+    """
+    Clean the text of many tweets at once
+
+    Entity spans are removed by offset first, then the remaining text is cleaned
+    in batches. With `processes` > 1 and a large enough batch, chunks are spread
+    over a process pool. Returns one cleaned string per tweet, in order.
+    """
+    texts = [strip_entity_spans(tweet, strip_mentions, strip_hashtags) for tweet in tweets]
+
+    if not processes or processes <= 1 or len(texts) < MIN_PARALLEL_BATCH:
+        return clean_texts(texts, strip_mentions, strip_hashtags, strip_emoji)
+
+    chunks = [
+        (texts[i:i + chunk_size], strip_mentions, strip_hashtags, strip_emoji)
+        for i in range(0, len(texts), chunk_size)
+    ]
+    cleaned = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for chunk in executor.map(_clean_texts_chunk, chunks):
+            cleaned.extend(chunk)
+    return cleaned
@@ -0,0 +1,134 @@
+import sys
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+
+# Entity types in the tweet JSON whose offsets are kept for span stripping
+SPAN_KINDS = ('urls', 'mentions', 'hashtags', 'cashtags')
+METRICS = ('like_count', 'retweet_count', 'reply_count', 'quote_count')
+
+
+def _intern(value) -> Optional[str]:
+    return sys.intern(str(value)) if value is not None else None
+
+
+class Tweet:
+    """
+    Compact record of the tweet fields the pipeline actually uses
+
+    Nested API payloads are flattened into tuples: entity offsets as
+    (kind, start, end) spans, context_annotations as (domain_id, entity_id,
+    entity_name) and referenced tweets as (type, id). Author, conversation,
+    annotation and reference strings are interned, so the many tweets sharing
+    them share one copy. `to_dict` gives back an X API shaped dict with just
+    these fields.
+    """
+
+    __slots__ = ('id', 'text', 'created_at', 'author_id', 'author_username', 'metrics',
+                 'conversation_id', 'references', 'spans', 'annotations')
+
+    def __init__(self, id: str, text: str = '', created_at: Optional[str] = None,
+                 author_id: Optional[str] = None, author_username: Optional[str] = None,
+                 metrics: Tuple[int, int, int, int] = (0, 0, 0, 0), conversation_id: Optional[str] = None,
+                 references: Tuple[Tuple[str, str], ...] = (), spans: Tuple[Tuple[str, int, int], ...] = (),
+                 annotations: Tuple[Tuple[str, str, str], ...] = ()):
+        self.id = id
+        self.text = text
+        self.created_at = created_at
+        self.author_id = author_id
+        self.author_username = author_username
+        self.metrics = metrics
+        self.conversation_id = conversation_id
+        self.references = references
+        self.spans = spans
+        self.annotations = annotations
+
+    def __repr__(self) -> str:
+        return f"Tweet(id={self.id!r}, author={self.author_username!r}, text={self.text[:40]!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Tweet):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    @property
+    def engagement(self) -> int:
+        """Sum of the public engagement counts (see tweet_store.engagement_score)"""
+        return sum(self.metrics)
+
+    @property
+    def entity_names(self) -> Tuple[str, ...]:
+        """Names of the context_annotations entities"""
+        return tuple(name for _, _, name in self.annotations if name)
+
+    @classmethod
+    def from_dict(cls, tweet: Dict) -> 'Tweet':
+        """Build a record from an X API tweet dict (as fetched, stored or saved to file)"""
+        metrics = tweet.get('public_metrics') or {}
+        entities = tweet.get('entities') or {}
+        spans = []
+        for kind in SPAN_KINDS:
+            for entity in entities.get(kind, ()):
+                start, end = entity.get('start'), entity.get('end')
+                if isinstance(start, int) and isinstance(end, int):
+                    spans.append((sys.intern(kind), start, end))
+
+        annotations = []
+        for annotation in tweet.get('context_annotations') or ():
+            domain = annotation.get('domain') or {}
+            entity = annotation.get('entity') or {}
+            annotations.append((_intern(domain.get('id')), _intern(entity.get('id')), _intern(entity.get('name'))))
+
+        return cls(
+            id=str(tweet.get('id', '')),
+            text=tweet.get('text') or '',
+            created_at=tweet.get('created_at'),
+            author_id=_intern(tweet.get('author_id')),
+            author_username=_intern((tweet.get('author') or {}).get('username')),
+            metrics=tuple(int(metrics.get(key, 0) or 0) for key in METRICS),
+            conversation_id=_intern(tweet.get('conversation_id')),
+            references=tuple((_intern(ref.get('type')), _intern(ref.get('id')))
+                             for ref in tweet.get('referenced_tweets') or () if ref.get('id')),
+            spans=tuple(spans),
+            annotations=tuple(annotations)
+        )
+
+    def to_dict(self) -> Dict:
+        """X API shaped dict of the kept fields, omitting empty ones"""
+        tweet = {'id': self.id, 'text': self.text}
+        if self.created_at:
+            tweet['created_at'] = self.created_at
+        if self.author_id:
+            tweet['author_id'] = self.author_id
+        if self.author_username:
+            tweet['author'] = {'id': self.author_id, 'username': self.author_username}
+        tweet['public_metrics'] = dict(zip(METRICS, self.metrics))
+        if self.conversation_id:
+            tweet['conversation_id'] = self.conversation_id
+        if self.references:
+            tweet['referenced_tweets'] = [{'type': kind, 'id': ref_id} for kind, ref_id in self.references]
+        if self.spans:
+            entities: Dict[str, list] = {}
+            for kind, start, end in self.spans:
+                entities.setdefault(kind, []).append({'start': start, 'end': end})
+            tweet['entities'] = entities
+        if self.annotations:
+            tweet['context_annotations'] = [
+                {'domain': {'id': domain}, 'entity': {'id': entity, 'name': name}}
+                for domain, entity, name in self.annotations
+            ]
+        return tweet
+
+
+def as_tweet(tweet: Union[Tweet, Dict]) -> Tweet:
+    """Return a record for a tweet dict, passing records through unchanged"""
+    return tweet if isinstance(tweet, Tweet) else Tweet.from_dict(tweet)
+
+
+def as_tweets(tweets: Iterable[Union[Tweet, Dict]]) -> Iterator[Tweet]:
+    """Lazily convert tweet dicts to records"""
+    return (as_tweet(tweet) for tweet in tweets)
+
+
+def slim_tweet(tweet: Dict) -> Dict:
+    """Drop everything from a tweet dict that the record doesn't keep"""
+    return Tweet.from_dict(tweet).to_dict()
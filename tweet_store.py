@@ -0,0 +1,279 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from itertools import islice
+from typing import List, Dict, Optional, Iterable
+from datetime import datetime, timedelta
+
+from tweet_io import iter_tweets
+
+
+TWEET_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.000Z'
+# Separates context_annotations entity names in the entity_names column
+ENTITY_SEPARATOR = '\x1f'
+
+
+def entity_names(tweet: Dict) -> List[str]:
+    """Names of the context_annotations entities of a tweet"""
+    return [
+        annotation['entity']['name']
+        for annotation in tweet.get('context_annotations') or ()
+        if annotation.get('entity', {}).get('name')
+    ]
+
+
+def engagement_score(tweet: Dict) -> int:
+    """Sum the public engagement counts of a tweet"""
+    metrics = tweet.get('public_metrics') or {}
+    return sum(int(metrics.get(key, 0) or 0) for key in ('like_count', 'retweet_count', 'reply_count', 'quote_count'))
+
+
+class TweetStore:
+    """
+    Persistent, incremental store of liked tweets backed by SQLite.
+
+    Tweets are keyed by id and indexed by created_at, author_id and engagement,
+    so callers can upsert new pages as they arrive and read back only the slice
+    they need instead of the whole archive.
+    """
+
+    def __init__(self, db_path: str = "liked_tweets.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create tables and indexes if they don't exist yet"""
+        with self._lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS tweets (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    created_at TEXT,
+                    author_id TEXT,
+                    engagement INTEGER NOT NULL DEFAULT 0,
+                    author_username TEXT,
+                    entity_names TEXT,
+                    data TEXT NOT NULL
+                )
+            """)
+            self._add_analytics_columns()
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tweets_created_at ON tweets(created_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tweets_author_id ON tweets(author_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tweets_engagement ON tweets(engagement)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+            # Tells this database apart from an earlier one at the same path
+            self.conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('store_id', ?)",
+                              (uuid.uuid4().hex,))
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    user_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL
+                )
+            """)
+
+    def _add_analytics_columns(self):
+        """Add and backfill the denormalized analytics columns on stores created before they existed"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tweets)")}
+        if 'entity_names' in columns:
+            return
+        self.conn.execute("ALTER TABLE tweets ADD COLUMN author_username TEXT")
+        self.conn.execute("ALTER TABLE tweets ADD COLUMN entity_names TEXT")
+        self.conn.execute("""
+            UPDATE tweets SET
+                author_username = json_extract(data, '$.author.username'),
+                entity_names = COALESCE((
+                    SELECT group_concat(json_extract(a.value, '$.entity.name'), char(31))
+                    FROM json_each(tweets.data, '$.context_annotations') AS a
+                ), '')
+        """)
+
+    def upsert_tweets(self, tweets: List[Dict]) -> int:
+        """
+        Insert or update tweets by id. Returns the number of tweets that were new.
+
+        Tweets are expected newest-liked first (the order the X API returns them),
+        so they are written in reverse to keep `seq` increasing with like recency.
+        """
+        rows = []
+        for tweet in reversed(tweets):
+            tweet_id = tweet.get('id')
+            if not tweet_id:
+                continue
+            rows.append((
+                str(tweet_id),
+                tweet.get('created_at'),
+                tweet.get('author_id'),
+                engagement_score(tweet),
+                (tweet.get('author') or {}).get('username'),
+                ENTITY_SEPARATOR.join(entity_names(tweet)),
+                json.dumps(tweet, ensure_ascii=False, default=str)
+            ))
+
+        if not rows:
+            return 0
+
+        with self._lock, self.conn:
+            before = self.conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+            self.conn.executemany("""
+                INSERT INTO tweets (id, created_at, author_id, engagement, author_username, entity_names, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    created_at = excluded.created_at,
+                    author_id = excluded.author_id,
+                    engagement = excluded.engagement,
+                    author_username = excluded.author_username,
+                    entity_names = excluded.entity_names,
+                    data = excluded.data
+            """, rows)
+            after = self.conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+            # Bump the revision so snapshot-keyed caches know the data changed
+            self.conn.execute("""
+                INSERT INTO store_meta (key, value) VALUES ('revision', '1')
+                ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+            """)
+
+        return after - before
+
+    def revision(self) -> int:
+        """Counter that changes every time tweets are written, identifying a snapshot of the store"""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM store_meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def snapshot_key(self) -> str:
+        """
+        Key identifying this database at its current revision
+
+        Unlike the revision alone, it differs for a database deleted and
+        recreated at the same path, whose revisions start over.
+        """
+        with self._lock:
+            rows = dict(self.conn.execute(
+                "SELECT key, value FROM store_meta WHERE key IN ('store_id', 'revision')"
+            ).fetchall())
+        return f"{rows.get('store_id', '')}:{rows.get('revision', 0)}"
+
+    def last_seq(self) -> int:
+        """Sequence number of the most recently inserted tweet (0 for an empty store)"""
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(seq) FROM tweets").fetchone()
+        return row[0] or 0
+
+    def count_since(self, seq: int) -> int:
+        """Number of tweets inserted after sequence number `seq` (updates of known tweets don't count)"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tweets WHERE seq > ?", (seq,)).fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Get a value from the store's key/value metadata"""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        """Persist a value in the store's key/value metadata"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, str(value))
+            )
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        """Run a query selecting the `data` column and decode the tweets"""
+        with self._lock:
+            rows = self.conn.execute(sql, tuple(params)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_recent_tweets(self, days_back: int = 7, limit: Optional[int] = None) -> List[Dict]:
+        """Get tweets created in the last `days_back` days, newest first"""
+        cutoff = (datetime.utcnow() - timedelta(days=days_back)).strftime(TWEET_TIME_FORMAT)
+        sql = "SELECT data FROM tweets WHERE created_at >= ? ORDER BY created_at DESC"
+        params = [cutoff]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, params)
+
+    def get_latest_liked(self, limit: int = 25) -> List[Dict]:
+        """Get the most recently liked tweets, newest first"""
+        return self._query("SELECT data FROM tweets ORDER BY seq DESC LIMIT ?", [limit])
+
+    def get_top_tweets(self, limit: int = 20, days_back: Optional[int] = None) -> List[Dict]:
+        """Get the most engaged-with tweets, optionally restricted to the last `days_back` days"""
+        if days_back is None:
+            return self._query("SELECT data FROM tweets ORDER BY engagement DESC LIMIT ?", [limit])
+
+        cutoff = (datetime.utcnow() - timedelta(days=days_back)).strftime(TWEET_TIME_FORMAT)
+        return self._query(
+            "SELECT data FROM tweets WHERE created_at >= ? ORDER BY engagement DESC LIMIT ?",
+            [cutoff, limit]
+        )
+
+    def get_tweets_by_author(self, author_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Get tweets from a single author, newest first"""
+        sql = "SELECT data FROM tweets WHERE author_id = ? ORDER BY created_at DESC"
+        params = [author_id]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, params)
+
+    def get_analytics_rows(self) -> List[tuple]:
+        """
+        (author, created_at, engagement, entity_names) of every tweet, from the denormalized columns
+
+        The author is the username, falling back to the author id. Tweet JSON payloads are not decoded.
+        """
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COALESCE(author_username, author_id), created_at, engagement, entity_names FROM tweets"
+            ).fetchall()
+
+    def count(self) -> int:
+        """Number of tweets in the store"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+
+    def import_json_file(self, filename: str = "liked_tweets.json", batch_size: int = 1000) -> int:
+        """Import a legacy liked_tweets.json (or JSONL) file into the store, streaming it in batches"""
+        if not os.path.exists(filename):
+            return 0
+        new_count = 0
+        tweets = iter_tweets(filename)
+        while True:
+            batch = list(islice(tweets, batch_size))
+            if not batch:
+                return new_count
+            new_count += self.upsert_tweets(batch)
+
+    def get_sync_state(self, user_id: str) -> Optional[Dict]:
+        """Get the persisted delta-sync state for a user, if any"""
+        with self._lock:
+            row = self.conn.execute("SELECT state FROM sync_state WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_sync_state(self, user_id: str, state: Dict):
+        """Persist the delta-sync state for a user"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO sync_state (user_id, state) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET state = excluded.state",
+                (user_id, json.dumps(state))
+            )
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,182 @@
+import asyncio
+import os
+from typing import Callable, List, Dict, Optional, Set, Union
+from datetime import datetime, timedelta
+
+from twitter_client_oauth import XClientBase
+from x_transport import RETRYABLE_STATUS, RateLimitScheduler, retry_delay
+from run_metrics import RunMetrics, traced
+from dotenv import load_dotenv
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+
+class AsyncTwitterClientOAuth(XClientBase):
+    """
+    asyncio variant of TwitterClientOAuth
+
+    Shares OAuth signing, page processing and the rate-limit scheduler with the
+    sync client through XClientBase, but sends requests over a pooled
+    httpx.AsyncClient so likes for many accounts can be fetched concurrently.
+    It keeps no fetch checkpoint and opens no requests session.
+    """
+
+    def __init__(self, scheduler: Optional[RateLimitScheduler] = None, max_connections: int = 10,
+                 metrics: Optional[RunMetrics] = None):
+        if not HAS_HTTPX:
+            raise ImportError("httpx is required for AsyncTwitterClientOAuth. Install it with: pip install httpx")
+        super().__init__(scheduler=scheduler, metrics=metrics)
+        self.max_connections = max_connections
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=self.timeout
+        )
+
+    async def aclose(self):
+        """Close the pooled async HTTP client"""
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _request_async(self, endpoint: str, url: str, headers: Union[Dict, Callable[[], Dict]],
+                             params: Dict = None):
+        """Send a GET over the async pool, respecting the endpoint's rate limit and retrying like `_request`"""
+        for attempt in range(self.max_retries + 1):
+            await self.scheduler.acquire_async(endpoint)
+            self.metrics.count('x_api.requests')
+            try:
+                with self.metrics.span('x_api.request', endpoint=endpoint, attempt=attempt) as span:
+                    response = await self.http.get(url, headers=headers() if callable(headers) else headers,
+                                                   params=params)
+                    span.update(status=response.status_code, bytes=len(response.content))
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = retry_delay(attempt, base_delay=self.retry_base_delay)
+                print(f"⚠️  {endpoint} request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                self.metrics.count('x_api.retries')
+                await asyncio.sleep(delay)
+                continue
+
+            self.metrics.count('x_api.bytes_received', len(response.content))
+            self.scheduler.update(endpoint, response.headers, response.status_code)
+            if response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                return response
+            self.metrics.count('x_api.retries')
+            delay = retry_delay(attempt, response.status_code, response.headers, base_delay=self.retry_base_delay)
+            print(f"⚠️  {endpoint} returned {response.status_code}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    @traced('x_api.get_user_id')
+    async def get_user_id_async(self, username: str) -> Optional[str]:
+        """Get user ID from username using Bearer Token"""
+        if not self.bearer_token:
+            print("Error: Bearer token required for user lookup")
+            return None
+
+        url = f"{self.base_url}/users/by/username/{username}"
+        headers = {
+            "Authorization": f"Bearer {self.bearer_token}",
+            "Content-Type": "application/json"
+        }
+
+        try:
+            response = await self._request_async(self.USER_LOOKUP_ENDPOINT, url, headers)
+            if response.status_code == 200:
+                return response.json().get('data', {}).get('id')
+            print(f"Error getting user ID: {response.status_code} - {response.text}")
+            return None
+        except Exception as e:
+            print(f"Error getting user ID: {e}")
+            return None
+
+    @traced('x_api.get_liked_tweets')
+    async def get_liked_tweets_async(self, user_id: str, max_results: int = 25, days_back: int = 7,
+                                     known_ids: Optional[Set[str]] = None) -> List[Dict]:
+        """Get liked tweets for a user using OAuth 1.0a"""
+        try:
+            cutoff_date = datetime.now() - timedelta(days=days_back)
+            url = f"{self.base_url}/users/{user_id}/liked_tweets"
+            params = self._liked_tweets_params(max_results)
+
+            all_tweets = []
+            next_token = None
+
+            while len(all_tweets) < max_results:
+                current_params = params.copy()
+                if next_token:
+                    current_params["pagination_token"] = next_token
+
+                response = await self._request_async(self.LIKED_TWEETS_ENDPOINT, url,
+                                                     lambda: self.get_oauth_headers("GET", url, current_params),
+                                                     current_params)
+
+                if response.status_code != 200:
+                    print(f"Error fetching liked tweets for {user_id}: {response.status_code} - {response.text}")
+                    break
+
+                data = response.json()
+                if 'data' not in data:
+                    break
+
+                recent_tweets, reached_known = self._process_liked_page(data, cutoff_date, known_ids)
+                all_tweets.extend(recent_tweets)
+
+                next_token = data.get('meta', {}).get('next_token')
+                if reached_known or not next_token or not recent_tweets:
+                    break
+
+            return all_tweets[:max_results]
+
+        except Exception as e:
+            print(f"Error fetching liked tweets for {user_id}: {e}")
+            return []
+
+    async def fetch_many(self, usernames: List[str], max_results: int = 25, days_back: int = 7,
+                         concurrency: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Fetch liked tweets for many accounts at once
+
+        Concurrency is bounded by `concurrency` (default: the pool size) and by
+        the slots the rate-limit scheduler reports as still available.
+        """
+        concurrency = concurrency or self.max_connections
+        slots = self.scheduler.available_slots(self.LIKED_TWEETS_ENDPOINT, concurrency) or 1
+        semaphore = asyncio.Semaphore(slots)
+
+        async def fetch_one(username: str) -> List[Dict]:
+            async with semaphore:
+                user_id = await self.get_user_id_async(username)
+                if not user_id:
+                    return []
+                return await self.get_liked_tweets_async(user_id, max_results=max_results, days_back=days_back)
+
+        results = await asyncio.gather(*(fetch_one(username) for username in usernames))
+        return dict(zip(usernames, results))
+
+
+async def main():
+    """Fetch liked tweets for a comma-separated list of X_USERNAMES"""
+    usernames = [u.strip() for u in os.getenv('X_USERNAMES', os.getenv('X_USERNAME', '')).split(',') if u.strip()]
+    if not usernames:
+        print("Please set X_USERNAMES (or X_USERNAME) in your .env file")
+        return
+
+    async with AsyncTwitterClientOAuth() as client:
+        results = await client.fetch_many(usernames, max_results=10, days_back=7)
+
+    for username, tweets in results.items():
+        print(f"@{username}: {len(tweets)} liked tweets")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    asyncio.run(main())
@@ -8,14 +8,38 @@ import urllib.parse
 import time
 import secrets
 import string
-from typing import List, Dict, Optional
+import math
+from typing import Callable, List, Dict, Optional, Set, Tuple, Union
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from tweet_store import TweetStore
+from tweet_io import write_tweets
+from tweet_record import slim_tweet
+from x_transport import RETRYABLE_STATUS, RateLimitScheduler, create_session, retry_delay
+from fetch_checkpoint import FetchCheckpoint
+from run_metrics import RunMetrics, traced
 
-load_dotenv()
 
-class TwitterClientOAuth:
-    def __init__(self):
+class XClientBase:
+    """
+    Credentials, OAuth 1.0a signing and page processing shared by the sync and
+    async X clients; subclasses add the transport that sends the requests
+    """
+    
+    # Rate-limit buckets tracked by the scheduler
+    USER_LOOKUP_ENDPOINT = "users/by/username"
+    LIKED_TWEETS_ENDPOINT = "users/liked_tweets"
+    
+    # tweet.fields requested per profile (TWEET_FIELDS). `minimal` covers text, author,
+    # engagement and threads; `standard` adds entity offsets for cleaning and quote/reply
+    # chains for dedup; `full` adds context_annotations for clustering and entity analytics.
+    FIELD_PROFILES = {
+        'minimal': "created_at,public_metrics,conversation_id",
+        'standard': "created_at,public_metrics,conversation_id,entities,referenced_tweets",
+        'full': "created_at,public_metrics,conversation_id,entities,referenced_tweets,context_annotations",
+    }
+    
+    def __init__(self, scheduler: Optional[RateLimitScheduler] = None, metrics: Optional[RunMetrics] = None):
         # Bearer Token for user lookup (app-only)
         self.bearer_token = os.getenv('X_API_BEARER_TOKEN')
         
@@ -25,7 +49,25 @@ class TwitterClientOAuth:
         self.access_token = os.getenv('X_ACCESS_TOKEN')
         self.access_token_secret = os.getenv('X_ACCESS_TOKEN_SECRET')
         
-        self.base_url = "https://api.x.com/2"
+        self.base_url = os.getenv('X_API_BASE_URL', "https://api.x.com/2")
+        self.last_fetch_stats = {}
+        
+        # Which fields to request, and whether to keep only what the pipeline uses
+        self.field_profile = os.getenv('TWEET_FIELDS', 'full')
+        if self.field_profile not in self.FIELD_PROFILES:
+            raise ValueError(f"TWEET_FIELDS must be one of {', '.join(self.FIELD_PROFILES)}, got {self.field_profile!r}")
+        self.slim_tweets = os.getenv('SLIM_TWEETS', '1') != '0'
+        
+        # Per-request timeout and retries of throttled or failed requests
+        self.timeout = float(os.getenv('X_API_TIMEOUT', '30'))
+        self.max_retries = int(os.getenv('X_API_MAX_RETRIES', '4'))
+        self.retry_base_delay = 1.0
+        
+        # Rate-limit aware scheduling
+        self.scheduler = scheduler or RateLimitScheduler()
+        
+        # Spans and counters for the run report
+        self.metrics = metrics or RunMetrics()
         
         # Validate credentials
         if not self.bearer_token:
@@ -84,6 +126,104 @@ class TwitterClientOAuth:
             "Content-Type": "application/json"
         }
     
+    def _liked_tweets_params(self, max_results: int) -> Dict:
+        """Query parameters for the liked tweets endpoint"""
+        return {
+            "max_results": min(max_results, 100),
+            "tweet.fields": self.FIELD_PROFILES[self.field_profile],
+            "expansions": "author_id",
+            "user.fields": "username" if self.slim_tweets else "username,name,verified"
+        }
+    
+    def _process_liked_page(self, data: Dict, cutoff_date: datetime,
+                            known_ids: Optional[Set[str]] = None) -> Tuple[List[Dict], bool]:
+        """
+        Filter a page of liked tweets by date and enrich them with author info
+        
+        Unless SLIM_TWEETS=0, each tweet is reduced to the fields a `Tweet` record
+        keeps before it is stored or saved. Returns the recent tweets and whether
+        an already-known tweet was reached.
+        """
+        tweets = data['data']
+        users = {user['id']: user for user in data.get('includes', {}).get('users', [])}
+        
+        recent_tweets = []
+        for tweet in tweets:
+            # Stop at the high-water mark from the previous sync
+            if known_ids and tweet.get('id') in known_ids:
+                return recent_tweets, True
+            
+            # Check if tweet is within date range
+            if 'created_at' in tweet:
+                try:
+                    tweet_date = datetime.strptime(tweet['created_at'], '%Y-%m-%dT%H:%M:%S.%fZ')
+                    if tweet_date < cutoff_date:
+                        continue
+                except ValueError:
+                    pass
+            
+            # Add author info
+            author_id = tweet.get('author_id')
+            if author_id in users:
+                tweet['author'] = users[author_id]
+            
+            recent_tweets.append(slim_tweet(tweet) if self.slim_tweets else tweet)
+        
+        return recent_tweets, False
+
+
+class TwitterClientOAuth(XClientBase):
+    # Number of newest tweet ids remembered as the delta-sync high-water mark
+    SYNC_KNOWN_IDS = 20
+    
+    def __init__(self, scheduler: Optional[RateLimitScheduler] = None, metrics: Optional[RunMetrics] = None):
+        super().__init__(scheduler=scheduler, metrics=metrics)
+        
+        # Where an interrupted fetch keeps its progress (an empty FETCH_CHECKPOINT_DIR disables it)
+        checkpoint_dir = os.getenv('FETCH_CHECKPOINT_DIR', '.cache/checkpoints')
+        self.checkpoint = FetchCheckpoint(checkpoint_dir) if checkpoint_dir else None
+        
+        # Keep-alive connection pool
+        self.session = create_session()
+    
+    def _request(self, endpoint: str, url: str, headers: Union[Dict, Callable[[], Dict]],
+                 params: Dict = None) -> requests.Response:
+        """
+        Send a GET over the pooled session, respecting the endpoint's rate limit
+        
+        Throttled (429), 5xx and timed-out requests are retried up to
+        `max_retries` times with jittered exponential backoff; a 429 waits for the
+        rate-limit reset. `headers` may be a callable, so OAuth headers get a fresh
+        nonce and timestamp for every attempt. Returns the last response, or
+        raises the last timeout/connection error.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.scheduler.acquire(endpoint)
+            self.metrics.count('x_api.requests')
+            try:
+                with self.metrics.span('x_api.request', endpoint=endpoint, attempt=attempt) as span:
+                    response = self.session.get(url, headers=headers() if callable(headers) else headers,
+                                                params=params, timeout=self.timeout)
+                    span.update(status=response.status_code, bytes=len(response.content))
+            except (requests.Timeout, requests.ConnectionError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = retry_delay(attempt, base_delay=self.retry_base_delay)
+                print(f"⚠️  {endpoint} request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                self.metrics.count('x_api.retries')
+                time.sleep(delay)
+                continue
+            
+            self.metrics.count('x_api.bytes_received', len(response.content))
+            self.scheduler.update(endpoint, response.headers, response.status_code)
+            if response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                return response
+            self.metrics.count('x_api.retries')
+            delay = retry_delay(attempt, response.status_code, response.headers, base_delay=self.retry_base_delay)
+            print(f"⚠️  {endpoint} returned {response.status_code}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+    
+    @traced('x_api.get_user_id')
     def get_user_id(self, username: str) -> Optional[str]:
         """Get user ID from username using Bearer Token"""
         if not self.bearer_token:
@@ -97,7 +237,7 @@ class TwitterClientOAuth:
         }
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self._request(self.USER_LOOKUP_ENDPOINT, url, headers)
             
             if response.status_code == 200:
                 data = response.json()
@@ -109,106 +249,199 @@ class TwitterClientOAuth:
             print(f"Error getting user ID: {e}")
             return None
     
-    def get_liked_tweets(self, user_id: str, max_results: int = 25, days_back: int = 7) -> List[Dict]:
+    @traced('x_api.get_liked_tweets')
+    def get_liked_tweets(self, user_id: str, max_results: int = 25, days_back: int = 7,
+                         known_ids: Optional[Set[str]] = None) -> List[Dict]:
         """
         Get liked tweets for a user using OAuth 1.0a
+        
+        If `known_ids` is given, paging stops at the first already-known tweet,
+        so only likes newer than the previous sync are fetched.
+        
+        Progress is checkpointed after every page. If the fetch stops early
+        (retries exhausted, auth error, crash), the tweets collected so far are
+        returned with `complete` set to False in `self.last_fetch_stats`, and the
+        next call with the same parameters resumes from the checkpointed page
+        (except after an auth error, which clears the checkpoint).
+        Page counts for the call are recorded in `self.last_fetch_stats` too.
         """
+        self.last_fetch_stats = {'pages_fetched': 0, 'reached_known': False, 'next_token': None,
+                                 'complete': False, 'resumed_pages': 0}
+        all_tweets = []
         try:
             cutoff_date = datetime.now() - timedelta(days=days_back)
             print(f"Filtering tweets from the last {days_back} days (since {cutoff_date.strftime('%Y-%m-%d')})")
             
             url = f"{self.base_url}/users/{user_id}/liked_tweets"
+            params = self._liked_tweets_params(max_results)
             
-            params = {
-                "max_results": min(max_results, 100),
-                "tweet.fields": "created_at,public_metrics,context_annotations,entities",
-                "expansions": "author_id",
-                "user.fields": "username,name,verified"
-            }
-            
-            all_tweets = []
+            # What a checkpoint must match to be resumed (the cutoff day, not time, so a restart matches)
+            fetch_key = {'max_results': max_results, 'since': cutoff_date.strftime('%Y-%m-%d'),
+                         'fields': params['tweet.fields'], 'known_ids': sorted(known_ids or ())}
             next_token = None
+            checkpoint = self.checkpoint.load(user_id, fetch_key) if self.checkpoint else None
+            if checkpoint:
+                all_tweets, next_token = checkpoint['tweets'], checkpoint['next_token']
+                self.last_fetch_stats['pages_fetched'] = self.last_fetch_stats['resumed_pages'] = checkpoint['pages_fetched']
+                print(f"Resuming from checkpoint: {len(all_tweets)} tweets from {checkpoint['pages_fetched']} pages")
             
+            complete = False
             while len(all_tweets) < max_results:
                 # Add pagination token if we have one
                 current_params = params.copy()
                 if next_token:
                     current_params["pagination_token"] = next_token
                 
-                # Create OAuth headers
-                headers = self.get_oauth_headers("GET", url, current_params)
-                
-                # Make the request
-                response = requests.get(url, headers=headers, params=current_params)
+                # Make the request, signing OAuth headers afresh for each attempt
+                response = self._request(self.LIKED_TWEETS_ENDPOINT, url,
+                                         lambda: self.get_oauth_headers("GET", url, current_params),
+                                         current_params)
                 
                 if response.status_code == 200:
                     data = response.json()
+                    self.last_fetch_stats['pages_fetched'] += 1
                     
                     if 'data' in data:
-                        tweets = data['data']
-                        users = {user['id']: user for user in data.get('includes', {}).get('users', [])}
-                        
-                        # Filter tweets by date and enrich with author info
-                        recent_tweets = []
-                        for tweet in tweets:
-                            # Check if tweet is within date range
-                            if 'created_at' in tweet:
-                                try:
-                                    tweet_date = datetime.strptime(tweet['created_at'], '%Y-%m-%dT%H:%M:%S.%fZ')
-                                    if tweet_date < cutoff_date:
-                                        continue
-                                except ValueError:
-                                    pass
-                            
-                            # Add author info
-                            author_id = tweet.get('author_id')
-                            if author_id in users:
-                                tweet['author'] = users[author_id]
-                            
-                            recent_tweets.append(tweet)
-                        
+                        recent_tweets, reached_known = self._process_liked_page(data, cutoff_date, known_ids)
                         all_tweets.extend(recent_tweets)
                         
                         # Check for pagination
                         meta = data.get('meta', {})
                         next_token = meta.get('next_token')
+                        self.last_fetch_stats['next_token'] = next_token
+                        
+                        if reached_known:
+                            self.last_fetch_stats['reached_known'] = True
+                            print("Reached tweets already synced, stopping pagination")
+                            complete = True
+                            break
                         
                         if not next_token or len(all_tweets) >= max_results:
+                            complete = True
                             break
                             
                         # Stop if we didn't find any recent tweets
                         if len(recent_tweets) == 0:
                             print(f"No more tweets found within {days_back} days")
+                            complete = True
                             break
+                        
+                        if self.checkpoint:
+                            self.checkpoint.save(user_id, fetch_key, next_token, all_tweets,
+                                                 self.last_fetch_stats['pages_fetched'])
                     else:
+                        complete = True
                         break
                         
-                elif response.status_code == 401:
-                    print(f"❌ Unauthorized (401): Check your OAuth credentials")
-                    print(f"Response: {response.text}")
-                    break
-                elif response.status_code == 403:
-                    print(f"❌ Forbidden (403): Your app may not have permission to access liked tweets")
+                elif response.status_code in (401, 403):
+                    if response.status_code == 401:
+                        print(f"❌ Unauthorized (401): Check your OAuth credentials")
+                    else:
+                        print(f"❌ Forbidden (403): Your app may not have permission to access liked tweets")
                     print(f"Response: {response.text}")
+                    # Retrying won't get past an auth error, so there is nothing to resume
+                    if self.checkpoint:
+                        self.checkpoint.clear(user_id)
                     break
                 else:
                     print(f"Error fetching liked tweets: {response.status_code} - {response.text}")
                     break
+            else:
+                complete = True
+            
+            self.last_fetch_stats['complete'] = complete
+            if complete and self.checkpoint:
+                self.checkpoint.clear(user_id)
+            elif not complete:
+                print(f"⚠️  Fetch incomplete after {self.last_fetch_stats['pages_fetched']} pages; "
+                      f"run again to resume from the checkpoint")
             
             filtered_tweets = all_tweets[:max_results]
             print(f"Found {len(filtered_tweets)} tweets from the last {days_back} days")
+            self.metrics.count('x_api.pages', self.last_fetch_stats['pages_fetched'] - self.last_fetch_stats['resumed_pages'])
+            self.metrics.count('x_api.tweets_fetched', len(filtered_tweets))
+            self.metrics.annotate(tweets=len(filtered_tweets), complete=complete)
             return filtered_tweets
             
         except Exception as e:
             print(f"Error fetching liked tweets: {e}")
-            return []
+            return all_tweets[:max_results]
     
+    @traced('x_api.sync_liked_tweets')
+    def sync_liked_tweets(self, user_id: str, store: TweetStore, max_results: int = 25,
+                          days_back: int = 7) -> Tuple[List[Dict], Dict]:
+        """
+        Fetch only likes newer than the last sync and upsert them into the store
+        
+        The newest-seen tweet ids and the size of a full window are persisted in
+        the store between runs; pagination is not, as a complete sync's token is
+        spent. If the fetch stopped early, the tweets it got are stored but the
+        sync state is left alone, so the next run resumes the same window from
+        its checkpoint instead of treating the gap as synced. Returns the new tweets
+        and a stats dict with pages fetched, pages skipped, the estimated tweet
+        reads saved and whether the fetch completed.
+        """
+        state = store.get_sync_state(user_id) or {}
+        known_ids = set(state.get('known_ids', []))
+        page_size = min(max_results, 100)
+        
+        if known_ids:
+            print(f"Delta sync: stopping at likes synced on {state.get('last_synced_at')}")
+        else:
+            print("Delta sync: no previous sync state, fetching full window")
+        
+        tweets = self.get_liked_tweets(user_id, max_results=max_results, days_back=days_back,
+                                       known_ids=known_ids or None)
+        fetch_stats = self.last_fetch_stats
+        pages_fetched = fetch_stats['pages_fetched']
+        
+        # A full window is what a non-delta run would have paged through
+        full_window_pages = state.get('full_window_pages') or math.ceil(max_results / page_size)
+        if not known_ids:
+            full_window_pages = max(pages_fetched, 1)
+        pages_skipped = max(full_window_pages - pages_fetched, 0) if fetch_stats['complete'] else 0
+        
+        if tweets:
+            self.save_tweets_to_store(tweets, store)
+        
+        stats = {
+            'new_tweets': len(tweets),
+            'pages_fetched': pages_fetched,
+            'pages_skipped': pages_skipped,
+            'quota_saved': pages_skipped * page_size,
+            'complete': fetch_stats['complete']
+        }
+        if not fetch_stats['complete']:
+            print(f"Delta sync incomplete: {stats['new_tweets']} tweets stored, sync state unchanged")
+            return tweets, stats
+        
+        # Keep a few of the newest ids, so an unliked tweet doesn't lose the mark
+        newest_ids = [str(tweet['id']) for tweet in tweets[:self.SYNC_KNOWN_IDS] if tweet.get('id')]
+        store.save_sync_state(user_id, {
+            'newest_id': newest_ids[0] if newest_ids else state.get('newest_id'),
+            'known_ids': (newest_ids + [i for i in state.get('known_ids', []) if i not in newest_ids])[:self.SYNC_KNOWN_IDS],
+            'reached_known': fetch_stats['reached_known'],
+            'full_window_pages': full_window_pages,
+            'last_synced_at': datetime.utcnow().isoformat() + 'Z'
+        })
+        
+        print(f"Delta sync: {stats['new_tweets']} new tweets, {pages_fetched} pages fetched, "
+              f"{pages_skipped} pages skipped (~{stats['quota_saved']} tweet reads saved)")
+        return tweets, stats
     
+    @traced('write.tweets_file')
     def save_tweets_to_file(self, tweets: List[Dict], filename: str = "liked_tweets.json"):
-        """Save tweets to a JSON file"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(tweets, f, indent=2, ensure_ascii=False, default=str)
-        print(f"Saved {len(tweets)} tweets to {filename}")
+        """Save tweets to a compact JSON (or .jsonl) file; set PRETTY_JSON=1 to indent it"""
+        count = write_tweets(tweets, filename, pretty=os.getenv('PRETTY_JSON', '0') == '1')
+        self.metrics.count('write.bytes', os.path.getsize(filename))
+        print(f"Saved {count} tweets to {filename}")
+    
+    @traced('write.store')
+    def save_tweets_to_store(self, tweets: List[Dict], store: TweetStore) -> int:
+        """Upsert tweets into the persistent tweet store"""
+        new_count = store.upsert_tweets(tweets)
+        print(f"Stored {len(tweets)} tweets in {store.db_path} ({new_count} new, {store.count()} total)")
+        return new_count
 
 
 def main():
@@ -249,4 +482,5 @@ def main():
 
 
 if __name__ == "__main__":
+    load_dotenv()
     main()
\ No newline at end of file
@@ -5,14 +5,53 @@ Blog Topic Generation Workflow
 This script combines fetching liked tweets and generating blog topics.
 """
 
+import argparse
+import json
 import os
 import sys
-from twitter_client_oauth import TwitterClientOAuth
-from blog_topic_generator import BlogTopicGenerator
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional
+from dotenv import load_dotenv
+from tweet_store import TweetStore
+from run_metrics import RunMetrics
+
+# The X and Anthropic clients (requests, anthropic, numpy) are imported where
+# they are used, so a run that fails its environment check exits straight away
+
+
+def write_run_report(metrics: RunMetrics, output_dir: str = ".") -> Dict:
+    """
+    Write run_report.json (and run_report.prom with RUN_REPORT_OPENMETRICS=1) to output_dir
+    
+    Returns the report.
+    """
+    openmetrics_path = None
+    if os.getenv('RUN_REPORT_OPENMETRICS', '0') == '1':
+        openmetrics_path = os.path.join(output_dir, 'run_report.prom')
+    report = metrics.write_report(os.path.join(output_dir, 'run_report.json'), openmetrics_path)
+    
+    usage = report['token_usage']
+    print(f"📈 Run report: {report['duration_seconds']:.2f}s, {usage['model_calls']} model calls, "
+          f"{usage['input_tokens']} in / {usage['output_tokens']} out tokens "
+          f"(~${report['estimated_cost_usd']:.4f}), saved to {os.path.join(output_dir, 'run_report.json')}")
+    return report
 
 
 def main():
-    """Main workflow to fetch tweets and generate blog topics"""
+    """Main workflow to fetch tweets and generate blog topics, with a run report"""
+    metrics = RunMetrics()
+    try:
+        with metrics.span('workflow'):
+            return run_workflow(metrics)
+    finally:
+        write_run_report(metrics)
+
+
+def run_workflow(metrics: RunMetrics) -> int:
+    """Fetch tweets and generate blog topics, recording spans and counters in `metrics`"""
     print("Blog Topic Generation Workflow")
     print("=" * 50)
     
@@ -27,8 +66,10 @@ def main():
     
     # Initialize clients
     try:
-        twitter_client = TwitterClientOAuth()
-        topic_generator = BlogTopicGenerator()
+        from twitter_client_oauth import TwitterClientOAuth
+        from blog_topic_generator import BlogTopicGenerator
+        twitter_client = TwitterClientOAuth(metrics=metrics)
+        topic_generator = BlogTopicGenerator(metrics=metrics)
     except Exception as e:
         print(f"❌ Error initializing clients: {e}")
         return 1
@@ -37,11 +78,13 @@ def main():
     username = os.getenv('X_USERNAME')
     max_tweets = int(os.getenv('MAX_TWEETS', '25'))
     days_back = int(os.getenv('DAYS_BACK', '7'))
+    delta_sync = os.getenv('DELTA_SYNC', '1') != '0'
     
     print(f"\n📋 Configuration:")
     print(f"- Username: @{username}")
     print(f"- Max tweets to fetch: {max_tweets}")
     print(f"- Days back: {days_back}")
+    print(f"- Delta sync: {'on' if delta_sync else 'off'}")
     
     # Step 1: Fetch liked tweets
     print(f"\n🔍 Step 1: Fetching liked tweets for @{username}...")
@@ -51,20 +94,36 @@ def main():
         print(f"❌ Could not get user ID for @{username}")
         return 1
     
-    tweets = twitter_client.get_liked_tweets(user_id, max_results=max_tweets, days_back=days_back)
-    if not tweets:
-        print("❌ No liked tweets found")
-        return 1
-    
-    print(f"✅ Found {len(tweets)} liked tweets")
+    # Open the persistent tweet store
+    store_path = os.getenv('TWEET_STORE', 'liked_tweets.db')
+    store = TweetStore(store_path)
+    if store.count() == 0:
+        imported = store.import_json_file("liked_tweets.json")
+        if imported:
+            print(f"📦 Imported {imported} tweets from legacy liked_tweets.json")
     
-    # Save tweets
-    tweets_file = "liked_tweets.json"
-    twitter_client.save_tweets_to_file(tweets, tweets_file)
+    if delta_sync:
+        # Only fetch likes newer than the last run
+        tweets, sync_stats = twitter_client.sync_liked_tweets(user_id, store, max_results=max_tweets, days_back=days_back)
+        if not tweets and store.count() == 0:
+            print("❌ No liked tweets found")
+            store.close()
+            return 1
+        print(f"✅ Found {len(tweets)} new liked tweets ({sync_stats['pages_skipped']} pages skipped)")
+    else:
+        tweets = twitter_client.get_liked_tweets(user_id, max_results=max_tweets, days_back=days_back)
+        if not tweets:
+            print("❌ No liked tweets found")
+            store.close()
+            return 1
+        
+        print(f"✅ Found {len(tweets)} liked tweets")
+        twitter_client.save_tweets_to_store(tweets, store)
     
     # Step 2: Generate blog topics
     print(f"\n💡 Step 2: Generating blog topic ideas...")
-    results = topic_generator.generate_blog_topics(tweets_file)
+    results = topic_generator.generate_blog_topics_from_store(store, days_back=days_back, max_tweets=max_tweets)
+    store.close()
     if not results:
         print("❌ Failed to generate blog topics")
         return 1
@@ -75,11 +134,293 @@ def main():
     
     print(f"\n✅ Workflow completed successfully!")
     print(f"📁 Files created:")
-    print(f"   - {tweets_file} (liked tweets data)")
+    print(f"   - {store_path} (liked tweets store)")
     print(f"   - blog_topics.json (generated topics)")
     
     return 0
 
 
+def run_account(username: str, get_twitter_client, topic_client, output_root: str,
+                max_tweets: int, days_back: int, delta_sync: bool = True, message_batch=None) -> Dict:
+    """
+    Run the fetch-and-generate workflow for one account in its own output directory
+    
+    Returns a report entry with per-stage timings, token usage and the failure,
+    if any; the account's full run report is written to its output directory.
+    With a `message_batch` (MessageBatch) the topic generation request is queued
+    in it instead, with status 'queued': the entry is completed in place once
+    the batch has run.
+    """
+    from blog_topic_generator import BlogTopicGenerator
+    
+    report = {'username': username, 'status': 'ok', 'error': None, 'tweets': 0, 'timings': {}}
+    output_dir = os.path.join(output_root, username)
+    started = time.perf_counter()
+    store = None
+    metrics = RunMetrics(run_id=username)
+    
+    def timed(stage, func, *args, **kwargs):
+        stage_started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            report['timings'][stage] = round(time.perf_counter() - stage_started, 3)
+    
+    def fail(e: Exception):
+        report['status'] = 'failed'
+        report['error'] = f"{type(e).__name__}: {e}"
+    
+    finished = False
+    
+    def finish():
+        nonlocal finished
+        finished = True
+        report['timings']['total'] = round(time.perf_counter() - started, 3)
+        if os.path.isdir(output_dir):
+            run_report = write_run_report(metrics, output_dir)
+            report['token_usage'] = run_report['token_usage']
+            report['estimated_cost_usd'] = run_report['estimated_cost_usd']
+    
+    def on_batch_results(results: Optional[Dict], error: Optional[str]):
+        report['timings']['generate_topics'] = round(time.perf_counter() - queued_at, 3)
+        try:
+            if results is None:
+                raise RuntimeError(f"Batch request failed ({error})")
+            topic_generator.save_results(results)
+            report['status'] = 'ok'
+        except Exception as e:
+            fail(e)
+        finally:
+            finish()
+    
+    try:
+        twitter_client = get_twitter_client()
+        # Clients are reused by a worker thread across accounts, so point this one at the account's metrics
+        twitter_client.metrics = metrics
+        topic_generator = BlogTopicGenerator(output_dir=output_dir, client=topic_client, metrics=metrics)
+        store = TweetStore(os.path.join(output_dir, 'liked_tweets.db'))
+        
+        user_id = timed('get_user_id', twitter_client.get_user_id, username)
+        if not user_id:
+            raise RuntimeError(f"Could not get user ID for @{username}")
+        
+        if delta_sync:
+            tweets, _ = timed('get_liked_tweets', twitter_client.sync_liked_tweets,
+                              user_id, store, max_results=max_tweets, days_back=days_back)
+        else:
+            tweets = timed('get_liked_tweets', twitter_client.get_liked_tweets,
+                           user_id, max_results=max_tweets, days_back=days_back)
+            twitter_client.save_tweets_to_store(tweets, store)
+        report['tweets'] = len(tweets)
+        # False when paging stopped early; the next run resumes from the fetch checkpoint
+        report['fetch_complete'] = twitter_client.last_fetch_stats.get('complete', True)
+        
+        if message_batch is not None:
+            # on_batch_results finishes the account; it runs straight away on a response cache hit
+            report['status'] = 'queued'
+            queued_at = time.perf_counter()
+            if not topic_generator.queue_blog_topics_from_store(store, message_batch, on_batch_results, name=username,
+                                                                days_back=days_back, max_tweets=max_tweets):
+                raise RuntimeError("No liked tweets to generate topics from")
+            return report
+        
+        results = timed('generate_topics', topic_generator.generate_blog_topics_from_store,
+                        store, days_back=days_back, max_tweets=max_tweets)
+        if not results:
+            raise RuntimeError("No liked tweets to generate topics from")
+        topic_generator.save_results(results)
+        
+    except Exception as e:
+        fail(e)
+        traceback.print_exc()
+    finally:
+        if store is not None:
+            store.close()
+        # A queued account is finished by on_batch_results (already, on a response cache hit)
+        if report['status'] != 'queued' and not finished:
+            finish()
+    
+    return report
+
+
+def run_batch(usernames: List[str], output_root: str = "runs", max_workers: int = 8,
+              max_tweets: int = 25, days_back: int = 7, delta_sync: bool = True,
+              message_batches: bool = False, topic_client=None) -> Dict:
+    """
+    Run the workflow for a roster of accounts on a bounded thread pool
+    
+    Each worker thread gets its own X client (sharing one rate-limit scheduler),
+    every account writes to output_root/<username>/, and the per-account timing
+    and failure report is written to output_root/batch_report.json, with the
+    spans of the batch as a whole in output_root/run_report.json.
+    
+    With `message_batches`, the accounts' topic generation requests are collected
+    while their tweets are fetched and then run as one Message Batches job, at
+    half the price and outside the Messages API rate limits, instead of one
+    synchronous call per account.
+    """
+    from twitter_client_oauth import TwitterClientOAuth
+    from blog_topic_generator import create_anthropic_client
+    from message_batches import MessageBatch
+    from x_transport import RateLimitScheduler
+    
+    os.makedirs(output_root, exist_ok=True)
+    scheduler = RateLimitScheduler()
+    local = threading.local()
+    
+    def get_twitter_client():
+        if not hasattr(local, 'client'):
+            local.client = TwitterClientOAuth(scheduler=scheduler)
+        return local.client
+    
+    # The Anthropic client is thread-safe, so one connection pool serves every account
+    topic_client = topic_client or create_anthropic_client()
+    
+    # Spans of the batch as a whole (accounts have their own run reports)
+    metrics = RunMetrics(run_id='batch')
+    message_batch = None
+    if message_batches and topic_client is not None:
+        message_batch = MessageBatch(topic_client, poll_interval=float(os.getenv('BATCH_POLL_INTERVAL', '60')),
+                                     metrics=metrics)
+    
+    started = time.perf_counter()
+    reports = []
+    with metrics.span('batch.accounts', accounts=len(usernames)):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(run_account, username, get_twitter_client, topic_client, output_root,
+                                max_tweets, days_back, delta_sync, message_batch)
+                for username in usernames
+            ]
+            for future in as_completed(futures):
+                reports.append(future.result())
+    
+    if message_batch is not None and len(message_batch):
+        # Completes the queued account reports in place
+        try:
+            message_batch.run()
+        except Exception as e:
+            print(f"❌ Message batch failed: {e}")
+            traceback.print_exc()
+            message_batch.fail_pending(f"{type(e).__name__}: {e}")
+    
+    reports.sort(key=lambda r: usernames.index(r['username']))
+    batch_report = {
+        'accounts': len(usernames),
+        'succeeded': sum(1 for r in reports if r['status'] == 'ok'),
+        'failed': sum(1 for r in reports if r['status'] != 'ok'),
+        'max_workers': max_workers,
+        'wall_clock_seconds': round(time.perf_counter() - started, 3),
+        'estimated_cost_usd': round(sum(r.get('estimated_cost_usd', 0) for r in reports), 6),
+        'message_batch': message_batch.last_stats if message_batch is not None else {},
+        'accounts_report': reports
+    }
+    
+    report_file = os.path.join(output_root, 'batch_report.json')
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(batch_report, f, indent=2, ensure_ascii=False)
+    metrics.write_report(os.path.join(output_root, 'run_report.json'))
+    
+    return batch_report
+
+
+def print_batch_report(batch_report: Dict):
+    """Print the per-account timing and failure report"""
+    print("\n" + "=" * 60)
+    print("BATCH REPORT")
+    print("=" * 60)
+    for report in batch_report['accounts_report']:
+        icon = "✅" if report['status'] == 'ok' else "❌"
+        timings = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in report['timings'].items())
+        print(f"{icon} @{report['username']}: {report['tweets']} tweets ({timings})")
+        if report['error']:
+            print(f"   {report['error']}")
+        elif not report.get('fetch_complete', True):
+            print("   fetch incomplete, rerun to resume from the checkpoint")
+    stats = batch_report.get('message_batch')
+    if stats and stats.get('error'):
+        print(f"\n📨 Message batch failed ({stats['error']}), {stats['failed']}/{stats['requests']} requests unanswered")
+    elif stats:
+        print(f"\n📨 Message batch: {stats['succeeded']}/{stats['requests']} requests succeeded "
+              f"in {stats['seconds']:.0f}s")
+    print(f"\n{batch_report['succeeded']}/{batch_report['accounts']} accounts succeeded "
+          f"in {batch_report['wall_clock_seconds']:.2f}s with {batch_report['max_workers']} workers "
+          f"(~${batch_report['estimated_cost_usd']:.4f} model cost)")
+
+
+def batch_main(usernames: List[str], output_root: str, max_workers: int, message_batches: bool = False) -> int:
+    """Batch workflow entry point for a roster of accounts"""
+    print("Blog Topic Generation Workflow (batch)")
+    print("=" * 50)
+    
+    required_vars = ['X_API_BEARER_TOKEN', 'X_API_KEY', 'X_API_SECRET', 'X_ACCESS_TOKEN', 'X_ACCESS_TOKEN_SECRET']
+    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    if missing_vars:
+        print(f"❌ Missing required environment variables: {', '.join(missing_vars)}")
+        print("Please set them in your .env file")
+        return 1
+    
+    print(f"- Accounts: {len(usernames)}")
+    print(f"- Workers: {max_workers}")
+    print(f"- Output directory: {output_root}")
+    print(f"- Message batches: {'on' if message_batches else 'off'}")
+    
+    batch_report = run_batch(
+        usernames,
+        output_root=output_root,
+        max_workers=max_workers,
+        max_tweets=int(os.getenv('MAX_TWEETS', '25')),
+        days_back=int(os.getenv('DAYS_BACK', '7')),
+        delta_sync=os.getenv('DELTA_SYNC', '1') != '0',
+        message_batches=message_batches
+    )
+    print_batch_report(batch_report)
+    print(f"📁 Report saved to {os.path.join(output_root, 'batch_report.json')}")
+    
+    return 0 if batch_report['failed'] == 0 else 1
+
+
+def load_roster(accounts: Optional[str], accounts_file: Optional[str]) -> List[str]:
+    """Read usernames from a comma-separated list and/or a file with one per line"""
+    usernames = []
+    if accounts:
+        usernames.extend(accounts.split(','))
+    if accounts_file:
+        with open(accounts_file, 'r', encoding='utf-8') as f:
+            usernames.extend(line for line in f if not line.lstrip().startswith('#'))
+    
+    # Strip, drop the @ and de-duplicate while keeping roster order
+    cleaned = [u.strip().lstrip('@') for u in usernames]
+    return list(dict.fromkeys(u for u in cleaned if u))
+
+
+def run_workflow(accounts: Optional[str] = None, accounts_file: Optional[str] = None, workers: int = 8,
+                 output_dir: str = "runs", message_batches: bool = False) -> int:
+    """Batch mode if a roster of accounts is given, else the single-account workflow"""
+    roster = load_roster(accounts, accounts_file)
+    if roster:
+        return batch_main(roster, output_dir, workers, message_batches)
+    return main()
+
+
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Fetch liked tweets and generate blog topic ideas")
+    parser.add_argument('--accounts', default=os.getenv('X_USERNAMES'),
+                        help="Comma-separated usernames to run in batch mode")
+    parser.add_argument('--accounts-file', help="File with one username per line to run in batch mode")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('BATCH_WORKERS', '8')),
+                        help="Number of accounts processed concurrently in batch mode")
+    parser.add_argument('--output-dir', default=os.getenv('BATCH_OUTPUT_DIR', 'runs'),
+                        help="Root directory for per-account batch output")
+    parser.add_argument('--message-batches', action='store_true', default=os.getenv('MESSAGE_BATCHES', '0') == '1',
+                        help="In batch mode, generate all accounts' topics in one Message Batches job")
+    parser.add_argument('--serve', action='store_true',
+                        help="Keep running: poll for new likes and generate topics when enough built up")
+    args = parser.parse_args()
+    
+    if args.serve:
+        from topic_service import serve
+        sys.exit(serve())
+    
+    sys.exit(run_workflow(args.accounts, args.accounts_file, args.workers, args.output_dir, args.message_batches))
\ No newline at end of file
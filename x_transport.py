@@ -0,0 +1,137 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Responses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def retry_delay(attempt: int, status_code: Optional[int] = None, headers=None,
+                base_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based)
+
+    A `retry-after` header is honored, clamped to 0..`max_delay` so a bad
+    value can neither break the sleep nor stall the fetch. A 429 only gets a
+    little jitter, since the RateLimitScheduler already holds the next request
+    until the `x-rate-limit-reset` time; the jitter keeps concurrent workers
+    from all firing at the reset. Everything else gets full-jitter exponential
+    backoff.
+    """
+    retry_after = (headers or {}).get('retry-after')
+    if retry_after is not None:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            delay = math.nan
+        if not math.isnan(delay):
+            return min(max(delay, 0.0), max_delay)
+    if status_code == 429:
+        return random.uniform(0, base_delay)
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """Create a requests session with a keep-alive connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimitScheduler:
+    """
+    Tracks X API rate-limit headers per endpoint and decides how long to wait
+    before the next request.
+
+    Each response's `x-rate-limit-remaining` and `x-rate-limit-reset` headers
+    are recorded under an endpoint key. When the window is exhausted callers
+    wait until it resets; when it's running low (below `low_watermark`) the
+    remaining requests are paced evenly over the rest of the window. Otherwise
+    requests go out immediately, and `available_slots` tells concurrent callers
+    how many requests they can safely prefetch.
+    """
+
+    def __init__(self, low_watermark: int = 3):
+        self.low_watermark = low_watermark
+        self._limits: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, key: str, headers, status_code: Optional[int] = None):
+        """Record the rate-limit headers from a response"""
+        remaining = headers.get('x-rate-limit-remaining')
+        reset = headers.get('x-rate-limit-reset')
+        limit = headers.get('x-rate-limit-limit')
+
+        with self._lock:
+            state = self._limits.setdefault(key, {})
+            if remaining is not None:
+                state['remaining'] = int(remaining)
+            if reset is not None:
+                state['reset'] = float(reset)
+            if limit is not None:
+                state['limit'] = int(limit)
+            if status_code == 429:
+                state['remaining'] = 0
+                # Without a reset header, back off for a minute
+                state.setdefault('reset', time.time() + 60)
+
+    def delay_for(self, key: str) -> float:
+        """Seconds to wait before the next request to `key`"""
+        with self._lock:
+            state = self._limits.get(key)
+            if not state or 'remaining' not in state:
+                return 0.0
+
+            now = time.time()
+            reset = state.get('reset', now)
+            if reset <= now:
+                # Window has reset, forget the stale counters
+                self._limits.pop(key, None)
+                return 0.0
+
+            remaining = state['remaining']
+            if remaining <= 0:
+                return reset - now + 1
+            if remaining < self.low_watermark:
+                return (reset - now) / (remaining + 1)
+            return 0.0
+
+    def acquire(self, key: str):
+        """Block until a request to `key` is allowed, then reserve it"""
+        delay = self.delay_for(key)
+        if delay > 0:
+            print(f"⏳ Rate limit low for {key}, waiting {delay:.1f}s")
+            time.sleep(delay)
+        self._reserve(key)
+
+    async def acquire_async(self, key: str):
+        """Async version of `acquire`"""
+        delay = self.delay_for(key)
+        if delay > 0:
+            print(f"⏳ Rate limit low for {key}, waiting {delay:.1f}s")
+            await asyncio.sleep(delay)
+        self._reserve(key)
+
+    def _reserve(self, key: str):
+        """Count an in-flight request against the known remaining budget"""
+        with self._lock:
+            state = self._limits.get(key)
+            if state and 'remaining' in state:
+                state['remaining'] -= 1
+
+    def available_slots(self, key: str, default: int) -> int:
+        """How many requests to `key` can be sent right now without hitting the limit"""
+        with self._lock:
+            state = self._limits.get(key)
+            if not state or 'remaining' not in state or state.get('reset', 0) <= time.time():
+                return default
+            return max(min(default, state['remaining'] - self.low_watermark + 1), 0)